@@ -0,0 +1,190 @@
+import numpy as np
+import xarray as xr
+import argparse
+from time import perf_counter
+
+import foxes
+from foxes_opt.core import ResultsContext
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+import foxes.constants as FC
+
+
+# The contraction of the baseline version, taken from
+# FarmVarObjective._contract and calc_population:
+def _contract(self, data, weights):
+    """
+    Helper function for data contraction
+    """
+    for dim, rule in self.rules.items():
+        if rule == "min":
+            data = data.min(dim=dim)
+        elif rule == "max":
+            data = data.max(dim=dim)
+        elif rule == "sum":
+            data = data.sum(dim=dim)
+        elif rule == "mean_no_weights":
+            data = data.mean(dim=dim)
+        elif dim == FC.STATE and rule == "weights":
+            odims = data.dims
+            wdims = weights.dims
+            if wdims == (FC.STATE,):
+                wx = "s"
+            elif wdims == (FC.POP, FC.STATE):
+                wx = "ps"
+            elif wdims == (FC.STATE, FC.TURBINE):
+                wx = "st"
+            elif wdims == (FC.POP, FC.STATE, FC.TURBINE):
+                wx = "pst"
+            else:
+                raise ValueError(
+                    f"Objective '{self.name}': Expecting weight dimensions {(FC.STATE,)}, {(FC.POP, FC.STATE)}, {(FC.STATE, FC.TURBINE)} or {(FC.POP, FC.STATE, FC.TURBINE)}, got {wdims}"
+                )
+            if len(odims) > 1 and odims[:2] == (FC.STATE, FC.TURBINE):
+                data = np.einsum(f"st...,{wx}->t...", data, weights)
+                data = xr.DataArray(data, dims=odims[1:])
+            elif len(odims) > 2 and odims[:3] == (FC.POP, FC.STATE, FC.TURBINE):
+                data = np.einsum(f"pst...,{wx}->pt...", data, weights)
+                data = xr.DataArray(data, dims=(FC.POP,) + odims[2:])
+            else:
+                raise NotImplementedError(
+                    f"Contraction error for '{rule}' for dim '{dim}': Incompatible data dims {odims}, shape {data.shape}, for weights of shape {weights.shape}"
+                )
+        elif dim == FC.STATE:
+            raise ValueError(
+                f"Objective '{self.name}': Unknown contraction for dimension '{dim}': '{rule}'. Choose: weights, mean_no_weights, sum, min, max"
+            )
+        else:
+            raise ValueError(
+                f"Objective '{self.name}': Unknown contraction for dimension '{dim}': '{rule}'. Choose: min, max, sum, mean_no_weights"
+            )
+    return data
+
+
+def contract_baseline(self, problem_results):
+    """The population contraction of the baseline version"""
+    n_pop = problem_results["n_pop"].values
+    n_states = problem_results["n_org_states"].values
+    n_turbines = problem_results.sizes[FC.TURBINE]
+
+    data = (
+        problem_results[self.variable].to_numpy().reshape(n_pop, n_states, n_turbines)
+    )
+    data = xr.DataArray(data, dims=(FC.POP, FC.STATE, FC.TURBINE))
+
+    weights = problem_results[FV.WEIGHT]
+    if weights.dims == (FC.STATE,):
+        weights = problem_results[FV.WEIGHT].to_numpy().reshape(n_pop, n_states)
+        wdims = (FC.POP, FC.STATE)
+    elif weights.dims == (FC.STATE, FC.TURBINE):
+        weights = (
+            problem_results[FV.WEIGHT].to_numpy().reshape(n_pop, n_states, n_turbines)
+        )
+        wdims = (FC.POP, FC.STATE, FC.TURBINE)
+    weights = xr.DataArray(weights, dims=wdims)
+
+    if self.n_sel_turbines < self.farm.n_turbines:
+        data = data[:, self.sel_turbines]
+
+    return _contract(self, data / self.scale, weights).to_numpy()[:, None]
+
+
+def timeit(f, n_calls):
+    """Returns the mean time per call in ms"""
+    f()
+    t0 = perf_counter()
+    for __ in range(n_calls):
+        f()
+    return (perf_counter() - t0) / n_calls * 1e3
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-nt",
+        "--n_t",
+        help="The numbers of turbines",
+        type=int,
+        default=[1, 4, 9, 25, 100],
+        nargs="+",
+    )
+    parser.add_argument(
+        "-ns", "--n_s", help="The number of states", type=int, default=8
+    )
+    parser.add_argument(
+        "-P", "--n_pop", help="The population size", type=int, default=40
+    )
+    parser.add_argument(
+        "-N", "--n_calls", help="The number of calls per timing", type=int, default=200
+    )
+    parser.add_argument(
+        "-t",
+        "--turbine_file",
+        help="The P-ct-curve csv file (path or static)",
+        default="NREL-5MW-D126-H90.csv",
+    )
+    args = parser.parse_args()
+
+    print(f"\nContraction per call, n_states = {args.n_s}, n_pop = {args.n_pop}:\n")
+    print(f"{'n_turbines':>10} {'baseline [ms]':>14} {'numpy [ms]':>12} {'speedup':>8}")
+
+    for n_t in args.n_t:
+        mbook = foxes.models.ModelBook()
+        ttype = foxes.models.turbine_types.PCtFile(args.turbine_file)
+        mbook.turbine_types[ttype.name] = ttype
+
+        farm = foxes.WindFarm()
+        N = int(np.sqrt(n_t) + 0.5)
+        foxes.input.farm_layout.add_grid(
+            farm,
+            xy_base=np.array([500.0, 500.0]),
+            step_vectors=np.array([[700.0, 0], [200, 600.0]]),
+            steps=(N, N),
+            turbine_models=["opt_yawm", "yawm2yaw", ttype.name],
+            verbosity=0,
+        )
+        states = foxes.input.states.ScanStates(
+            {
+                FV.WS: np.linspace(6.0, 12.0, args.n_s),
+                FV.WD: [270.0],
+                FV.TI: [0.05],
+                FV.RHO: [1.225],
+            }
+        )
+        algo = foxes.algorithms.Downwind(
+            farm,
+            states,
+            rotor_model="centre",
+            wake_models=["Bastankhah2014_vector_k002"],
+            wake_frame="rotor_wd",
+            wake_deflection="Jimenez",
+            mbook=mbook,
+            verbosity=0,
+        )
+
+        problem = OptFarmVars("opt_yawm", algo)
+        problem.add_var(FV.YAWM, float, 0.0, -40.0, 40.0, level="turbine")
+        problem.add_objective(MaxFarmPower(problem))
+
+        with foxes.Engine.new("single", verbosity=0):
+            problem.initialize(verbosity=0)
+            x = np.random.default_rng(42).uniform(
+                -40.0, 40.0, (args.n_pop, problem.n_vars_float)
+            )
+            xi = np.zeros((args.n_pop, 0), dtype=np.int32)
+            results = problem.apply_population(xi, x)
+
+        obj = problem.objs.functions[0]
+        assert np.allclose(
+            obj.calc_population(xi, x, results), contract_baseline(obj, results)
+        )
+
+        t_base = timeit(lambda: contract_baseline(obj, results), args.n_calls)
+        t_np = timeit(lambda: obj.contract(ResultsContext(results)), args.n_calls)
+        print(
+            f"{farm.n_turbines:>10} {t_base:>14.4f} {t_np:>12.4f} {t_base / t_np:>8.1f}"
+        )
+        problem.finalize()
+
+    print()
@@ -102,6 +102,20 @@ class AreaGeometryConstraint(FarmConstraint):
         np.fill_diagonal(deps[:, :, 1], True)
         return deps.reshape(self.n_components(), self.n_components() * 2)
 
+    def required_farm_vars(self):
+        """
+        The farm variables that are read from
+        the farm results
+
+        Returns
+        -------
+        vrs: list of str
+            The required farm variables, or None
+            for all
+
+        """
+        return [FV.D] if self.disc_inside and self.D is None else []
+
     def calc_individual(self, vars_int, vars_float, problem_results, components=None):
         """
         Calculate values for a single individual of the
@@ -135,7 +149,8 @@ class AreaGeometryConstraint(FarmConstraint):
 
         if self.disc_inside:
             if self.D is None:
-                dists += problem_results[FV.D].to_numpy()[0, self.sel_turbines][s] / 2
+                ctx = self.problem.results_context(problem_results)
+                dists += ctx.get(FV.D)[0, 0, self.sel_turbines][s] / 2
             else:
                 dists += self.D / 2
 
@@ -177,9 +192,8 @@ class AreaGeometryConstraint(FarmConstraint):
 
         if self.disc_inside:
             if self.D is None:
-                dists += (
-                    problem_results[FV.D].to_numpy()[None, 0, self.sel_turbines][s] / 2
-                )
+                ctx = self.problem.results_context(problem_results)
+                dists += ctx.get(FV.D)[:1, 0, self.sel_turbines][s] / 2
             else:
                 dists += self.D / 2
 
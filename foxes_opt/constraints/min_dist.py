@@ -2,7 +2,6 @@ import numpy as np
 
 from foxes_opt.core.farm_constraint import FarmConstraint
 import foxes.variables as FV
-import foxes.constants as FC
 
 
 class MinDistConstraint(FarmConstraint):
@@ -122,6 +121,20 @@ class MinDistConstraint(FarmConstraint):
                     deps[i, j] = True
         return deps.reshape(self.n_components(), 2 * len(turbs))
 
+    def required_farm_vars(self):
+        """
+        The farm variables that are read from
+        the farm results
+
+        Returns
+        -------
+        vrs: list of str
+            The required farm variables, or None
+            for all
+
+        """
+        return [FV.X, FV.Y, FV.D]
+
     def calc_individual(self, vars_int, vars_float, problem_results, components=None):
         """
         Calculate values for a single individual of the
@@ -145,10 +158,8 @@ class MinDistConstraint(FarmConstraint):
             The component values, shape: (n_sel_components,)
 
         """
-        xy = np.stack(
-            [problem_results[FV.X].to_numpy(), problem_results[FV.Y].to_numpy()],
-            axis=-1,
-        )
+        ctx = self.problem.results_context(problem_results)
+        xy = np.stack([ctx.get(FV.X)[0], ctx.get(FV.Y)[0]], axis=-1)
         if not np.all(np.abs(np.min(xy, axis=0) - np.max(xy, axis=0)) < 1e-13):
             raise ValueError(f"Constraint '{self.name}': Require state independet XY")
         xy = xy[0]
@@ -165,7 +176,7 @@ class MinDistConstraint(FarmConstraint):
             mind = self.min_dist
 
         elif self.min_dist_unit == "D":
-            D = problem_results[FV.D].to_numpy()
+            D = ctx.get(FV.D)[0]
             if not np.all(np.abs(np.min(D, axis=0) - np.max(D, axis=0)) < 1e-13):
                 raise ValueError(
                     f"Constraint '{self.name}': Require state independet D"
@@ -200,15 +211,8 @@ class MinDistConstraint(FarmConstraint):
             The component values, shape: (n_pop, n_sel_components)
 
         """
-        n_pop = problem_results["n_pop"].values
-        n_states = problem_results["n_org_states"].values
-        n_turbines = problem_results.sizes[FC.TURBINE]
-
-        xy = np.stack(
-            [problem_results[FV.X].to_numpy(), problem_results[FV.Y].to_numpy()],
-            axis=-1,
-        )
-        xy = xy.reshape(n_pop, n_states, n_turbines, 2)
+        ctx = self.problem.results_context(problem_results)
+        xy = np.stack([ctx.get(FV.X), ctx.get(FV.Y)], axis=-1)
         if not np.all(np.abs(np.min(xy, axis=1) - np.max(xy, axis=1)) < 1e-13):
             raise ValueError(f"Constraint '{self.name}': Require state independet XY")
         xy = xy[:, 0]
@@ -225,7 +229,7 @@ class MinDistConstraint(FarmConstraint):
             mind = self.min_dist
 
         elif self.min_dist_unit == "D":
-            D = problem_results[FV.D].to_numpy().reshape(n_pop, n_states, n_turbines)
+            D = ctx.get(FV.D)
             if not np.all(np.abs(np.min(D, axis=1) - np.max(D, axis=1)) < 1e-13):
                 raise ValueError(
                     f"Constraint '{self.name}': Require state independet D"
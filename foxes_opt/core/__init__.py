@@ -2,7 +2,21 @@
 Abstract classes and core functionality for wind farm optimization.
 """
 
+from .problem_component import ProblemComponent as ProblemComponent
+from .problem_engine import ProblemEngine as ProblemEngine
 from .farm_opt_problem import FarmOptProblem as FarmOptProblem
 from .farm_vars_problem import FarmVarsProblem as FarmVarsProblem
+from .sparse_farm_vars import SparseFarmVars as SparseFarmVars
 from .farm_objective import FarmObjective as FarmObjective
 from .farm_constraint import FarmConstraint as FarmConstraint
+from .eval_cache import EvalCache as EvalCache
+from .eval_pool import EvalPool as EvalPool
+from .phase_timer import PhaseTimer as PhaseTimer
+from .results_context import ResultsContext as ResultsContext
+from .selected_states import SelectedStates as SelectedStates
+from .frozen_background import FrozenBackground as FrozenBackground
+from .states_compression import StatesCompression as StatesCompression
+from .multi_fidelity import MultiFidelity as MultiFidelity
+from .state_decomposition import StateDecomposition as StateDecomposition
+from .checkpoint import Checkpointer as Checkpointer
+from .checkpoint import CheckpointCallback as CheckpointCallback
@@ -0,0 +1,264 @@
+import os
+import io
+import copy
+import pickle
+import cloudpickle
+import numpy as np
+from pathlib import Path
+from pymoo.core.callback import Callback
+from pymoo.util.misc import termination_from_tuple
+from iwopy.interfaces.pymoo import Optimizer_pymoo
+from iwopy.interfaces.pymoo.optimizer import DefaultCallbackTemplate
+
+
+class CheckpointCallback(Callback):
+    """
+    Pymoo callback that writes checkpoints after
+    completed generations.
+
+    Attributes
+    ----------
+    checkpointer: foxes_opt.core.Checkpointer
+        The checkpointer
+    optimizer: iwopy.interfaces.pymoo.Optimizer_pymoo
+        The optimizer
+    callback: pymoo.core.callback.Callback
+        The wrapped callback, or None
+
+    :group: opt.core
+
+    """
+
+    def __init__(self, checkpointer, optimizer, callback="default"):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        checkpointer: foxes_opt.core.Checkpointer
+            The checkpointer
+        optimizer: iwopy.interfaces.pymoo.Optimizer_pymoo
+            The optimizer
+        callback: pymoo.core.callback.Callback, optional
+            The wrapped callback, or default for the
+            iwopy default callback
+
+        """
+        super().__init__()
+        self.checkpointer = checkpointer
+        self.optimizer = optimizer
+        self._default = isinstance(callback, str) and callback == "default"
+        if self._default:
+            callback = DefaultCallbackTemplate.get_class()
+        self.callback = callback
+        if callback is not None:
+            self.data = callback.data
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self._default:
+            # the dynamically created iwopy class cannot be pickled:
+            state["callback"] = (self.callback.data, self.callback.is_initialized)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._default:
+            data, ini = self.callback
+            self.callback = DefaultCallbackTemplate.get_class()
+            self.callback.data = data
+            self.callback.is_initialized = ini
+            self.data = data
+
+    def notify(self, algorithm):
+        if self.callback is not None:
+            self.callback(algorithm)
+        if algorithm.n_iter % self.checkpointer.every == 0:
+            self.checkpointer.save(self.optimizer, algorithm)
+
+
+class Checkpointer:
+    """
+    Writes and restores checkpoints of pymoo
+    optimization runs.
+
+    A checkpoint contains the state of the pymoo
+    algorithm, the random number generator state and
+    the state of the farm optimization problem, i.e.,
+    counters, timings and component states, e.g. of the
+    evaluation cache. Problem, algorithm and wind farm
+    are not stored, they are
+    re-created from the inputs when resuming.
+
+    Attributes
+    ----------
+    fpath: pathlib.Path
+        The path of the checkpoint file
+    every: int
+        Write a checkpoint every this number
+        of generations
+
+    :group: opt.core
+
+    """
+
+    def __init__(self, fname, every=1):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        fname: str
+            Name of the checkpoint file
+        every: int
+            Write a checkpoint every this number
+            of generations
+
+        """
+        self.fpath = Path(fname)
+        self.every = every
+
+    @classmethod
+    def _find_farm_problem(cls, problem):
+        """Helper function that finds the wrapped farm problem"""
+        while not hasattr(problem, "get_state"):
+            if not hasattr(problem, "base_problem"):
+                return None
+            problem = problem.base_problem
+        return problem
+
+    def _persistent(self, optimizer):
+        """Helper function for objects that are not pickled"""
+        objs = {
+            "checkpointer": self,
+            "optimizer": optimizer,
+            "pymoo_problem": optimizer.pymoo_problem,
+        }
+        p = optimizer.problem
+        i = 0
+        while p is not None:
+            objs[f"problem{i}"] = p
+            p = getattr(p, "base_problem", None)
+            i += 1
+        return objs
+
+    def save(self, optimizer, algorithm):
+        """
+        Writes a checkpoint
+
+        Parameters
+        ----------
+        optimizer: iwopy.interfaces.pymoo.Optimizer_pymoo
+            The optimizer
+        algorithm: pymoo.core.algorithm.Algorithm
+            The running pymoo algorithm
+
+        """
+        pids = {id(o): k for k, o in self._persistent(optimizer).items()}
+
+        class _Pickler(cloudpickle.CloudPickler):
+            def persistent_id(self, obj):
+                return pids.get(id(obj), None)
+
+        fproblem = self._find_farm_problem(optimizer.problem)
+        data = dict(
+            n_iter=algorithm.n_iter,
+            algorithm=algorithm,
+            np_random=np.random.get_state(),
+            problem_state=fproblem.get_state() if fproblem is not None else None,
+        )
+
+        buf = io.BytesIO()
+        _Pickler(buf).dump(data)
+
+        tmp = self.fpath.with_name(self.fpath.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(buf.getvalue())
+        os.replace(tmp, self.fpath)
+
+    def restore(self, optimizer, verbosity=1):
+        """
+        Restores the optimizer and problem state
+        from the checkpoint
+
+        Parameters
+        ----------
+        optimizer: iwopy.interfaces.pymoo.Optimizer_pymoo
+            The initialized optimizer
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        Returns
+        -------
+        n_iter: int
+            The last completed generation
+
+        """
+        pobjs = self._persistent(optimizer)
+
+        class _Unpickler(pickle.Unpickler):
+            def persistent_load(self, pid):
+                return pobjs[pid]
+
+        with open(self.fpath, "rb") as f:
+            data = _Unpickler(f).load()
+
+        algorithm = data["algorithm"]
+        algorithm.n_iter = data["n_iter"] + 1
+        algorithm.termination = termination_from_tuple(copy.deepcopy(optimizer.term))
+        optimizer.algo = algorithm
+
+        np.random.set_state(data["np_random"])
+        if data["problem_state"] is not None:
+            fproblem = self._find_farm_problem(optimizer.problem)
+            fproblem.set_state(data["problem_state"])
+
+        if verbosity > 0:
+            print(
+                f"{type(self).__name__}: Resuming from {self.fpath}, generation {data['n_iter']}"
+            )
+
+        return data["n_iter"]
+
+    def solve(self, optimizer, resume=False, verbosity=1, **kwargs):
+        """
+        Runs the optimizer, writing checkpoints
+
+        Parameters
+        ----------
+        optimizer: iwopy.interfaces.pymoo.Optimizer_pymoo
+            The initialized optimizer
+        resume: bool
+            Continue from the checkpoint file,
+            if it exists
+        verbosity: int
+            The verbosity level, 0 = silent
+        kwargs: dict, optional
+            Additional parameters for the solve
+            function of the optimizer
+
+        Returns
+        -------
+        results: iwopy.SingleObjOptResults or iwopy.MultiObjOptResults
+            The optimization results object
+
+        """
+        if not isinstance(optimizer, Optimizer_pymoo):
+            raise TypeError(
+                f"{type(self).__name__}: Checkpoints require an optimizer of type 'Optimizer_pymoo', got '{type(optimizer).__name__}'"
+            )
+
+        if resume and self.fpath.is_file():
+            self.restore(optimizer, verbosity=verbosity)
+            setup_pars = optimizer.setup_pars
+            optimizer.setup_pars = dict(setup_pars, copy_algorithm=False)
+            try:
+                return optimizer.solve(verbosity=verbosity, **kwargs)
+            finally:
+                optimizer.setup_pars = setup_pars
+
+        callback = CheckpointCallback(
+            self, optimizer, kwargs.pop("callback", "default")
+        )
+
+        return optimizer.solve(callback=callback, verbosity=verbosity, **kwargs)
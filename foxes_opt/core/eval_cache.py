@@ -0,0 +1,332 @@
+import numpy as np
+from collections import OrderedDict
+
+from .problem_component import ProblemComponent
+
+
+class EvalCache(ProblemComponent):
+    """
+    Least-recently-used storage of objective and
+    constraint values of evaluated individuals.
+
+    Attributes
+    ----------
+    max_size: int
+        The maximal number of stored entries,
+        or None for unbounded
+    max_bytes: int
+        The maximal memory of stored entries in bytes,
+        or None for unbounded
+    tol: float
+        The quantization tolerance for float variables,
+        or None for exact matching
+    n_hits: int
+        The number of cache hits
+    n_misses: int
+        The number of cache misses
+    n_evictions: int
+        The number of evicted entries
+
+    :group: opt.core
+
+    """
+
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, max_size=None, max_bytes=None, tol=None):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        max_size: int, optional
+            The maximal number of stored entries
+        max_bytes: int, optional
+            The maximal memory of stored entries in bytes
+        tol: float, optional
+            The quantization tolerance for float variables,
+            or None for exact matching
+
+        """
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.tol = tol
+        self.clear()
+
+    def clear(self):
+        """
+        Removes all entries and resets the counters
+        """
+        self._data = OrderedDict()
+        self._nbytes = 0
+        self.n_hits = 0
+        self.n_misses = 0
+        self.n_evictions = 0
+
+    @property
+    def size(self):
+        """
+        The number of stored entries
+
+        Returns
+        -------
+        int :
+            The number of stored entries
+
+        """
+        return len(self._data)
+
+    @property
+    def nbytes(self):
+        """
+        The estimated memory of the stored entries
+
+        Returns
+        -------
+        int :
+            The estimated memory in bytes
+
+        """
+        return self._nbytes
+
+    @property
+    def hit_rate(self):
+        """
+        The ratio of hits over all lookups
+
+        Returns
+        -------
+        float :
+            The hit rate, or NaN if no lookup happened
+
+        """
+        n = self.n_hits + self.n_misses
+        return self.n_hits / n if n > 0 else np.nan
+
+    def key(self, vars_int, vars_float, fidelity=None):
+        """
+        Creates the cache key of an individual
+
+        Parameters
+        ----------
+        vars_int: numpy.ndarray
+            The integer variable values, shape: (n_vars_int,)
+        vars_float: numpy.ndarray
+            The float variable values, shape: (n_vars_float,)
+        fidelity: str, optional
+            The fidelity of the evaluation, such that
+            results of different fidelities are kept apart
+
+        Returns
+        -------
+        key: tuple
+            The key, a tuple of bytes and the fidelity
+
+        """
+        vi = np.ascontiguousarray(vars_int, dtype=np.int64)
+        if self.tol is None:
+            vf = np.ascontiguousarray(vars_float, dtype=np.float64)
+        else:
+            vf = np.round(np.asarray(vars_float) / self.tol).astype(np.int64)
+        return (vi.tobytes(), vf.tobytes(), fidelity)
+
+    def _evict(self):
+        """Helper function for removing least recently used entries"""
+        while len(self._data) and (
+            (self.max_size is not None and len(self._data) > self.max_size)
+            or (self.max_bytes is not None and self._nbytes > self.max_bytes)
+        ):
+            __, (objs, cons, n) = self._data.popitem(last=False)
+            self._nbytes -= n
+            self.n_evictions += 1
+
+    def store(self, key, objs, cons):
+        """
+        Store results for a key
+
+        Parameters
+        ----------
+        key: tuple
+            The key, as created by the key function
+        objs: numpy.ndarray
+            The objective function values, shape: (n_objectives,)
+        cons: numpy.ndarray
+            The constraint values, shape: (n_constraints,)
+
+        """
+        if key in self._data:
+            self._nbytes -= self._data.pop(key)[2]
+        n = objs.nbytes + cons.nbytes + len(key[0]) + len(key[1]) + self.ENTRY_OVERHEAD
+        self._data[key] = (objs.copy(), cons.copy(), n)
+        self._nbytes += n
+        self._evict()
+
+    def lookup(self, key):
+        """
+        Lookup results for a key
+
+        Parameters
+        ----------
+        key: tuple
+            The key, as created by the key function
+
+        Returns
+        -------
+        results: tuple or None
+            The results (objs, cons) if found, None otherwise
+
+        """
+        if key not in self._data:
+            self.n_misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.n_hits += 1
+        objs, cons, __ = self._data[key]
+        return objs.copy(), cons.copy()
+
+    def lookup_population(self, vars_int, vars_float, n_objs, n_cons, fidelity=None):
+        """
+        Lookup results for a population
+
+        Parameters
+        ----------
+        vars_int: numpy.ndarray
+            The integer variable values, shape: (n_pop, n_vars_int)
+        vars_float: numpy.ndarray
+            The float variable values, shape: (n_pop, n_vars_float)
+        n_objs: int
+            The number of objective components
+        n_cons: int
+            The number of constraint components
+        fidelity: str, optional
+            The fidelity of the evaluation
+
+        Returns
+        -------
+        keys: list of tuple
+            The keys of the individuals
+        found: numpy.ndarray of bool
+            True for cache hits, shape: (n_pop,)
+        objs: numpy.ndarray
+            The objective function values, NaN for misses,
+            shape: (n_pop, n_objs)
+        cons: numpy.ndarray
+            The constraint values, NaN for misses,
+            shape: (n_pop, n_cons)
+
+        """
+        n_pop = len(vars_float)
+        keys = [self.key(vars_int[pi], vars_float[pi], fidelity) for pi in range(n_pop)]
+        found = np.zeros(n_pop, dtype=bool)
+        objs = np.full((n_pop, n_objs), np.nan, dtype=np.float64)
+        cons = np.full((n_pop, n_cons), np.nan, dtype=np.float64)
+        missed = set()
+        for pi, k in enumerate(keys):
+            if k in missed:
+                # duplicate of a miss within this population,
+                # will be filled by the caller after evaluation:
+                self.n_hits += 1
+                continue
+            res = self.lookup(k)
+            if res is not None:
+                found[pi] = True
+                objs[pi], cons[pi] = res
+            else:
+                missed.add(k)
+        return keys, found, objs, cons
+
+    def info(self):
+        """
+        Returns cache statistics
+
+        Returns
+        -------
+        info: dict
+            The cache statistics
+
+        """
+        return dict(
+            size=self.size,
+            nbytes=self.nbytes,
+            hits=self.n_hits,
+            misses=self.n_misses,
+            evictions=self.n_evictions,
+            hit_rate=self.hit_rate,
+        )
+
+    def on_initialize(self, problem, verbosity=0):
+        """
+        Called at the end of the problem initialization
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        self.clear()
+
+    def init_info(self, problem):
+        """
+        The information that is printed at the
+        problem initialization
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+
+        Returns
+        -------
+        info: str
+            The information, or None
+
+        """
+        return f"  Eval cache  : max_size={self.max_size}, max_bytes={self.max_bytes}, tol={self.tol}"
+
+    def get_state(self, problem):
+        """
+        Returns the evaluation state of the component,
+        for checkpointing
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+
+        Returns
+        -------
+        state: dict
+            The entries and counters of the cache
+
+        """
+        return dict(
+            data=self._data,
+            nbytes=self._nbytes,
+            n_hits=self.n_hits,
+            n_misses=self.n_misses,
+            n_evictions=self.n_evictions,
+        )
+
+    def set_state(self, problem, state):
+        """
+        Restores the evaluation state of the component,
+        for resuming from a checkpoint
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        state: dict
+            The state, as returned by get_state
+
+        """
+        if state is None:
+            return
+        self._data = state["data"]
+        self._nbytes = state["nbytes"]
+        self.n_hits = state["n_hits"]
+        self.n_misses = state["n_misses"]
+        self.n_evictions = state["n_evictions"]
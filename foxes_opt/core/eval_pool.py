@@ -0,0 +1,238 @@
+import pickle
+import cloudpickle
+import numpy as np
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from foxes.core import Engine, has_engine, get_engine
+
+from .problem_component import ProblemComponent
+
+__worker_data__ = {}
+
+
+def _init_worker(problem_data):
+    """Helper function that sets up the problem replica of a worker"""
+    if has_engine():
+        # a forked worker inherits the engine of the parent
+        # process, whose resources cannot be used here. The
+        # base class exit only unsets it, without shutting
+        # down the pools of the parent:
+        Engine.__exit__(get_engine(), None, None, None)
+    engine = Engine.new("single", verbosity=0)
+    engine.__enter__()
+    __worker_data__["engine"] = engine
+    __worker_data__["problem"] = pickle.loads(problem_data)
+
+
+def _eval_individual(vars_int, vars_float):
+    """Helper function that evaluates an individual within a worker"""
+    return __worker_data__["problem"].evaluate_individual(vars_int, vars_float)
+
+
+class EvalPool(ProblemComponent):
+    """
+    A pool of worker processes for the parallel
+    evaluation of individuals.
+
+    Each worker holds its own replica of the problem,
+    including algorithm, model book and wind farm, which
+    is transferred only once at pool start. This is useful
+    for problems that cannot be vectorized with respect
+    to the population.
+
+    Attributes
+    ----------
+    n_procs: int
+        The number of worker processes
+    max_retries: int
+        The maximal number of pool restarts after
+        worker processes died
+    mp_context: str
+        The multiprocessing start method
+    n_failed: int
+        The number of failed evaluations
+
+    :group: opt.core
+
+    """
+
+    SCALAR_PARS = {int: "n_procs"}
+
+    def __init__(self, n_procs=None, max_retries=2, mp_context="spawn"):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        n_procs: int, optional
+            The number of worker processes, or None
+            for the number of cpus
+        max_retries: int
+            The maximal number of pool restarts after
+            worker processes died
+        mp_context: str
+            The multiprocessing start method, e.g.
+            spawn or fork
+
+        """
+        self.n_procs = n_procs if n_procs is not None else mp.cpu_count()
+        self.max_retries = max_retries
+        self.mp_context = mp_context
+        self.n_failed = 0
+
+        self._pool = None
+        self._pdata = None
+
+    @property
+    def running(self):
+        """
+        Flag for a running pool
+
+        Returns
+        -------
+        bool :
+            True if the worker processes are running
+
+        """
+        return self._pool is not None
+
+    def _create_pool(self):
+        """Helper function that (re-)creates the worker pool"""
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.n_procs,
+            mp_context=mp.get_context(self.mp_context),
+            initializer=_init_worker,
+            initargs=(self._pdata,),
+        )
+
+    def start(self, problem):
+        """
+        Starts the worker processes
+
+        Parameters
+        ----------
+        problem: foxes_opt.FarmOptProblem
+            The problem, will be replicated for
+            each worker
+
+        """
+        if self.running:
+            self.shutdown()
+        self._pdata = cloudpickle.dumps(problem)
+        self._create_pool()
+        self.n_failed = 0
+
+    def shutdown(self):
+        """
+        Shuts down the worker processes
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._pdata = None
+
+    def evaluate_population(self, vars_int, vars_float, n_objs, n_cons):
+        """
+        Evaluates all individuals of a population
+        in parallel.
+
+        Parameters
+        ----------
+        vars_int: np.array
+            The integer variable values, shape: (n_pop, n_vars_int)
+        vars_float: np.array
+            The float variable values, shape: (n_pop, n_vars_float)
+        n_objs: int
+            The number of objective components
+        n_cons: int
+            The number of constraint components
+
+        Returns
+        -------
+        objs: np.array
+            The objective function values, shape: (n_pop, n_objs)
+        cons: np.array
+            The constraints values, shape: (n_pop, n_cons)
+
+        """
+        if not self.running:
+            raise ValueError(f"{type(self).__name__}: Pool has not been started")
+
+        n_pop = len(vars_float)
+        objs = np.full((n_pop, n_objs), np.nan, dtype=np.float64)
+        cons = np.full((n_pop, n_cons), np.nan, dtype=np.float64)
+
+        todo = list(range(n_pop))
+        retries = 0
+        while len(todo):
+            futures = [
+                (pi, self._pool.submit(_eval_individual, vars_int[pi], vars_float[pi]))
+                for pi in todo
+            ]
+
+            failed = []
+            error = None
+            for pi, f in futures:
+                try:
+                    objs[pi], cons[pi] = f.result()
+                except BrokenProcessPool as e:
+                    failed.append(pi)
+                    error = e
+                except Exception:
+                    for __, g in futures:
+                        g.cancel()
+                    raise
+
+            # only dead worker processes are retried, since
+            # exceptions of the evaluation are deterministic:
+            if len(failed):
+                self.n_failed += len(failed)
+                retries += 1
+                if retries > self.max_retries:
+                    raise RuntimeError(
+                        f"{type(self).__name__}: Evaluation of {len(failed)} individuals failed after {self.max_retries} retries"
+                    ) from error
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._create_pool()
+
+            todo = failed
+
+        return objs, cons
+
+    def init_info(self, problem):
+        """
+        The information that is printed at the
+        problem initialization
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+
+        Returns
+        -------
+        info: str
+            The information, or None
+
+        """
+        return f"  Eval pool   : n_procs={self.n_procs}, mp_context={self.mp_context}"
+
+    def on_finalize(self, problem, verbosity=0):
+        """
+        Called at the problem finalization, and when
+        leaving the problem context. Releases resources
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        if self.running:
+            self.shutdown()
+            if verbosity:
+                print(f"Problem '{problem.name}': Shut down evaluation pool")
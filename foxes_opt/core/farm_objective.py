@@ -74,6 +74,20 @@ class FarmObjective(Objective):
         """
         return len(self.sel_turbines)
 
+    def required_farm_vars(self):
+        """
+        The farm variables that are read from
+        the farm results
+
+        Returns
+        -------
+        vrs: list of str
+            The required farm variables, or None
+            for all
+
+        """
+        return None
+
     def add_to_layout_figure(self, ax, **kwargs):
         """
         Add to a layout figure
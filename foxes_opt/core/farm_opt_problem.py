@@ -1,16 +1,35 @@
 import numpy as np
+import xarray as xr
+from contextlib import contextmanager
 from iwopy import Problem
 
 from foxes.algorithms.downwind.models import PopulationStates
 from foxes.core import has_engine, Engine
 from foxes.config import config
 from foxes.utils import new_instance
+import foxes.variables as FV
+import foxes.constants as FC
+
+from .problem_component import ProblemComponent
+from .problem_engine import ProblemEngine
+from .eval_cache import EvalCache
+from .eval_pool import EvalPool
+from .phase_timer import PhaseTimer
+from .frozen_background import FrozenBackground
+from .states_compression import StatesCompression
+from .multi_fidelity import MultiFidelity
+from .results_context import ResultsContext
+from foxes_opt.output.history import HistoryWriter
 
 
 class FarmOptProblem(Problem):
     """
     Abstract base class of wind farm optimization problems.
 
+    Optional features, like the evaluation cache or the
+    history, are components of the problem that take part
+    in its life cycle by hooks, see `ProblemComponent`.
+
     Attributes
     ----------
     algo: foxes.core.Algorithm
@@ -19,11 +38,34 @@ class FarmOptProblem(Problem):
         Additional parameters for algo.calc_farm()
     points : numpy.ndarray
         The probe points, shape: (n_states, n_points, 3)
+        or (n_points, 3)
+    max_pop_batch: int
+        The maximal number of individuals per
+        population calculation, or None
+    memory_budget_bytes: int
+        The memory budget of a population calculation,
+        or None
+    timer: foxes_opt.core.PhaseTimer
+        The wall times and counters of the
+        evaluation phases
+    reduce_outputs: bool
+        Flag for restricting the farm calculation outputs
+        of evaluations to the variables required by the
+        objectives and constraints
+    components: dict
+        The problem components, key: name, value:
+        foxes_opt.core.ProblemComponent
 
     :group: opt.core
 
     """
 
+    MEM_N_VARS = 50
+    MEM_FACTOR = 10
+    LOW_FIDELITY = "low"
+    HIGH_FIDELITY = "high"
+    MOVES_TURBINES = False
+
     def __init__(
         self,
         name,
@@ -31,6 +73,17 @@ class FarmOptProblem(Problem):
         sel_turbines=None,
         calc_farm_args={},
         points=None,
+        eval_cache=None,
+        engine=None,
+        max_pop_batch=None,
+        memory_budget_bytes=None,
+        eval_pool=None,
+        history=None,
+        reduce_outputs=True,
+        frozen_background=None,
+        states_compression=None,
+        multi_fidelity=None,
+        components={},
         **kwargs,
     ):
         """
@@ -48,19 +101,249 @@ class FarmOptProblem(Problem):
         calc_farm_args: dict
             Additional parameters for algo.calc_farm()
         points: numpy.ndarray, optional
-            The probe points, shape: (n_states, n_points, 3)
+            The probe points, shape: (n_states, n_points, 3),
+            or (n_points, 3) for state independent points
+        eval_cache: bool or dict or foxes_opt.core.EvalCache, optional
+            Switch on the evaluation cache, either by True,
+            by a dict of `EvalCache` parameters or by
+            an `EvalCache` object. It cannot be combined with
+            the memory of `iwopy.Problem`, i.e., with the
+            parameters `mem_size` and `mem_keyf`
+        engine: str or dict or foxes.core.Engine or foxes_opt.core.ProblemEngine, optional
+            The engine owned by the problem, either the engine
+            type, a dict of `ProblemEngine` parameters, an
+            `Engine` or a `ProblemEngine` object. It is entered
+            at initialization
+            and kept alive until `finalize_individual` or
+            `finalize_population`, such that all evaluations
+            of a solver run use the same worker pool. Using
+            the problem as context manager also releases it.
+            None means each evaluation runs with the currently
+            active engine, or with a temporary default engine
+        max_pop_batch: int, optional
+            The maximal number of individuals per population
+            calculation. Larger populations are split into
+            sub-batches which are calculated one after the other
+        memory_budget_bytes: int, optional
+            The memory budget of a population calculation,
+            used for splitting large populations into sub-batches
+        eval_pool: bool or int or dict or foxes_opt.core.EvalPool, optional
+            Evaluate the individuals of populations in parallel
+            worker processes, instead of the vectorized population
+            calculation. Either True, the number of processes,
+            a dict of `EvalPool` parameters or an `EvalPool` object
+        history: str or dict or foxes_opt.output.HistoryWriter, optional
+            Stream all evaluated populations to a NetCDF file.
+            Either the file name, a dict of `HistoryWriter`
+            parameters or a `HistoryWriter` object
+        reduce_outputs: bool
+            Restrict the farm calculation outputs of evaluations
+            to the variables required by the objectives and
+            constraints, if all of them declare their variables.
+            Final results always contain all variables
+        frozen_background: bool or dict or foxes_opt.core.FrozenBackground, optional
+            Precompute the wakes of the turbines that are not
+            selected once, and evaluate only the selected turbines
+            on top of it. Either True, a dict of `FrozenBackground`
+            parameters or a `FrozenBackground` object
+        states_compression: int or str or dict or foxes_opt.core.StatesCompression, optional
+            Replace the states by weighted representative states
+            at initialization, such that the evaluation cost scales
+            with their number. Either the number of k-means clusters,
+            the method name, e.g. exact for merging duplicate states,
+            a dict of `StatesCompression` parameters or a
+            `StatesCompression` object. The final results
+            are expanded to the original states
+        multi_fidelity: bool or float or dict or foxes_opt.core.MultiFidelity, optional
+            Evaluate populations by a cheap low-fidelity algorithm,
+            and re-evaluate the best individuals of each population
+            by the algorithm of the problem. Either True, the
+            re-evaluated fraction of the population, a dict of
+            `MultiFidelity` parameters or a `MultiFidelity` object.
+            Single individuals and final results are always of
+            high fidelity
+        components: dict, optional
+            Additional problem components, key: name, value:
+            foxes_opt.core.ProblemComponent. Their hooks are
+            called after those of the above components
         kwargs: dict, optional
             Additional parameters for `iwopy.Problem`
 
         """
+        if eval_cache is not None and eval_cache is not False:
+            mem = [p for p in ["mem_size", "mem_keyf"] if kwargs.get(p) is not None]
+            if len(mem):
+                raise ValueError(
+                    f"Problem '{name}': Cannot combine eval_cache with parameters {mem} of the memory"
+                )
+
         super().__init__(name, **kwargs)
 
         self.algo = algo
         self.calc_farm_args = calc_farm_args
+        self.reduce_outputs = reduce_outputs
         self.points = points
+        self.max_pop_batch = max_pop_batch
+        self.memory_budget_bytes = memory_budget_bytes
+
+        self.components = {}
+        for pname, cls, value in [
+            ("states_compression", StatesCompression, states_compression),
+            ("frozen_background", FrozenBackground, frozen_background),
+            ("multi_fidelity", MultiFidelity, multi_fidelity),
+            ("eval_cache", EvalCache, eval_cache),
+            ("eval_pool", EvalPool, eval_pool),
+            ("history", HistoryWriter, history),
+            ("engine", ProblemEngine, engine),
+        ]:
+            c = cls.from_parameter(name, pname, value)
+            if c is not None:
+                self.add_component(pname, c)
+        for cname, c in components.items():
+            self.add_component(cname, c)
+
+        self.timer = PhaseTimer()
 
         self._sel_turbines = sel_turbines
+        self._eval_outputs = None
+        self._reduced = False
+        self._results_ctx = None
         self._count = None
+        self._ind_nbytes = None
+
+    def add_component(self, name, component):
+        """
+        Adds a component to the problem, before
+        its initialization
+
+        Parameters
+        ----------
+        name: str
+            The component name
+        component: foxes_opt.core.ProblemComponent
+            The component
+
+        """
+        if not isinstance(component, ProblemComponent):
+            raise TypeError(
+                f"Problem '{self.name}': Expecting ProblemComponent for component '{name}', got '{type(component).__name__}'"
+            )
+        if name in self.components:
+            raise KeyError(f"Problem '{self.name}': Component '{name}' already exists")
+        self.components[name] = component
+
+    @contextmanager
+    def detached_components(self, names):
+        """
+        Context in which components are detached from
+        the problem, e.g. for pickling problem replicas
+
+        Parameters
+        ----------
+        names: list of str
+            The names of the detached components
+
+        """
+        components = self.components
+        self.components = {k: c for k, c in components.items() if k not in names}
+        try:
+            yield
+        finally:
+            self.components = components
+
+    @property
+    def eval_cache(self):
+        """
+        The evaluation cache
+
+        Returns
+        -------
+        foxes_opt.core.EvalCache :
+            The evaluation cache, or None
+
+        """
+        return self.components.get("eval_cache")
+
+    @property
+    def eval_pool(self):
+        """
+        The pool for parallel evaluation of individuals
+
+        Returns
+        -------
+        foxes_opt.core.EvalPool :
+            The evaluation pool, or None
+
+        """
+        return self.components.get("eval_pool")
+
+    @property
+    def history(self):
+        """
+        The writer of the evaluation history
+
+        Returns
+        -------
+        foxes_opt.output.HistoryWriter :
+            The history writer, or None
+
+        """
+        return self.components.get("history")
+
+    @property
+    def engine(self):
+        """
+        The engine owned by the problem
+
+        Returns
+        -------
+        foxes_opt.core.ProblemEngine :
+            The problem engine, or None
+
+        """
+        return self.components.get("engine")
+
+    @property
+    def frozen_background(self):
+        """
+        The precomputed background of the turbines
+        that are not selected
+
+        Returns
+        -------
+        foxes_opt.core.FrozenBackground :
+            The frozen background, or None
+
+        """
+        return self.components.get("frozen_background")
+
+    @property
+    def states_compression(self):
+        """
+        The compression of the states into
+        representative states
+
+        Returns
+        -------
+        foxes_opt.core.StatesCompression :
+            The states compression, or None
+
+        """
+        return self.components.get("states_compression")
+
+    @property
+    def multi_fidelity(self):
+        """
+        The low-fidelity evaluation of populations with
+        high-fidelity re-evaluation of the best individuals
+
+        Returns
+        -------
+        foxes_opt.core.MultiFidelity :
+            The multi-fidelity evaluation, or None
+
+        """
+        return self.components.get("multi_fidelity")
 
     @property
     def farm(self):
@@ -183,26 +466,422 @@ class FarmOptProblem(Problem):
             The verbosity level, 0 = silent
 
         """
+        for c in self.components.values():
+            c.on_pre_initialize(self, verbosity)
+
         if not self.algo.initialized:
             self.algo.initialize()
+        self._org_states = self.algo.states
         self._org_states_name = self.algo.states.name
         self._org_n_states = self.algo.n_states
+        self._pop_states = {}
+        self._algo_states = {}
+        self._buffers = {}
 
         self.algo.finalize()
 
         self._count = 0
+        self.timer.reset()
+
+        self._points0 = None
+        if self.points is not None:
+            pts = np.asarray(self.points, dtype=config.dtype_double)
+            if pts.ndim == 2:
+                self._points0 = pts
+            elif np.all(pts == pts[0, None]):
+                self._points0 = pts[0]
 
         super().initialize(verbosity)
 
-    def _reset_states(self, states):
+        self._eval_outputs = self._get_eval_outputs()
+        if verbosity and self._eval_outputs is not None:
+            print(f"  Outputs     : {', '.join(self._eval_outputs)}")
+            print(self._hline)
+
+        for c in self.components.values():
+            c.on_initialize(self, verbosity)
+            if verbosity:
+                info = c.init_info(self)
+                if info is not None:
+                    print(info)
+                    print(self._hline)
+
+        # evaluations by the components do not count:
+        self._count = 0
+
+    def switch_algo(self, algo):
+        """
+        Switches the algorithm of the problem,
+        e.g. for multi-fidelity evaluations
+
+        Each algorithm keeps its own evaluation states
+        and population states. A new algorithm starts
+        from its own states, with the current number
+        of states.
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The new algorithm
+
+        """
+        if algo is not self.algo:
+            with self.timer.measure("switch_algo", n_inds=0):
+                if self.algo.initialized:
+                    self.algo.finalize()
+                self._algo_states[self.algo] = (
+                    self._org_states,
+                    self._org_n_states,
+                    self._pop_states,
+                )
+                self._org_states, self._org_n_states, self._pop_states = (
+                    self._algo_states.pop(algo, (algo.states, self._org_n_states, {}))
+                )
+                self.algo = algo
+
+    def _frozen_farm_vars(self):
+        """
+        The farm variables of the problem's SetFarmVars
+        models, which are zero for turbines that are
+        not selected
+
+        Returns
+        -------
+        farm_vars: dict
+            Key: model name, value: list of variables
+
+        """
+        return {}
+
+    def _init_frozen_background(self, verbosity):
+        """
+        Helper function that restricts the problem to
+        the selected turbines, for the frozen background.
+
+        Returns
+        -------
+        sel_turbines: list of int
+            The selected turbines
+        farm_vars: dict
+            The farm variables of the problem's SetFarmVars
+            models, key: model name, value: list of variables
+
+        """
+        if self.points is not None:
+            raise ValueError(
+                f"Problem '{self.name}': Frozen background is not supported for problems with points"
+            )
+
+        farm_vars = self._frozen_farm_vars()
+        for mname, vrs in farm_vars.items():
+            gvrs = [v for v in vrs if v in [FV.X, FV.Y, FV.H, FV.D]]
+            if len(gvrs):
+                raise ValueError(
+                    f"Problem '{self.name}': Frozen background is not supported for geometry variables {gvrs} of model '{mname}'"
+                )
+
+        sel = self.sel_turbines
+        tmap = np.full(self.algo.n_turbines, -1, dtype=config.dtype_int)
+        tmap[sel] = np.arange(len(sel), dtype=config.dtype_int)
+        for f in self.objs.functions + self.cons.functions:
+            fsel = getattr(f, "_sel_turbines", None)
+            if fsel is not None:
+                fsel = tmap[fsel]
+                if np.any(fsel < 0):
+                    raise ValueError(
+                        f"Problem '{self.name}': Function '{f.name}' refers to frozen turbines"
+                    )
+                f._sel_turbines = fsel.tolist()
+
+        self._sel_turbines = None
+
+        return sel, farm_vars
+
+    def finalize_individual(self, vars_int, vars_float, verbosity=1):
+        """
+        Finalization, given the champion data.
+
+        For compressed states, the results are expanded
+        to the original states, and the algorithm is
+        switched to the original states. For multi-fidelity
+        problems, the high-fidelity algorithm is used.
+
+        Parameters
+        ----------
+        vars_int: np.array
+            The optimal integer variable values, shape: (n_vars_int,)
+        vars_float: np.array
+            The optimal float variable values, shape: (n_vars_float,)
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        Returns
+        -------
+        problem_results: Any
+            The results of the variable application
+            to the problem
+        objs: np.array
+            The objective function values, shape: (n_objectives,)
+        cons: np.array
+            The constraints values, shape: (n_constraints,)
+
+        """
+        self._high_fidelity()
+        results, objs, cons = super().finalize_individual(
+            vars_int, vars_float, verbosity
+        )
+        for c in self.components.values():
+            results = c.on_finalize_individual(self, results, verbosity)
+
+        return results, objs, cons
+
+    def finalize_population(self, vars_int, vars_float, verbosity=0):
+        """
+        Finalization, given the final population data.
+
+        For multi-fidelity problems, the final population
+        is evaluated by the high-fidelity algorithm.
+
+        Parameters
+        ----------
+        vars_int: np.array
+            The integer variable values of the final
+            generation, shape: (n_pop, n_vars_int)
+        vars_float: np.array
+            The float variable values of the final
+            generation, shape: (n_pop, n_vars_float)
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        Returns
+        -------
+        problem_results: Any
+            The results of the variable application
+            to the problem
+        objs: np.array
+            The final objective function values, shape: (n_pop, n_components)
+        cons: np.array
+            The final constraint values, shape: (n_pop, n_constraints)
+
+        """
+        self._high_fidelity()
+        out = super().finalize_population(vars_int, vars_float, verbosity)
+        for c in self.components.values():
+            c.on_finalize_population(self, verbosity)
+
+        return out
+
+    def finalize(self, verbosity=0):
+        """
+        Finalize the object.
+
+        Finalizes all components, which releases
+        their resources, e.g. the engine owned by
+        the problem.
+
+        Parameters
+        ----------
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        for c in self.components.values():
+            c.on_finalize(self, verbosity)
+
+        super().finalize(verbosity)
+
+    def _high_fidelity(self):
+        """
+        Helper function that switches to the high-fidelity
+        algorithm of multi-fidelity problems, and returns
+        the fidelity of the following evaluations
+        """
+        mf = self.multi_fidelity
+        if mf is None or mf.hifi_algo is None:
+            return None
+        self.switch_algo(mf.hifi_algo)
+        return self.HIGH_FIDELITY
+
+    def _enter_engine(self):
+        """
+        Helper function that enters the engine owned by
+        the problem, unless another engine is active
+        """
+        if self.engine is not None:
+            self.engine.enter()
+
+    def release_engine(self, verbosity=0):
+        """
+        Shuts down the engine owned by the problem.
+
+        The engine is entered again by the next evaluation.
+
+        Parameters
+        ----------
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        if self.engine is not None:
+            self.engine.release(self, verbosity)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exit_args):
+        for c in self.components.values():
+            c.on_finalize(self)
+
+    def _get_eval_outputs(self):
+        """
+        Helper function that collects the farm variables
+        that are required by objectives and constraints
+        """
+        if (
+            not self.reduce_outputs
+            or self.points is not None
+            or "outputs" in self.calc_farm_args
+        ):
+            return None
+
+        vrs = set([FV.WEIGHT])
+        for f in self.objs.functions + self.cons.functions:
+            fvrs = f.required_farm_vars() if hasattr(f, "required_farm_vars") else None
+            if fvrs is None:
+                return None
+            vrs.update(fvrs)
+
+        return sorted(list(vrs))
+
+    def _get_calc_farm_args(self):
+        """
+        Helper function that returns the parameters
+        for calc_farm
+        """
+        if self._reduced and self._eval_outputs is not None:
+            return dict(outputs=self._eval_outputs, **self.calc_farm_args)
+        return self.calc_farm_args
+
+    def _get_points(self, n_pop=None):
+        """
+        Helper function that provides the probe points
+        for the individual or the population calculation.
+
+        State independent points are shared between all
+        (population) states as a broadcast view, such that
+        no memory is allocated for copies. State dependent
+        points cannot be viewed in population order, they
+        are tiled once per population size and reused by
+        all following populations of that size.
+
+        Parameters
+        ----------
+        n_pop: int, optional
+            The population size, or None for individuals
+
+        Returns
+        -------
+        points: numpy.ndarray
+            The points, shape: (n_states, n_points, 3) for
+            individuals, (n_pop * n_states, n_points, 3)
+            for populations
+
+        """
+        n_states = self._org_n_states
+        n_pstates = n_states if n_pop is None else n_pop * n_states
+
+        if self._points0 is not None:
+            return np.broadcast_to(
+                self._points0[None], (n_pstates,) + self._points0.shape
+            )
+        elif n_pop is None:
+            return self.points
+        else:
+            shape = (n_pstates,) + self.points.shape[1:]
+            buf = self._buffers.get("points")
+            if buf is None or buf.shape != shape:
+                buf = np.tile(self.points, (n_pop, 1, 1))
+                self._buffers["points"] = buf
+            return buf
+
+    def _get_pop_states(self, n_pop):
+        """
+        Get the population states for a population size,
+        reusing previously created states
+        """
+        if n_pop not in self._pop_states:
+            self._pop_states[n_pop] = PopulationStates(self._org_states, n_pop)
+        return self._pop_states[n_pop]
+
+    def _get_buffer(self, key, shape, fill=0.0):
+        """
+        Get a float buffer for a key and shape, reusing
+        the buffer of the key if the shape matches. Only
+        the buffer of the latest shape is kept per key,
+        and the fill value is only applied at creation
+        """
+        shape = tuple(shape)
+        buf = self._buffers.get(key)
+        if buf is None or buf.shape != shape:
+            buf = np.full(shape, fill, dtype=config.dtype_double)
+            self._buffers[key] = buf
+        return buf
+
+    def reset_states(self, states, n_states=None):
         """
-        Reset the states in the algorithm
+        Reset the states in the algorithm.
+
+        Only the states objects are reused between switches.
+        Each foxes calculation finalizes the algorithm and
+        its models, including the states, so they are
+        initialized again by the next calculation. The
+        chunk store is reset, since its entries refer
+        to the chunks of the previous states.
+
+        Parameters
+        ----------
+        states: foxes.core.States
+            The new states
+        n_states: int, optional
+            The number of states, if known before
+            the initialization of the states
+
         """
         if states is not self.algo.states:
-            if self.algo.initialized:
-                self.algo.finalize()
-            self.algo.states = states
-            self.algo.reset_chunk_store()
+            with self.timer.measure("switch_states", n_inds=0):
+                if self.algo.initialized:
+                    self.algo.finalize()
+                self.algo.states = states
+                self.algo.reset_chunk_store()
+        if n_states is not None:
+            self.algo.n_states = n_states
+
+    def set_eval_states(self, states, n_states):
+        """
+        Sets the states of the algorithm and of
+        the following evaluations
+
+        Parameters
+        ----------
+        states: foxes.core.States
+            The states
+        n_states: int
+            The number of states
+
+        Returns
+        -------
+        states: foxes.core.States
+            The previous states
+        n_states: int
+            The previous number of states
+
+        """
+        prev = (self._org_states, self._org_n_states)
+        self._org_states = states
+        self._org_n_states = n_states
+        self._pop_states = {}
+        self.reset_states(states, n_states)
+        return prev
 
     def update_problem_individual(self, vars_int, vars_float):
         """
@@ -221,9 +900,8 @@ class FarmOptProblem(Problem):
 
         """
         # reset states, if needed:
-        if isinstance(self.algo.states, PopulationStates):
-            self._reset_states(self.algo.states.states)
-            self.algo.n_states = self._org_n_states
+        if self.algo.states is not self._org_states:
+            self.reset_states(self._org_states, self._org_n_states)
 
     def update_problem_population(self, vars_int, vars_float):
         """
@@ -242,12 +920,7 @@ class FarmOptProblem(Problem):
 
         """
         # set/reset pop states, if needed:
-        n_pop = len(vars_float)
-        if not isinstance(self.algo.states, PopulationStates):
-            self._reset_states(PopulationStates(self.algo.states, n_pop))
-        elif self.algo.states.n_pop != n_pop:
-            ostates = self.algo.states.states
-            self._reset_states(PopulationStates(ostates, n_pop))
+        self.reset_states(self._get_pop_states(len(vars_float)))
 
     def apply_individual(self, vars_int, vars_float):
         """
@@ -268,16 +941,80 @@ class FarmOptProblem(Problem):
 
         """
         self._count += 1
-        self.update_problem_individual(vars_int, vars_float)
+        self._enter_engine()
+        with self.timer.measure("update_problem"):
+            self.update_problem_individual(vars_int, vars_float)
 
         def _run_calc(algo):
             """Helper function to run main foxes calculations"""
-            farm_results = algo.calc_farm(**self.calc_farm_args)
+            with self.timer.measure("calc_farm", n_states=algo.n_states):
+                farm_results = algo.calc_farm(**self._get_calc_farm_args())
             algo.verbosity = 0
             if self.points is None:
                 return farm_results
             else:
-                point_results = algo.calc_points(farm_results, self.points)
+                with self.timer.measure("calc_points", n_states=algo.n_states):
+                    point_results = algo.calc_points(farm_results, self._get_points())
+                return farm_results, point_results
+
+        if has_engine():
+            results = _run_calc(self.algo)
+        else:
+            with Engine.new("default", verbosity=0):
+                results = _run_calc(self.algo)
+
+        return results
+
+    def _pop_batch_size(self, n_pop):
+        """
+        Helper function that determines the size of
+        population sub-batches
+        """
+        bsize = n_pop
+        if self.max_pop_batch is not None:
+            bsize = min(bsize, self.max_pop_batch)
+        if self.memory_budget_bytes is not None:
+            if self._ind_nbytes is None:
+                if self._eval_outputs is not None:
+                    n_vars = len(self._eval_outputs)
+                else:
+                    n_vars = len(getattr(self.algo, "farm_vars", [])) or self.MEM_N_VARS
+                n_points = 0 if self.points is None else self.points.shape[-2]
+                n = self._org_n_states * (self.algo.n_turbines + n_points) * n_vars
+                nbytes = n * np.dtype(config.dtype_double).itemsize
+            else:
+                nbytes = self._ind_nbytes
+            bsize = min(bsize, int(self.memory_budget_bytes / self.MEM_FACTOR / nbytes))
+        return max(bsize, 1)
+
+    def _calc_population(self, vars_int, vars_float):
+        """
+        Helper function that runs the foxes calculation
+        for a population
+        """
+        n_pop = len(vars_float)
+        self._enter_engine()
+        with self.timer.measure("update_problem", n_inds=n_pop):
+            self.update_problem_population(vars_int, vars_float)
+
+        def _run_calc(algo):
+            """Helper function to run main foxes calculations"""
+            with self.timer.measure("calc_farm", n_pop, algo.n_states):
+                farm_results = algo.calc_farm(**self._get_calc_farm_args())
+            algo.verbosity = 0
+
+            point_results = None
+            if self.points is not None:
+                with self.timer.measure("calc_points", n_pop, algo.n_states):
+                    pop_points = self._get_points(n_pop)
+                    point_results = algo.calc_points(farm_results, pop_points)
+
+            farm_results["n_pop"] = len(vars_float)
+            farm_results["n_org_states"] = self._org_n_states
+
+            if point_results is None:
+                return farm_results
+            else:
                 return farm_results, point_results
 
         if has_engine():
@@ -286,6 +1023,13 @@ class FarmOptProblem(Problem):
             with Engine.new("default", verbosity=0):
                 results = _run_calc(self.algo)
 
+        if self.memory_budget_bytes is not None:
+            if self.points is None:
+                nbytes = results.nbytes
+            else:
+                nbytes = results[0].nbytes + results[1].nbytes
+            self._ind_nbytes = nbytes / len(vars_float)
+
         return results
 
     def apply_population(self, vars_int, vars_float):
@@ -309,35 +1053,412 @@ class FarmOptProblem(Problem):
         """
         self._count += 1
 
-        self.update_problem_population(vars_int, vars_float)
-
-        def _run_calc(algo):
-            """Helper function to run main foxes calculations"""
-            farm_results = algo.calc_farm(**self.calc_farm_args)
-            farm_results["n_pop"] = len(vars_float)
-            farm_results["n_org_states"] = self._org_n_states
-            algo.verbosity = 0
-
+        n_pop = len(vars_float)
+        bsize = self._pop_batch_size(n_pop)
+        if bsize >= n_pop:
+            return self._calc_population(vars_int, vars_float)
+
+        results = []
+        for i0 in range(0, n_pop, bsize):
+            s = np.s_[i0 : i0 + bsize]
+            results.append(self._calc_population(vars_int[s], vars_float[s]))
+
+        def _concat(rlist):
+            """Helper function for concatenating batch results"""
+            n_states = 0
+            for r in rlist:
+                if FV.ORDER_SSEL in r:
+                    r[FV.ORDER_SSEL] = r[FV.ORDER_SSEL] + n_states
+                n_states += r.sizes[FC.STATE]
+            out = xr.concat(
+                rlist,
+                dim=FC.STATE,
+                data_vars="minimal",
+                coords="minimal",
+                compat="override",
+                join="override",
+            )
+            return out.assign_coords({FC.STATE: np.arange(n_states)})
+
+        with self.timer.measure("concat_batches", n_inds=n_pop):
             if self.points is None:
-                return farm_results
+                results = _concat(results)
+                results["n_pop"] = n_pop
+                return results
             else:
-                n_pop = farm_results["n_pop"].values
-                n_states, n_points = self.points.shape[:2]
-                pop_points = np.zeros(
-                    (n_pop, n_states, n_points, 3), dtype=config.dtype_double
-                )
-                pop_points[:] = self.points[None, :, :, :]
-                pop_points = pop_points.reshape(n_pop * n_states, n_points, 3)
-                point_results = algo.calc_points(farm_results, pop_points)
+                farm_results = _concat([r[0] for r in results])
+                point_results = _concat([r[1] for r in results])
+                farm_results["n_pop"] = n_pop
                 return farm_results, point_results
 
-        if has_engine():
-            results = _run_calc(self.algo)
+    def results_context(self, problem_results):
+        """
+        Get the shared farm results data of the
+        current evaluation
+
+        Parameters
+        ----------
+        problem_results: xarray.Dataset or tuple
+            The problem results, or the tuple of
+            farm and point results
+
+        Returns
+        -------
+        ctx: foxes_opt.core.ResultsContext
+            The results context
+
+        """
+        if isinstance(problem_results, tuple):
+            problem_results = problem_results[0]
+        if (
+            self._results_ctx is None
+            or self._results_ctx.results is not problem_results
+        ):
+            self._results_ctx = ResultsContext(problem_results)
+        return self._results_ctx
+
+    def _calc_functions(self, vars_int, vars_float, problem_results, population):
+        """
+        Helper function that evaluates objectives and
+        constraints, measuring their wall times
+        """
+        n_inds = len(vars_float) if population else 1
+        fname = "calc_population" if population else "calc_individual"
+
+        try:
+            with self.timer.measure("objectives", n_inds):
+                varsi, varsf = self._find_vars(vars_int, vars_float, self.objs)
+                objs = getattr(self.objs, fname)(varsi, varsf, problem_results)
+
+            with self.timer.measure("constraints", n_inds):
+                varsi, varsf = self._find_vars(vars_int, vars_float, self.cons)
+                cons = getattr(self.cons, fname)(varsi, varsf, problem_results)
+        finally:
+            self._results_ctx = None
+
+        return objs, cons
+
+    def _evaluate_individual(self, vars_int, vars_float, ret_prob_res=False):
+        """
+        Helper function that evaluates an individual
+        without caching
+        """
+        self._reduced = not ret_prob_res
+        try:
+            results = self.apply_individual(vars_int, vars_float)
+        finally:
+            self._reduced = False
+        objs, cons = self._calc_functions(vars_int, vars_float, results, False)
+
+        if ret_prob_res:
+            return objs, cons, results
         else:
-            with Engine.new("default", verbosity=0):
-                results = _run_calc(self.algo)
+            return objs, cons
 
-        return results
+    def _evaluate_population(self, vars_int, vars_float, ret_prob_res=False):
+        """
+        Helper function that evaluates a population
+        without caching or batching
+        """
+        self._reduced = not ret_prob_res
+        try:
+            results = self.apply_population(vars_int, vars_float)
+        finally:
+            self._reduced = False
+
+        objs, cons = self._calc_functions(vars_int, vars_float, results, True)
+
+        if ret_prob_res:
+            return objs, cons, results
+        else:
+            return objs, cons
+
+    def evaluate_individual(self, vars_int, vars_float, ret_prob_res=False):
+        """
+        Evaluate a single individual of the problem.
+
+        Parameters
+        ----------
+        vars_int: np.array
+            The integer variable values, shape: (n_vars_int,)
+        vars_float: np.array
+            The float variable values, shape: (n_vars_float,)
+        ret_prob_res: bool
+            Flag for additionally returning of problem results
+
+        Returns
+        -------
+        objs: np.array
+            The objective function values, shape: (n_objectives,)
+        con: np.array
+            The constraints values, shape: (n_constraints,)
+        prob_res: object, optional
+            The problem results
+
+        """
+        fidelity = self._high_fidelity()
+        if ret_prob_res:
+            return self._evaluate_individual(vars_int, vars_float, ret_prob_res)
+        elif self.eval_cache is None and self.memory is None:
+            objs, cons = self._evaluate_individual(vars_int, vars_float)
+        elif self.eval_cache is None:
+            res = self.memory.lookup_individual(vars_int, vars_float)
+            if res is None:
+                res = self._evaluate_individual(vars_int, vars_float)
+                self.memory.store_individual(vars_int, vars_float, *res)
+            objs, cons = res
+        else:
+            key = self.eval_cache.key(vars_int, vars_float, fidelity)
+            res = self.eval_cache.lookup(key)
+            if res is None:
+                res = self._evaluate_individual(vars_int, vars_float)
+                self.eval_cache.store(key, *res)
+            objs, cons = res
+
+        for c in self.components.values():
+            c.on_evaluate_individual(self, vars_int, vars_float, objs, cons)
+
+        return objs, cons
+
+    def get_state(self):
+        """
+        Returns the evaluation state of the problem,
+        for checkpointing
+
+        Returns
+        -------
+        state: dict
+            The counter, timings and component states
+
+        """
+        return dict(
+            counter=self._count,
+            timings=self.timer.phases,
+            components={k: c.get_state(self) for k, c in self.components.items()},
+        )
+
+    def set_state(self, state):
+        """
+        Restores the evaluation state of the problem,
+        for resuming from a checkpoint
+
+        Parameters
+        ----------
+        state: dict
+            The state, as returned by get_state
+
+        """
+        self._count = state["counter"]
+        self.timer.phases = state["timings"]
+        for k, c in self.components.items():
+            c.set_state(self, state["components"].get(k))
+
+    def _start_eval_pool(self):
+        """
+        Helper function that starts the evaluation pool,
+        sending a problem replica to the workers
+        """
+        pool = self.eval_pool
+        with self.detached_components(["eval_pool", "eval_cache", "history", "engine"]):
+            pool.start(self)
+
+    def _evaluate_population_multi_fidelity(self, vars_int, vars_float):
+        """
+        Helper function that evaluates a population
+        by the low-fidelity algorithm, and re-evaluates
+        the best individuals by the high-fidelity algorithm.
+        The other individuals get calibrated low-fidelity
+        objectives, see `MultiFidelity.correct`
+        """
+        mf = self.multi_fidelity
+        self.switch_algo(mf.algo)
+        objs, cons = self._evaluate_population_cached(
+            vars_int, vars_float, self.LOW_FIDELITY
+        )
+
+        feasible = np.all(self.check_constraints_population(cons), axis=1)
+        sel = mf.select(objs, feasible, self.maximize_objs)
+        if len(sel):
+            self.switch_algo(mf.hifi_algo)
+            ores, cres = self._evaluate_population_cached(
+                vars_int[sel], vars_float[sel], self.HIGH_FIDELITY
+            )
+            mf.add(objs[sel], ores)
+        objs = mf.correct(objs)
+        if len(sel):
+            objs[sel] = ores
+            cons[sel] = cres
+
+        return objs, cons
+
+    def _evaluate_population_split(self, vars_int, vars_float):
+        """
+        Helper function that evaluates a population
+        in sub-batches, if required, or by the
+        evaluation pool
+        """
+        if self.eval_pool is not None:
+            if not self.eval_pool.running:
+                self._start_eval_pool()
+            self._count += 1
+            with self.timer.measure("eval_pool", n_inds=len(vars_float)):
+                return self.eval_pool.evaluate_population(
+                    vars_int, vars_float, self.n_objectives, self.n_constraints
+                )
+
+        n_pop = len(vars_float)
+        bsize = self._pop_batch_size(n_pop)
+        if bsize >= n_pop:
+            return self._evaluate_population(vars_int, vars_float)
+
+        objs = []
+        cons = []
+        for i0 in range(0, n_pop, bsize):
+            s = np.s_[i0 : i0 + bsize]
+            o, c = self._evaluate_population(vars_int[s], vars_float[s])
+            objs.append(o)
+            cons.append(c)
+
+        return np.concatenate(objs, axis=0), np.concatenate(cons, axis=0)
+
+    def evaluate_population(self, vars_int, vars_float, ret_prob_res=False):
+        """
+        Evaluate all individuals of a population.
+
+        Only cache misses are passed on to `apply_population`,
+        if the evaluation cache is switched on. Populations
+        that exceed the batch size are evaluated in sub-batches.
+
+        Parameters
+        ----------
+        vars_int: np.array
+            The integer variable values, shape: (n_pop, n_vars_int)
+        vars_float: np.array
+            The float variable values, shape: (n_pop, n_vars_float)
+        ret_prob_res: bool
+            Flag for additionally returning of problem results
+
+        Returns
+        -------
+        objs: np.array
+            The objective function values, shape: (n_pop, n_objectives)
+        cons: np.array
+            The constraints values, shape: (n_pop, n_constraints)
+        prob_res: object, optional
+            The problem results
+
+        """
+        fidelity = self._high_fidelity()
+        if ret_prob_res:
+            return self._evaluate_population(vars_int, vars_float, ret_prob_res)
+        elif fidelity is not None:
+            objs, cons = self._evaluate_population_multi_fidelity(vars_int, vars_float)
+        else:
+            objs, cons = self._evaluate_population_cached(vars_int, vars_float)
+
+        for c in self.components.values():
+            c.on_evaluate_population(self, vars_int, vars_float, objs, cons)
+
+        return objs, cons
+
+    def _evaluate_population_memory(self, vars_int, vars_float):
+        """
+        Helper function that evaluates the misses
+        of a population in the memory of `iwopy.Problem`
+        """
+        memres = self.memory.lookup_population(vars_int, vars_float)
+        if memres is None:
+            todo = np.ones(len(vars_float), dtype=bool)
+            memres = np.full(
+                (len(vars_float), self.n_objectives + self.n_constraints),
+                np.nan,
+                dtype=np.float64,
+            )
+        else:
+            todo = np.any(np.isnan(memres), axis=1)
+        objs = memres[:, : self.n_objectives]
+        cons = memres[:, self.n_objectives :]
+
+        if np.any(todo):
+            ores, cres = self._evaluate_population_split(
+                vars_int[todo], vars_float[todo]
+            )
+            objs[todo] = ores
+            cons[todo] = cres
+            self.memory.store_population(vars_int[todo], vars_float[todo], ores, cres)
+
+        return objs, cons
+
+    def _evaluate_population_cached(self, vars_int, vars_float, fidelity=None):
+        """
+        Helper function that evaluates the cache
+        misses of a population, or all individuals
+        if the evaluation cache is switched off
+        """
+        if self.eval_cache is None:
+            if self.memory is None or fidelity == self.LOW_FIDELITY:
+                return self._evaluate_population_split(vars_int, vars_float)
+            return self._evaluate_population_memory(vars_int, vars_float)
+
+        keys, found, objs, cons = self.eval_cache.lookup_population(
+            vars_int, vars_float, self.n_objectives, self.n_constraints, fidelity
+        )
+
+        if not np.all(found):
+            todo = {}
+            for pi in np.where(~found)[0]:
+                todo.setdefault(keys[pi], []).append(pi)
+            sel = [pis[0] for pis in todo.values()]
+
+            ores, cres = self._evaluate_population_split(vars_int[sel], vars_float[sel])
+            for i, (k, pis) in enumerate(todo.items()):
+                objs[pis] = ores[i]
+                cons[pis] = cres[i]
+                self.eval_cache.store(k, ores[i], cres[i])
+
+        return objs, cons
+
+    def get_timings(self, to_dataframe=False):
+        """
+        Returns the wall times and counters of the
+        evaluation phases
+
+        Parameters
+        ----------
+        to_dataframe: bool
+            Flag for returning a pandas DataFrame
+
+        Returns
+        -------
+        timings: dict or pandas.DataFrame
+            The timings, for each phase the accumulated
+            time, calls, individuals and states
+
+        """
+        if to_dataframe:
+            return self.timer.to_dataframe()
+        return self.timer.to_dict()
+
+    def print_info(self):
+        """
+        Print problem info, including the
+        timings of the evaluation phases
+        """
+        print(f"Problem '{self.name}' ({type(self).__name__})")
+        print(f"  Counter     : {self.counter}")
+        if self.eval_cache is not None:
+            i = self.eval_cache.info()
+            print(
+                f"  Eval cache  : size={i['size']}, hits={i['hits']}, misses={i['misses']}, hit_rate={i['hit_rate']:.3f}"
+            )
+        if self.eval_pool is not None:
+            p = self.eval_pool
+            print(f"  Eval pool   : n_procs={p.n_procs}, n_failed={p.n_failed}")
+        if self.multi_fidelity is not None:
+            m = self.multi_fidelity
+            print(f"  Multi-fid.  : n_low={m.n_low}, n_high={m.n_high}")
+        print("  Timings     :")
+        self.timer.print_info()
 
     def add_to_layout_figure(self, ax, **kwargs):
         """
@@ -7,6 +7,7 @@ from foxes.utils import new_instance
 import foxes.variables as FV
 
 from .farm_opt_problem import FarmOptProblem
+from .sparse_farm_vars import SparseFarmVars
 
 
 class FarmVarsProblem(FarmOptProblem):
@@ -61,7 +62,9 @@ class FarmVarsProblem(FarmOptProblem):
                             f"FarmOptProblem '{self.name}': Turbine model entry '{mname}' exists in model book, and disagrees on pre_rotor = {pre}"
                         )
                 else:
-                    self.algo.mbook.turbine_models[mname] = SetFarmVars(pre_rotor=pre)
+                    self.algo.mbook.turbine_models[mname] = SparseFarmVars(
+                        pre_rotor=pre
+                    )
 
                 found = False
                 for t in self.algo.farm.turbines:
@@ -80,6 +83,24 @@ class FarmVarsProblem(FarmOptProblem):
 
         super().initialize(verbosity=verbosity, **kwargs)
 
+    def _frozen_farm_vars(self):
+        """
+        The farm variables of the problem's SetFarmVars
+        models, which are zero for turbines that are
+        not selected
+
+        Returns
+        -------
+        farm_vars: dict
+            Key: model name, value: list of variables
+
+        """
+        out = {}
+        for src in (self._vars_pre, self._vars_post):
+            for mname, vrs in src.items():
+                out[mname] = out.get(mname, []) + list(vrs)
+        return out
+
     @abstractmethod
     def opt2farm_vars_individual(self, vars_int, vars_float):
         """
@@ -161,9 +182,11 @@ class FarmVarsProblem(FarmOptProblem):
                     vals = fvars.pop(v)
                     if self.all_turbines:
                         model.add_var(v, vals)
+                    elif isinstance(model, SparseFarmVars):
+                        model.add_var(v, vals, turbines=self.sel_turbines)
                     else:
-                        data = np.zeros(
-                            (n_states, self.algo.n_turbines), dtype=config.dtype_double
+                        data = self._get_buffer(
+                            (mname, v), (n_states, self.algo.n_turbines)
                         )
                         data[:, self.sel_turbines] = vals
                         model.add_var(v, data)
@@ -195,26 +218,35 @@ class FarmVarsProblem(FarmOptProblem):
         n_pop = len(vars_float)
         n_states = self._org_n_states
         n_pstates = n_states * n_pop
+        n_turbines = self.algo.n_turbines
         fvars = self.opt2farm_vars_population(vars_int, vars_float, n_states)
 
-        # update turbine model that sets vars to opt values:
+        # update turbine model that sets vars to opt values.
+        # The data is written into buffers that are reused for
+        # consecutive populations of equal size. Sparse models only receive
+        # the columns of the selected turbines, otherwise the
+        # columns of turbines that are not selected keep their
+        # initial zeros:
         for src in (self._vars_pre, self._vars_post):
             for mname, vrs in src.items():
                 model = self.algo.mbook.turbine_models[mname]
                 model.reset()
+                sparse = not self.all_turbines and isinstance(model, SparseFarmVars)
                 for v in vrs:
                     vals = fvars.pop(v)
-                    shp0 = list(vals.shape)
-                    shp1 = [n_pstates] + shp0[2:]
-                    if self.all_turbines:
-                        model.add_var(v, vals.reshape(shp1))
+                    if sparse:
+                        n_sturb = self.n_sel_turbines
+                        data = self._get_buffer((mname, v), (n_pstates, n_sturb))
+                        data.reshape(n_pop, n_states, n_sturb)[:] = vals
+                        model.add_var(v, data, turbines=self.sel_turbines)
                     else:
-                        data = np.zeros(
-                            (n_pstates, self.algo.n_turbines), dtype=config.dtype_double
-                        )
-                        data[:, self.sel_turbines] = vals.reshape(shp1)
+                        data = self._get_buffer((mname, v), (n_pstates, n_turbines))
+                        hdata = data.reshape(n_pop, n_states, n_turbines)
+                        if self.all_turbines:
+                            hdata[:] = vals
+                        else:
+                            hdata[:, :, self.sel_turbines] = vals
                         model.add_var(v, data)
-                        del data
 
                     # special case (x, y) needs to reshape turbine property. Value will be set by model
                     if v in [FV.X, FV.Y]:
@@ -0,0 +1,699 @@
+import numpy as np
+
+from foxes.core import WindFarm, Turbine, TurbineModel, States, Engine, has_engine
+from foxes.algorithms import Downwind
+from foxes.models.turbine_models import SetFarmVars
+from foxes.models.partial_wakes import RotorPoints, PartialCentre
+from foxes.utils import wd2uv
+from foxes.config import config
+import foxes.variables as FV
+import foxes.constants as FC
+
+from .sparse_farm_vars import SparseFarmVars
+from .problem_component import ProblemComponent
+
+
+class FrozenBackgroundStates(States):
+    """
+    The ambient states of the selected turbines,
+    on top of the frozen background.
+
+    The data is given at the hub and at the rotor points
+    of each selected turbine, and for each state. The hub
+    data is the ambient flow, which determines the downwind
+    order and the orientation of the rotors, as in the full
+    wind farm. The rotor data is the ambient flow plus the
+    wake deltas of the frozen turbines, applied as by the
+    partial wakes models. The states can only be evaluated
+    at these points, they do not provide a flow field.
+
+    Attributes
+    ----------
+    variables: list of str
+        The state variables
+
+    :group: opt.core
+
+    """
+
+    def __init__(self, hub_data, rotor_data, weights, variables, index=None):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        hub_data: numpy.ndarray
+            The ambient data at the hubs of the selected turbines,
+            shape: (n_states, n_turbines, n_variables)
+        rotor_data: numpy.ndarray
+            The data at the rotor points of the selected turbines,
+            shape: (n_states, n_turbines, n_rpoints, n_variables)
+        weights: numpy.ndarray
+            The state weights, shape: (n_states,)
+        variables: list of str
+            The state variables
+        index: numpy.ndarray, optional
+            The state index, or None for default integers
+
+        """
+        super().__init__()
+        self.variables = list(variables)
+        self._hub = hub_data
+        self._rotor = rotor_data
+        self._weights = weights
+        self._inds = index
+
+    def load_data(self, algo, verbosity=0):
+        """
+        Load and/or create all model data that is subject to chunking.
+
+        Such data should not be stored under self, for memory reasons. The
+        data returned here will automatically be chunked and then provided
+        as part of the mdata object during calculations.
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The calculation algorithm
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        Returns
+        -------
+        idata: dict
+            The dict has exactly two entries: `data_vars`,
+            a dict with entries `name_str -> (dim_tuple, data_ndarray)`;
+            and `coords`, a dict with entries `dim_name_str -> dim_array`
+
+        """
+        # the turbine dimension has a model specific name,
+        # since the downwind order is applied to FC.TURBINE:
+        self.TURBINE = self.var(FC.TURBINE)
+        self.RPOINT = self.var(FC.ROTOR_POINT)
+        self.VARS = self.var("vars")
+        self.HUB = self.var("hub")
+        self.ROTOR = self.var("rotor")
+        self.WEIGHT = self.var(FV.WEIGHT)
+
+        idata = super().load_data(algo, verbosity)
+        idata["coords"][self.VARS] = self.variables
+        idata["data_vars"][self.HUB] = (
+            (FC.STATE, self.TURBINE, self.VARS),
+            self._hub,
+        )
+        idata["data_vars"][self.ROTOR] = (
+            (FC.STATE, self.TURBINE, self.RPOINT, self.VARS),
+            self._rotor,
+        )
+        idata["data_vars"][self.WEIGHT] = ((FC.STATE,), self._weights)
+
+        return idata
+
+    def size(self):
+        """
+        The total number of states.
+
+        Returns
+        -------
+        int:
+            The total number of states
+
+        """
+        return len(self._weights)
+
+    def index(self):
+        """
+        The index list
+
+        Returns
+        -------
+        indices: array_like
+            The index labels of states, or None for default integers
+
+        """
+        return self._inds
+
+    def output_point_vars(self, algo):
+        """
+        The variables which are being modified by the model.
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The calculation algorithm
+
+        Returns
+        -------
+        output_vars: list of str
+            The output variable names
+
+        """
+        return self.variables
+
+    def calculate(self, algo, mdata, fdata, tdata):
+        """
+        The main model calculation.
+
+        This function is executed on a single chunk of data,
+        all computations should be based on numpy arrays.
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The calculation algorithm
+        mdata: foxes.core.MData
+            The model data
+        fdata: foxes.core.FData
+            The farm data
+        tdata: foxes.core.TData
+            The target point data
+
+        Returns
+        -------
+        results: dict
+            The resulting data, keys: output variable str.
+            Values: numpy.ndarray with shape
+            (n_states, n_targets, n_tpoints)
+
+        """
+        n_states = tdata.n_states
+        n_turbines = mdata[self.HUB].shape[1]
+        n_rpoints = mdata[self.ROTOR].shape[2]
+
+        # the hub points are evaluated before the downwind
+        # order is known, the rotor points after that:
+        order = fdata[FV.ORDER] if FV.ORDER in fdata else None
+        if order is not None and not np.issubdtype(order.dtype, np.integer):
+            order = None
+        if order is None and tdata.n_tpoints == 1:
+            data = mdata[self.HUB][:, :, None]
+        elif order is not None and tdata.n_tpoints == n_rpoints:
+            ssel = np.arange(n_states)[:, None]
+            data = mdata[self.ROTOR][ssel, order]
+        else:
+            data = None
+        if data is None or tdata.n_targets != n_turbines:
+            raise ValueError(
+                f"States '{self.name}': Can only be evaluated at the hubs or rotor points of the {n_turbines} selected turbines, got {tdata.n_targets} targets with {tdata.n_tpoints} points"
+            )
+
+        self.ensure_output_vars(algo, tdata)
+        for i, v in enumerate(self.variables):
+            tdata[v][:] = data[..., i]
+
+        tdata[FV.WEIGHT] = mdata[self.WEIGHT][:, None, None]
+        tdata.dims[FV.WEIGHT] = (FC.STATE, FC.TARGET, FC.TPOINT)
+
+        return {v: tdata[v] for v in self.variables}
+
+
+class FrozenBackgroundRotor(TurbineModel):
+    """
+    Re-evaluates the rotor effective wind speeds of
+    the selected turbines after their yaw has been set.
+
+    The ambient rotor point results are projected onto
+    the yawed rotor axes, as the full wind farm does for
+    all turbines that are not first in the downwind order.
+    Evaluations of single turbines in the downwind order
+    keep the results.
+
+    :group: opt.core
+
+    """
+
+    REWS = [FV.REWS, FV.REWS2, FV.REWS3]
+
+    def output_farm_vars(self, algo):
+        """
+        The variables which are being modified by the model.
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The calculation algorithm
+
+        Returns
+        -------
+        output_vars: list of str
+            The output variable names
+
+        """
+        return [v for v in algo.rotor_model.output_farm_vars(algo) if v in self.REWS]
+
+    def calculate(self, algo, mdata, fdata, st_sel):
+        """
+        The main model calculation.
+
+        This function is executed on a single chunk of data,
+        all computations should be based on numpy arrays.
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The calculation algorithm
+        mdata: foxes.core.MData
+            The model data
+        fdata: foxes.core.FData
+            The farm data
+        st_sel: slice or numpy.ndarray of bool
+            The state-turbine selection,
+            for shape: (n_states, n_turbines)
+
+        Returns
+        -------
+        results: dict
+            The resulting data, keys: output variable str.
+            Values: numpy.ndarray with shape (n_states, n_turbines)
+
+        """
+        self.ensure_output_vars(algo, fdata)
+        if not isinstance(st_sel, tuple) or not np.isscalar(st_sel[1]):
+            rotor = algo.rotor_model
+            keep = {
+                v: fdata[v].copy()
+                for v in rotor.calc_vars
+                if v in fdata and v not in self.REWS
+            }
+            rres = dict(algo.get_from_chunk_store(FC.AMB_ROTOR_RES, mdata=mdata))
+            rres[FV.WEIGHT] = algo.get_from_chunk_store(FC.WEIGHT_RES, mdata=mdata)
+            rotor.eval_rpoint_results(
+                algo,
+                mdata,
+                fdata,
+                rres,
+                algo.get_from_chunk_store(FC.ROTOR_WEIGHTS, mdata=mdata),
+            )
+            for v, d in keep.items():
+                fdata[v][:] = d
+        return {v: fdata[v] for v in self.output_farm_vars(algo)}
+
+
+class FrozenBackground(ProblemComponent):
+    """
+    The precomputed wake background of the turbines
+    that are not selected for optimization.
+
+    The frozen turbines are calculated once, without the
+    selected turbines, and their waked flow is sampled at
+    the hubs and rotor points of the selected turbines. The
+    evaluations then run on a reduced wind farm that only
+    contains the selected turbines, with the sampled data
+    as states. Since the selected turbines do not move,
+    the memory of the background is that of the ambient
+    rotor point data of the selected turbines.
+
+    The rotor points are those of the full wind farm, which
+    evaluates the ambient flow with the rotors facing the
+    ambient wind direction at the hubs. The wake deltas of
+    the frozen turbines are applied like those of the partial
+    wakes model: averaged over the rotor disc, at the rotor
+    centre for centre partial wakes, or at the rotor points
+    for rotor point partial wakes. After the yaw of the
+    selected turbines has been set, their rotor effective
+    wind speeds are projected onto the yawed rotor axes.
+
+    Wakes of the selected turbines on the frozen turbines are
+    neglected, and the ambient variables of the selected
+    turbines include the frozen wakes. Hence wake models that
+    depend on ambient turbulence, and wake superpositions that
+    scale with the ambient wind speed, see the waked background
+    instead of the free flow. Layout variables, problems with
+    points and models that evaluate the states elsewhere,
+    e.g. along wake centrelines, are not supported.
+
+    Attributes
+    ----------
+    rotor_average: bool
+        Flag for rotor averaged frozen wake deltas,
+        or None for the choice of the partial wakes
+    n_disc: int
+        The number of disc points along one direction
+        for rotor averaging, replaced by the centre
+        point for centre partial wakes
+    chunk_size_points: int
+        The maximal number of points per state in one
+        calculation of the background
+    frozen_results: xarray.Dataset
+        The farm results of the frozen turbines, or None
+    full_algo: foxes.core.Algorithm
+        The algorithm of the full wind farm, or None
+
+    :group: opt.core
+
+    """
+
+    VARS = [FV.WS, FV.WD, FV.TI, FV.RHO]
+    DELTAS = [FV.WS, FV.WD, FV.TI]
+    ROTOR = "frozen_background_rotor"
+
+    def __init__(
+        self,
+        rotor_average=None,
+        n_disc=8,
+        chunk_size_points=20000,
+    ):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        rotor_average: bool, optional
+            Flag for rotor averaged frozen wake deltas,
+            or None for the choice of the partial wakes
+        n_disc: int
+            The number of disc points along one direction
+            for rotor averaging
+        chunk_size_points: int
+            The maximal number of points per state in one
+            calculation of the background
+
+        """
+        self.rotor_average = rotor_average
+        self.n_disc = n_disc
+        self.chunk_size_points = chunk_size_points
+        self.frozen_results = None
+        self.full_algo = None
+
+    @classmethod
+    def _new_algo(cls, algo, farm, states):
+        """Helper function that creates an algorithm with the same models"""
+        return type(algo)(
+            farm,
+            states,
+            wake_models=list(algo.wake_models.keys()),
+            rotor_model=algo.rotor_model.name,
+            wake_frame=algo.wake_frame.name,
+            wake_deflection=algo.wake_deflection.name,
+            partial_wakes={w: m.name for w, m in algo.partial_wakes.items()},
+            ground_models={w: m.name for w, m in algo.ground_models.items()},
+            farm_controller=algo.farm_controller.name,
+            mbook=algo.mbook,
+            verbosity=0,
+        )
+
+    @classmethod
+    def _copy_turbine(cls, t, models=None):
+        """Helper function that copies a turbine, optionally with other models"""
+        if models is None:
+            models = t.models
+        msel = [
+            t.mstates_sel[t.models.index(m)] if m in t.models else None for m in models
+        ]
+        return Turbine(
+            xy=np.array(t.xy, dtype=config.dtype_double),
+            turbine_models=list(models),
+            name=t.name,
+            models_state_sel=msel,
+            D=t.D,
+            H=t.H,
+            wind_farm_name=t.wind_farm_name,
+        )
+
+    @classmethod
+    def _disc_points(cls, n_disc):
+        """
+        Helper function for the rotor disc design points,
+        in the design point coordinates of rotor models
+        """
+        if n_disc <= 1:
+            return np.zeros((1, 3), dtype=config.dtype_double)
+        x = -1 + (np.arange(n_disc) + 0.5) * 2 / n_disc
+        y, z = np.meshgrid(x, x, indexing="ij")
+        sel = y**2 + z**2 <= 1
+        dpoints = np.zeros((np.sum(sel), 3), dtype=config.dtype_double)
+        dpoints[:, 1] = y[sel]
+        dpoints[:, 2] = z[sel]
+        return dpoints
+
+    @classmethod
+    def _rotor_points(cls, hubs, D, wd, dpoints):
+        """
+        Helper function that places design points on the
+        rotors facing the wind direction, as in
+        `foxes.core.RotorModel.get_rotor_points`
+        """
+        n_states, n_turbines = wd.shape
+        rax = np.zeros((n_states, n_turbines, 3, 3), dtype=config.dtype_double)
+        n = rax[:, :, 0, 0:2]
+        m = rax[:, :, 1, 0:2]
+        n[:] = wd2uv(wd, axis=-1)
+        m[:] = np.stack([-n[:, :, 1], n[:, :, 0]], axis=-1)
+        rax[:, :, 2, 2] = 1
+
+        points = np.zeros(
+            (n_states, n_turbines, len(dpoints), 3), dtype=config.dtype_double
+        )
+        points[:] = hubs[:, :, None, :]
+        points[:] += (
+            0.5 * D[None, :, None, None] * np.einsum("stad,pa->stpd", rax, dpoints)
+        )
+        return points
+
+    def _calc_points(self, falgo, fres, points):
+        """
+        Helper function that calculates the waked and the
+        ambient data at points of shape (n_states, n_turbines,
+        n_points, 3), in chunks of turbines
+        """
+        n_states, n_turbines, n_points = points.shape[:3]
+        vrs = self.VARS + [FV.var2amb[v] for v in self.VARS]
+        out = {
+            v: np.zeros((n_states, n_turbines, n_points), dtype=config.dtype_double)
+            for v in vrs
+        }
+        chunk = max(int(self.chunk_size_points) // n_points, 1)
+        for t0 in range(0, n_turbines, chunk):
+            t1 = min(t0 + chunk, n_turbines)
+            pres = falgo.calc_points(fres, points[:, t0:t1].reshape(n_states, -1, 3))
+            for v, d in out.items():
+                d[:, t0:t1] = pres[v].to_numpy().reshape(n_states, t1 - t0, n_points)
+            del pres
+        return out
+
+    def _sel_models(self, algo, sel_turbines, farm_vars):
+        """
+        Helper function that adds the rotor re-evaluation
+        after the yaw models of the selected turbines
+        """
+        tmodels = algo.mbook.turbine_models
+
+        def _ovars(mname, m):
+            """Helper function for the output variables of a model"""
+            if isinstance(m, SetFarmVars):
+                return list(m.vars) + list(farm_vars.get(mname, []))
+            return m.output_farm_vars(algo)
+
+        models = []
+        for ti in sel_turbines:
+            tms = list(algo.farm.turbines[ti].models)
+            i = None
+            for j, mname in enumerate(tms):
+                m = tmodels.get(mname, None)
+                if m is not None and not m.pre_rotor and FV.YAW in _ovars(mname, m):
+                    i = j
+            if i is not None:
+                tms.insert(i + 1, self.ROTOR)
+            models.append(tms)
+
+        return models
+
+    def create_algo(self, algo, sel_turbines, farm_vars={}, verbosity=0):
+        """
+        Calculates the background of the frozen turbines
+        and creates the algorithm of the selected turbines
+
+        Parameters
+        ----------
+        algo: foxes.algorithms.Downwind
+            The algorithm of the full wind farm
+        sel_turbines: list of int
+            The turbines selected for optimization
+        farm_vars: dict
+            The farm variables of the problem's SetFarmVars
+            models, which are zero for frozen turbines,
+            key: model name, value: list of variables
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        Returns
+        -------
+        sel_algo: foxes.algorithms.Downwind
+            The algorithm of the selected turbines, with
+            the background data as states
+
+        """
+        if not isinstance(algo, Downwind):
+            raise TypeError(
+                f"{type(self).__name__}: Expecting algorithm of type 'Downwind', got '{type(algo).__name__}'"
+            )
+
+        if not algo.initialized:
+            algo.initialize()
+        rotor = algo.rotor_model
+        if not rotor.initialized:
+            rotor.initialize(algo, verbosity=0)
+        sel_turbines = np.asarray(sel_turbines, dtype=config.dtype_int)
+        frozen = np.setdiff1d(np.arange(algo.n_turbines), sel_turbines)
+        hubs = np.zeros(
+            (algo.n_states, len(sel_turbines), 3), dtype=config.dtype_double
+        )
+        hubs[:, :, :2] = algo.farm.xy_array[sel_turbines][None, :]
+        hubs[:, :, 2] = algo.farm.get_hub_heights(algo)[sel_turbines][None, :]
+        D = algo.farm.get_rotor_diameters(algo)[sel_turbines]
+        rpoints = rotor.design_points()
+        states = algo.states
+        n_states = algo.n_states
+        index = states.index()
+        smodels = self._sel_models(algo, sel_turbines, farm_vars)
+        rotor_average = self.rotor_average
+        n_disc = self.n_disc
+        pwakes = [type(m) for m in algo.partial_wakes.values()]
+        if rotor_average is None:
+            rotor_average = not all(m is RotorPoints for m in pwakes)
+        if rotor_average and all(m is PartialCentre for m in pwakes):
+            n_disc = 1
+        algo.finalize()
+
+        # the frozen turbines see the problem's SetFarmVars
+        # models as the non-selected turbines of the full farm:
+        mbook = algo.mbook
+        ffarm = WindFarm(name=algo.farm.name + "_frozen")
+        for ti in frozen:
+            ffarm.add_turbine(self._copy_turbine(algo.farm.turbines[ti]), verbosity=0)
+        for mname, vrs in farm_vars.items():
+            model = mbook.turbine_models[mname]
+            model.reset()
+            for v in vrs:
+                if isinstance(model, SparseFarmVars):
+                    model.add_var(
+                        v,
+                        np.zeros((n_states, 0), dtype=config.dtype_double),
+                        turbines=[],
+                    )
+                else:
+                    model.add_var(
+                        v,
+                        np.zeros((n_states, len(frozen)), dtype=config.dtype_double),
+                    )
+
+        if verbosity > 0:
+            print(
+                f"{type(self).__name__}: Calculating {len(frozen)} frozen turbines, sampling {len(sel_turbines)} selected rotors"
+            )
+
+        falgo = self._new_algo(algo, ffarm, states)
+
+        def _run():
+            """Helper function that runs the frozen farm calculation"""
+            fres = falgo.calc_farm()
+
+            # the ambient flow at the hubs orients the rotors:
+            hres = self._calc_points(falgo, fres, hubs[:, :, None])
+            wd = hres[FV.AMB_WD][:, :, 0]
+            pts = self._rotor_points(hubs, D, wd, rpoints)
+            rres = self._calc_points(falgo, fres, pts)
+
+            if not rotor_average:
+                dres = rres
+            elif n_disc == 1:
+                dres = hres
+            else:
+                pts = self._rotor_points(hubs, D, wd, self._disc_points(n_disc))
+                dres = self._calc_points(falgo, fres, pts)
+            del pts
+
+            return fres, hres, rres, dres
+
+        if has_engine():
+            self.frozen_results, hres, rres, dres = _run()
+        else:
+            with Engine.new("single", verbosity=0):
+                self.frozen_results, hres, rres, dres = _run()
+        falgo.finalize(clear_mem=True)
+        for mname in farm_vars:
+            mbook.turbine_models[mname].reset()
+
+        n_sel = len(sel_turbines)
+        hub_data = np.zeros(
+            (n_states, n_sel, len(self.VARS)), dtype=config.dtype_double
+        )
+        rotor_data = np.zeros(
+            (n_states, n_sel, len(rpoints), len(self.VARS)), dtype=config.dtype_double
+        )
+        for i, v in enumerate(self.VARS):
+            hub_data[..., i] = hres[FV.var2amb[v]][:, :, 0]
+            rotor_data[..., i] = rres[FV.var2amb[v]]
+            if v in self.DELTAS:
+                delta = dres[v] - dres[FV.var2amb[v]]
+                if v == FV.WD:
+                    delta = np.mod(delta + 180.0, 360.0) - 180.0
+                if rotor_average:
+                    delta = np.mean(delta, axis=2, keepdims=True)
+                rotor_data[..., i] += delta
+        del hres, rres, dres
+
+        i = self.VARS.index(FV.WD)
+        rotor_data[..., i] = np.mod(rotor_data[..., i], 360.0)
+        for v in [FV.WS, FV.TI]:
+            i = self.VARS.index(v)
+            rotor_data[..., i] = np.maximum(rotor_data[..., i], 0.0)
+
+        w = self.frozen_results[FV.WEIGHT].to_numpy().reshape(n_states, -1)[:, 0]
+        bstates = FrozenBackgroundStates(
+            hub_data, rotor_data, w.copy(), self.VARS, index=index
+        )
+
+        sfarm = WindFarm(name=algo.farm.name, boundary=algo.farm.boundary)
+        for ti, models in zip(sel_turbines, smodels):
+            sfarm.add_turbine(
+                self._copy_turbine(algo.farm.turbines[ti], models), verbosity=0
+            )
+
+        if any(self.ROTOR in m for m in smodels):
+            mbook.turbine_models[self.ROTOR] = FrozenBackgroundRotor()
+
+        return self._new_algo(algo, sfarm, bstates)
+
+    def on_pre_initialize(self, problem, verbosity=0):
+        """
+        Called before the algorithm of the problem is
+        initialized, may replace the algorithm or its states
+
+        Replaces the algorithm of the problem by the
+        algorithm of the selected turbines on top of
+        the frozen background.
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        if self.full_algo is None and not problem.all_turbines:
+            sel, farm_vars = problem._init_frozen_background(verbosity)
+            self.full_algo = problem.algo
+            problem.algo = self.create_algo(self.full_algo, sel, farm_vars, verbosity)
+
+    def init_info(self, problem):
+        """
+        The information that is printed at the
+        problem initialization
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+
+        Returns
+        -------
+        info: str
+            The information, or None
+
+        """
+        if self.full_algo is None:
+            return None
+        n_sel = problem.algo.n_turbines
+        return f"  Frozen bg   : {self.full_algo.n_turbines - n_sel} frozen, {n_sel} selected turbines"
@@ -0,0 +1,334 @@
+import numpy as np
+import pandas as pd
+from copy import deepcopy
+
+from .problem_component import ProblemComponent
+
+
+class MultiFidelity(ProblemComponent):
+    """
+    Multi-fidelity evaluation of populations.
+
+    All individuals are evaluated by a cheap low-fidelity
+    algorithm, e.g. with centre rotor model, for the same
+    wind farm and states. The best individuals are then
+    re-evaluated by the accurate algorithm of the problem:
+    the top fraction for single objective problems, or
+    the non-dominated front for multi objective problems.
+    The discrepancies between both evaluations of these
+    individuals are recorded.
+
+    The returned objectives are calibrated to the high
+    fidelity: the low-fidelity objectives of individuals
+    that are not re-evaluated are corrected by the mean
+    discrepancy of all re-evaluations so far. The
+    correction is a constant shift per objective, hence
+    it does not change the ranking within a population.
+    Constraints are returned as evaluated.
+
+    The low-fidelity algorithm has its own copy of the
+    states of the problem.
+
+    Attributes
+    ----------
+    top_fraction: float
+        The fraction of the population that is re-evaluated
+        for single objective problems
+    algo_pars: dict
+        The parameters of the low-fidelity algorithm that
+        differ from the accurate algorithm
+    algo: foxes.core.Algorithm
+        The low-fidelity algorithm
+    hifi_algo: foxes.core.Algorithm
+        The high-fidelity algorithm, i.e., the
+        algorithm of the problem
+    n_low: int
+        The number of low-fidelity evaluations
+    n_high: int
+        The number of high-fidelity re-evaluations
+
+    :group: opt.core
+
+    """
+
+    SCALAR_PARS = {float: "top_fraction"}
+
+    def __init__(
+        self,
+        top_fraction=0.1,
+        algo=None,
+        algo_pars=None,
+    ):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        top_fraction: float
+            The fraction of the population that is re-evaluated
+            for single objective problems
+        algo: foxes.core.Algorithm, optional
+            The low-fidelity algorithm, for the wind farm and
+            the states of the problem. If None, it is created
+            from the accurate algorithm and algo_pars
+        algo_pars: dict, optional
+            The parameters of the low-fidelity algorithm that
+            differ from the accurate algorithm. If None, the
+            centre rotor model with rotor points partial wakes
+
+        """
+        if not 0 < top_fraction <= 1:
+            raise ValueError(
+                f"{type(self).__name__}: Expecting top_fraction in (0, 1], got {top_fraction}"
+            )
+        self.top_fraction = top_fraction
+        self.algo_pars = algo_pars
+        if algo_pars is None:
+            self.algo_pars = dict(rotor_model="centre", partial_wakes="rotor_points")
+        self.algo = algo
+        self.hifi_algo = None
+        self.reset()
+
+    def reset(self):
+        """
+        Removes all recorded discrepancies
+        """
+        self.n_low = 0
+        self.n_high = 0
+        self._low = []
+        self._high = []
+
+    def initialize(self, algo):
+        """
+        Creates the low-fidelity algorithm, if not given,
+        with its own copy of the states
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The accurate algorithm of the problem
+
+        """
+        if self.algo is None:
+            pars = dict(
+                farm=algo.farm,
+                states=deepcopy(algo.states),
+                wake_models=list(algo.wake_models.keys()),
+                rotor_model=algo.rotor_model.name,
+                wake_frame=algo.wake_frame.name,
+                wake_deflection=algo.wake_deflection.name,
+                partial_wakes={w: m.name for w, m in algo.partial_wakes.items()},
+                ground_models={w: m.name for w, m in algo.ground_models.items()},
+                farm_controller=algo.farm_controller.name,
+                mbook=algo.mbook,
+                verbosity=0,
+            )
+            pars.update(self.algo_pars)
+            self.algo = type(algo)(**pars)
+
+        elif self.algo.farm is not algo.farm:
+            raise ValueError(
+                f"{type(self).__name__}: Expecting low-fidelity algorithm for the same wind farm object as the problem"
+            )
+
+        elif self.algo.states is algo.states:
+            self.algo.states = deepcopy(algo.states)
+
+    def select(self, objs, feasible, maximize):
+        """
+        Selects the individuals for re-evaluation
+
+        Parameters
+        ----------
+        objs: numpy.ndarray
+            The low-fidelity objective values,
+            shape: (n_pop, n_objectives)
+        feasible: numpy.ndarray of bool
+            The feasibility of the individuals,
+            shape: (n_pop,)
+        maximize: numpy.ndarray of bool
+            The maximization flags of the objectives,
+            shape: (n_objectives,)
+
+        Returns
+        -------
+        sel: numpy.ndarray of int
+            The indices of the selected individuals
+
+        """
+        n_pop, n_objs = objs.shape
+        self.n_low += n_pop
+        if not n_pop:
+            return np.zeros(0, dtype=np.int64)
+
+        mobjs = np.where(np.asarray(maximize)[None, :], -objs, objs)
+        if n_objs == 1:
+            n = min(max(int(np.ceil(self.top_fraction * n_pop)), 1), n_pop)
+            return np.lexsort((mobjs[:, 0], ~feasible))[:n]
+
+        cands = np.where(feasible)[0] if np.any(feasible) else np.arange(n_pop)
+        o = mobjs[cands]
+        dominated = np.any(
+            np.all(o[:, None] <= o[None, :], axis=2)
+            & np.any(o[:, None] < o[None, :], axis=2),
+            axis=0,
+        )
+        return cands[~dominated]
+
+    def add(self, low, high):
+        """
+        Records the objectives of re-evaluated individuals
+
+        Parameters
+        ----------
+        low: numpy.ndarray
+            The low-fidelity objective values,
+            shape: (n_sel, n_objectives)
+        high: numpy.ndarray
+            The high-fidelity objective values,
+            shape: (n_sel, n_objectives)
+
+        """
+        self.n_high += len(high)
+        self._low.append(np.array(low, dtype=np.float64))
+        self._high.append(np.array(high, dtype=np.float64))
+
+    def correct(self, objs):
+        """
+        Corrects low-fidelity objectives by the mean
+        discrepancy of the re-evaluated individuals
+
+        Parameters
+        ----------
+        objs: numpy.ndarray
+            The low-fidelity objective values,
+            shape: (n_pop, n_objectives)
+
+        Returns
+        -------
+        objs: numpy.ndarray
+            The corrected objective values,
+            shape: (n_pop, n_objectives)
+
+        """
+        if not len(self._high):
+            return objs
+        low = np.concatenate(self._low, axis=0)
+        high = np.concatenate(self._high, axis=0)
+        return objs + np.mean(high - low, axis=0)[None, :]
+
+    def get_stats(self, names=None):
+        """
+        Gets the discrepancy statistics of the
+        re-evaluated individuals
+
+        Parameters
+        ----------
+        names: list of str, optional
+            The objective component names
+
+        Returns
+        -------
+        stats: pandas.DataFrame
+            The statistics of the differences high minus
+            low fidelity, and the rank correlation of both
+            fidelities, per objective
+
+        """
+        if not len(self._high):
+            return None
+        low = np.concatenate(self._low, axis=0)
+        high = np.concatenate(self._high, axis=0)
+        diff = high - low
+        n_objs = high.shape[1]
+
+        def _ranks(x):
+            """Helper function for ranks along axis 0"""
+            return np.argsort(np.argsort(x, axis=0), axis=0).astype(np.float64)
+
+        corr = np.full(n_objs, np.nan)
+        if len(high) > 1:
+            rl = _ranks(low)
+            rh = _ranks(high)
+            for i in range(n_objs):
+                if np.std(rl[:, i]) > 0 and np.std(rh[:, i]) > 0:
+                    corr[i] = np.corrcoef(rl[:, i], rh[:, i])[0, 1]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel = np.mean(np.abs(diff), axis=0) / np.mean(np.abs(high), axis=0)
+
+        if names is None:
+            names = [f"obj_{i}" for i in range(n_objs)]
+        return pd.DataFrame(
+            dict(
+                n=len(high),
+                mean_diff=np.mean(diff, axis=0),
+                mean_abs_diff=np.mean(np.abs(diff), axis=0),
+                max_abs_diff=np.max(np.abs(diff), axis=0),
+                rel_mean_abs_diff=rel,
+                rank_corr=corr,
+            ),
+            index=pd.Index(names, name="objective"),
+        )
+
+    def on_pre_initialize(self, problem, verbosity=0):
+        """
+        Called before the algorithm of the problem is
+        initialized, may replace the algorithm or its states
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        if problem.eval_pool is not None:
+            raise ValueError(
+                f"Problem '{problem.name}': Cannot combine multi_fidelity and eval_pool"
+            )
+        if self.hifi_algo is None:
+            self.hifi_algo = problem.algo
+            self.initialize(problem.algo)
+        else:
+            problem.switch_algo(self.hifi_algo)
+        self.reset()
+
+    def init_info(self, problem):
+        """
+        The information that is printed at the
+        problem initialization
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+
+        Returns
+        -------
+        info: str
+            The information, or None
+
+        """
+        return f"  Multi-fid.  : top_fraction={self.top_fraction}, low-fidelity rotor={self.algo.rotor_model.name}"
+
+    def on_finalize(self, problem, verbosity=0):
+        """
+        Called at the problem finalization, and when
+        leaving the problem context. Releases resources
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        if self.hifi_algo is not None:
+            problem.switch_algo(self.hifi_algo)
+            stats = self.get_stats(problem.objs.component_names)
+            if verbosity and stats is not None:
+                print(f"Problem '{problem.name}': Multi-fidelity discrepancies")
+                print(stats)
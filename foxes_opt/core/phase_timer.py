@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+from time import perf_counter
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    """
+    Accumulates wall times and counters of the
+    phases of problem evaluations.
+
+    Phases that are measured while another phase
+    is running are nested, their parent is the
+    innermost running phase of their first
+    measurement. Their time is part of the
+    time of the parent.
+
+    Attributes
+    ----------
+    phases: dict
+        The data, key: phase name, value: dict
+        with keys time, calls, individuals, states,
+        parent
+
+    :group: opt.core
+
+    """
+
+    def __init__(self):
+        """
+        Constructor.
+        """
+        self.reset()
+
+    def reset(self):
+        """
+        Resets all phases
+        """
+        self.phases = {}
+        self._running = []
+
+    def add(self, phase, time, n_inds=1, n_states=0, parent=None):
+        """
+        Adds a measurement to a phase
+
+        Parameters
+        ----------
+        phase: str
+            The phase name
+        time: float
+            The wall time in seconds
+        n_inds: int
+            The number of evaluated individuals
+        n_states: int
+            The number of evaluated states
+        parent: str, optional
+            The parent phase, for nested phases
+
+        """
+        if phase not in self.phases:
+            self.phases[phase] = dict(
+                time=0.0, calls=0, individuals=0, states=0, parent=parent
+            )
+        d = self.phases[phase]
+        d["time"] += time
+        d["calls"] += 1
+        d["individuals"] += int(n_inds)
+        d["states"] += int(n_states)
+
+    @contextmanager
+    def measure(self, phase, n_inds=1, n_states=0):
+        """
+        Context manager that measures the wall
+        time of a phase
+
+        Parameters
+        ----------
+        phase: str
+            The phase name
+        n_inds: int
+            The number of evaluated individuals
+        n_states: int
+            The number of evaluated states
+
+        """
+        parent = self._running[-1] if len(self._running) else None
+        self._running.append(phase)
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            self._running.pop()
+            self.add(phase, perf_counter() - t0, n_inds, n_states, parent)
+
+    def to_dict(self):
+        """
+        Returns the phase data
+
+        Returns
+        -------
+        data: dict
+            The data, key: phase name, value: dict
+            with keys time, calls, individuals, states,
+            parent, time_per_call
+
+        """
+        out = {}
+        for p, d in self.phases.items():
+            out[p] = dict(d)
+            out[p]["time_per_call"] = d["time"] / d["calls"] if d["calls"] else np.nan
+        return out
+
+    def to_dataframe(self):
+        """
+        Returns the phase data as DataFrame
+
+        Returns
+        -------
+        data: pandas.DataFrame
+            The data, one row per phase
+
+        """
+        cols = ["time", "calls", "individuals", "states", "parent", "time_per_call"]
+        df = pd.DataFrame.from_dict(self.to_dict(), orient="index", columns=cols)
+        df.index.name = "phase"
+        return df
+
+    def print_info(self):
+        """
+        Prints the phase data. The shares refer to the
+        total time of the phases that are not nested,
+        nested phases are listed below their parents
+        """
+        if not len(self.phases):
+            print("  (no timings recorded)")
+            return
+        df = self.to_dataframe()
+        top = df["parent"].isna()
+        total = df.loc[top, "time"].sum()
+        df["share"] = df["time"] / total if total > 0 else np.nan
+
+        def _rows(parent, depth):
+            """Helper function for the phases below a parent"""
+            sel = top if parent is None else df["parent"] == parent
+            out = []
+            for p in df.index[sel]:
+                out.append(("  " * depth + p, p))
+                out += _rows(p, depth + 1)
+            return out
+
+        rows = _rows(None, 0)
+        df = df.loc[[p for __, p in rows]].drop(columns="parent")
+        df.index = pd.Index([n for n, __ in rows], name="phase")
+        print(df.to_string(float_format=lambda x: f"{x:.4g}"))
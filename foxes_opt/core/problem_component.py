@@ -0,0 +1,232 @@
+class ProblemComponent:
+    """
+    Abstract base class for optional components
+    of wind farm optimization problems.
+
+    Components are attached to a problem, and take
+    part in its life cycle by hooks that do nothing
+    by default. The hooks are called in the order
+    in which the components were added.
+
+    Attributes
+    ----------
+    SCALAR_PARS: dict
+        The constructor parameters for scalar problem
+        parameter values, key: scalar type, value:
+        constructor parameter name
+
+    :group: opt.core
+
+    """
+
+    SCALAR_PARS = {}
+
+    @classmethod
+    def from_parameter(cls, problem_name, pname, value):
+        """
+        Creates a component from a problem parameter
+
+        Parameters
+        ----------
+        problem_name: str
+            The problem's name
+        pname: str
+            The name of the problem parameter
+        value: bool or dict or ProblemComponent or scalar
+            None or False for no component, True for the
+            default component, a dict of constructor parameters,
+            a component object or a scalar of one of the types
+            in SCALAR_PARS
+
+        Returns
+        -------
+        component: ProblemComponent
+            The component, or None
+
+        """
+        if value is None or value is False:
+            return None
+        elif value is True:
+            return cls()
+        elif isinstance(value, cls):
+            return value
+        elif isinstance(value, dict):
+            return cls(**value)
+        for t, p in cls.SCALAR_PARS.items():
+            if isinstance(value, t):
+                return cls(**{p: value})
+
+        tnames = ["bool", "dict", cls.__name__] + [t.__name__ for t in cls.SCALAR_PARS]
+        raise TypeError(
+            f"Problem '{problem_name}': Expecting {', '.join(tnames)} for {pname}, got '{type(value).__name__}'"
+        )
+
+    def on_pre_initialize(self, problem, verbosity=0):
+        """
+        Called before the algorithm of the problem is
+        initialized, may replace the algorithm or its states
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        pass
+
+    def on_initialize(self, problem, verbosity=0):
+        """
+        Called at the end of the problem initialization
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        pass
+
+    def init_info(self, problem):
+        """
+        The information that is printed at the
+        problem initialization
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+
+        Returns
+        -------
+        info: str
+            The information, or None
+
+        """
+        return None
+
+    def on_evaluate_individual(self, problem, vars_int, vars_float, objs, cons):
+        """
+        Called after the evaluation of an individual
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        vars_int: numpy.ndarray
+            The integer variable values, shape: (n_vars_int,)
+        vars_float: numpy.ndarray
+            The float variable values, shape: (n_vars_float,)
+        objs: numpy.ndarray
+            The objective function values, shape: (n_objectives,)
+        cons: numpy.ndarray
+            The constraint values, shape: (n_constraints,)
+
+        """
+        pass
+
+    def on_evaluate_population(self, problem, vars_int, vars_float, objs, cons):
+        """
+        Called after the evaluation of a population
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        vars_int: numpy.ndarray
+            The integer variable values, shape: (n_pop, n_vars_int)
+        vars_float: numpy.ndarray
+            The float variable values, shape: (n_pop, n_vars_float)
+        objs: numpy.ndarray
+            The objective function values, shape: (n_pop, n_objectives)
+        cons: numpy.ndarray
+            The constraint values, shape: (n_pop, n_constraints)
+
+        """
+        pass
+
+    def on_finalize_individual(self, problem, results, verbosity=0):
+        """
+        Called after the evaluation of the champion
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        results: Any
+            The problem results of the champion
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        Returns
+        -------
+        results: Any
+            The possibly modified problem results
+
+        """
+        return results
+
+    def on_finalize_population(self, problem, verbosity=0):
+        """
+        Called after the evaluation of the final population
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        pass
+
+    def on_finalize(self, problem, verbosity=0):
+        """
+        Called at the problem finalization, and when
+        leaving the problem context. Releases resources
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        pass
+
+    def get_state(self, problem):
+        """
+        Returns the evaluation state of the component,
+        for checkpointing
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+
+        Returns
+        -------
+        state: Any
+            The state, or None
+
+        """
+        return None
+
+    def set_state(self, problem, state):
+        """
+        Restores the evaluation state of the component,
+        for resuming from a checkpoint
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        state: Any
+            The state, as returned by get_state
+
+        """
+        pass
@@ -0,0 +1,164 @@
+from foxes.core import Engine, has_engine, get_engine
+
+from .problem_component import ProblemComponent
+
+
+class ProblemEngine(ProblemComponent):
+    """
+    An engine owned by a problem.
+
+    The engine is entered by the first evaluation and
+    kept alive until the finalization of the champion or
+    of the final population, such that all evaluations
+    of a solver run use the same worker pool. It is not
+    entered if another engine is active.
+
+    Attributes
+    ----------
+    engine: foxes.core.Engine
+        The engine
+    entered: bool
+        Flag for an engine that is entered by the problem
+
+    :group: opt.core
+
+    """
+
+    SCALAR_PARS = {str: "engine_type", Engine: "engine"}
+
+    def __init__(self, engine=None, engine_type="default", **engine_pars):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        engine: foxes.core.Engine, optional
+            The engine, or None for creating it
+        engine_type: str
+            The engine type, if the engine is created
+        engine_pars: dict, optional
+            Additional parameters for `Engine.new`,
+            if the engine is created
+
+        """
+        if engine is None:
+            engine = Engine.new(engine_type, **{"verbosity": 0, **engine_pars})
+        self.engine = engine
+        self.entered = False
+
+    def __str__(self):
+        return str(self.engine)
+
+    def enter(self):
+        """
+        Enters the engine, unless it is already
+        entered or another engine is active
+        """
+        if not self.entered and not has_engine():
+            self.engine.__enter__()
+            self.entered = True
+
+    def release(self, problem, verbosity=0):
+        """
+        Shuts down the engine, if entered.
+
+        The engine is entered again by the next evaluation.
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        if self.entered:
+            self.engine.__exit__(None, None, None)
+            self.entered = False
+            if verbosity:
+                print(f"Problem '{problem.name}': Shut down engine {self.engine}")
+
+    def on_initialize(self, problem, verbosity=0):
+        """
+        Called at the end of the problem initialization
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        self.enter()
+
+    def init_info(self, problem):
+        """
+        The information that is printed at the
+        problem initialization
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+
+        Returns
+        -------
+        info: str
+            The information, or None
+
+        """
+        if self.entered:
+            return f"  Engine      : {self.engine}"
+        return f"  Engine      : {get_engine()} (active), ignoring {self.engine}"
+
+    def on_finalize_individual(self, problem, results, verbosity=0):
+        """
+        Called after the evaluation of the champion
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        results: Any
+            The problem results of the champion
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        Returns
+        -------
+        results: Any
+            The possibly modified problem results
+
+        """
+        self.release(problem, verbosity)
+        return results
+
+    def on_finalize_population(self, problem, verbosity=0):
+        """
+        Called after the evaluation of the final population
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        self.release(problem, verbosity)
+
+    def on_finalize(self, problem, verbosity=0):
+        """
+        Called at the problem finalization, and when
+        leaving the problem context. Releases resources
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        self.release(problem, verbosity)
@@ -0,0 +1,111 @@
+import foxes.variables as FV
+import foxes.constants as FC
+
+
+class ResultsContext:
+    """
+    The farm results of one evaluation, shared
+    by all objectives and constraints.
+
+    The results variables are converted to numpy
+    arrays of shape (n_pop, n_states, n_turbines)
+    only once, and reductions that are requested
+    by several functions are only computed once.
+
+    Attributes
+    ----------
+    results: xarray.Dataset
+        The farm results
+    n_pop: int
+        The number of individuals, 1 for
+        individual results
+    n_states: int
+        The number of states per individual
+    n_turbines: int
+        The number of turbines
+
+    :group: opt.core
+
+    """
+
+    def __init__(self, results):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        results: xarray.Dataset
+            The farm results of an individual or
+            of a population
+
+        """
+        self.results = results
+        if "n_pop" in results:
+            self.n_pop = int(results["n_pop"].values)
+            self.n_states = int(results["n_org_states"].values)
+        else:
+            self.n_pop = 1
+            self.n_states = results.sizes[FC.STATE]
+        self.n_turbines = results.sizes[FC.TURBINE]
+        self._data = {}
+        self._reductions = {}
+
+    def get(self, variable):
+        """
+        Get the data of a farm variable
+
+        Parameters
+        ----------
+        variable: str
+            The farm variable
+
+        Returns
+        -------
+        data: numpy.ndarray
+            The data, shape: (n_pop, n_states, n_turbines),
+            or (n_pop, n_states) for variables without
+            turbine dimension
+
+        """
+        if variable not in self._data:
+            data = self.results[variable].to_numpy()
+            self._data[variable] = data.reshape(
+                (self.n_pop, self.n_states) + data.shape[1:]
+            )
+        return self._data[variable]
+
+    @property
+    def weights(self):
+        """
+        The state weights
+
+        Returns
+        -------
+        weights: numpy.ndarray
+            The weights, shape: (n_pop, n_states) or
+            (n_pop, n_states, n_turbines)
+
+        """
+        return self.get(FV.WEIGHT)
+
+    def reduce(self, key, func):
+        """
+        Get a reduction of the results, computing
+        it only at the first request
+
+        Parameters
+        ----------
+        key: tuple
+            The unique key of the reduction
+        func: Function
+            The reduction, `f(context) -> values`
+
+        Returns
+        -------
+        values: Any
+            The reduction values
+
+        """
+        if key not in self._reductions:
+            self._reductions[key] = func(self)
+        return self._reductions[key]
@@ -0,0 +1,167 @@
+import numpy as np
+
+from foxes.algorithms.downwind.models import PopulationStates
+from foxes.core import States
+from foxes.config import config
+import foxes.constants as FC
+import foxes.variables as FV
+
+
+class SelectedStates(PopulationStates):
+    """
+    A subset of the states of original states.
+
+    The weights of the original states are kept,
+    such that weighted sums over the selected states
+    are the contributions of these states to the
+    weighted sums over all original states.
+
+    Attributes
+    ----------
+    states: foxes.core.States
+        The original states
+    sel_states: numpy.ndarray
+        The indices of the selected original states
+    weights: numpy.ndarray
+        The weights of the selected states, or None
+        for the weights of the original states
+
+    :group: opt.core
+
+    """
+
+    def __init__(self, states, sel_states, weights=None):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        states: foxes.core.States
+            The original states
+        sel_states: list of int
+            The indices of the selected original states
+        weights: numpy.ndarray, optional
+            The weights of the selected states, shape:
+            (n_sel_states,), or None for the weights
+            of the original states
+
+        """
+        super().__init__(states, n_pop=1)
+        self.sel_states = np.asarray(sel_states, dtype=config.dtype_int)
+        self.weights = None
+        if weights is not None:
+            self.weights = np.asarray(weights, dtype=config.dtype_double)
+            if self.weights.shape != self.sel_states.shape:
+                raise ValueError(
+                    f"States '{self.name}': Expecting weights of shape {self.sel_states.shape}, got {self.weights.shape}"
+                )
+
+    def load_data(self, algo, verbosity=0):
+        """
+        Load and/or create all model data that is subject to chunking.
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The calculation algorithm
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        Returns
+        -------
+        idata: dict
+            The dict has exactly two entries: `data_vars`,
+            a dict with entries `name_str -> (dim_tuple, data_ndarray)`;
+            and `coords`, a dict with entries `dim_name_str -> dim_array`
+
+        """
+        self.STATE0 = self.var(FC.STATE + "0")
+        self.SMAP = self.var("SMAP")
+        self.SWEIGHT = self.var("SWEIGHT")
+
+        idata = States.load_data(self, algo, verbosity)
+        idata0 = algo.get_model_data(self.states)
+        n_states0 = self.states.size()
+        for cname, coord in idata0["coords"].items():
+            if cname != FC.STATE:
+                idata["coords"][cname] = coord
+            else:
+                idata["coords"][self.STATE0] = coord
+        for dname, (dims0, data0) in idata0["data_vars"].items():
+            hdims = tuple(
+                [d if d != FC.STATE else self.STATE0 for d in np.atleast_1d(dims0)]
+            )
+            idata["data_vars"][dname] = (hdims, data0)
+        if FV.WEIGHT not in idata["data_vars"]:
+            idata["data_vars"][FV.WEIGHT] = (
+                (self.STATE0,),
+                np.full(n_states0, 1 / n_states0, dtype=config.dtype_double),
+            )
+        idata["data_vars"][self.SMAP] = ((FC.STATE,), self.sel_states.astype(np.int32))
+        if self.weights is not None:
+            idata["data_vars"][self.SWEIGHT] = ((FC.STATE,), self.weights)
+
+        if not any(self.STATE0 in dims for dims, __ in idata["data_vars"].values()):
+            del idata["coords"][self.STATE0]
+
+        return idata
+
+    def size(self):
+        """
+        The total number of states.
+
+        Returns
+        -------
+        int:
+            The total number of states
+
+        """
+        return len(self.sel_states)
+
+    def index(self):
+        """
+        The index list
+
+        Returns
+        -------
+        indices: array_like
+            The index labels of states, or None for default integers
+
+        """
+        inds = self.states.index()
+        return None if inds is None else np.asarray(inds)[self.sel_states]
+
+    def calculate(self, algo, mdata, fdata, tdata):
+        """ "
+        The main model calculation.
+
+        This function is executed on a single chunk of data,
+        all computations should be based on numpy arrays.
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The calculation algorithm
+        mdata: foxes.core.Data
+            The model data
+        fdata: foxes.core.Data
+            The farm data
+        tdata: foxes.core.Data
+            The point data
+
+        Returns
+        -------
+        results: dict
+            The resulting data, keys: output variable str.
+            Values: numpy.ndarray with shape (n_states, n_points)
+
+        """
+        out = super().calculate(algo, mdata, fdata, tdata)
+        if self.weights is not None:
+            out[FV.WEIGHT][:] = mdata[self.SWEIGHT][:, None, None]
+
+        # provide weights also to wrapping population states:
+        tdata[FV.WEIGHT] = out[FV.WEIGHT]
+        tdata.dims[FV.WEIGHT] = (FC.STATE, FC.TARGET, FC.TPOINT)
+
+        return out
@@ -0,0 +1,315 @@
+import numpy as np
+
+from foxes.core import TurbineModel
+from foxes.models.turbine_models import SetFarmVars
+from foxes.config import config
+import foxes.variables as FV
+import foxes.constants as FC
+
+
+class SparseFarmVars(SetFarmVars):
+    """
+    Set farm data variables to given data, for
+    a subset of turbines.
+
+    The data of each variable only covers the
+    turbines of its turbine mask, such that memory
+    scales with the number of masked turbines instead
+    of the wind farm size. All other turbines are set
+    to the fill value. Without turbine mask, the model
+    behaves like `SetFarmVars`.
+
+    Attributes
+    ----------
+    fill: float
+        The value of turbines outside the mask,
+        or numpy.nan for keeping their values
+
+    :group: opt.core
+
+    """
+
+    def __init__(self, pre_rotor=False, once=False, fill=0.0):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        pre_rotor: bool
+            Flag for running this model before
+            running the rotor model.
+        once: bool
+            Flag for running only once
+        fill: float
+            The value of turbines outside the mask,
+            or numpy.nan for keeping their values
+
+        """
+        super().__init__(pre_rotor=pre_rotor, once=once)
+        self.fill = fill
+
+    def add_var(self, var, data, turbines=None):
+        """
+        Add data for a variable.
+
+        Parameters
+        ----------
+        var: str
+            The variable name
+        data: numpy.ndarray
+            The data, shape: (n_states, n_turbines), or
+            (n_states, len(turbines)) for a turbine mask.
+            Entries that are nan are not set
+        turbines: list of int, optional
+            The turbine indices of the data columns,
+            or None for all turbines
+
+        """
+        if self.initialized:
+            raise ValueError(
+                f"Model '{self.name}': Cannot add_var after initialization"
+            )
+        if self.running:
+            raise ValueError(f"Model '{self.name}': Cannot add_var while running")
+        data = np.asarray(data, dtype=config.dtype_double)
+        if turbines is not None:
+            turbines = np.asarray(turbines, dtype=config.dtype_int)
+            if data.shape[-1] != len(turbines):
+                raise ValueError(
+                    f"Model '{self.name}': Expecting {len(turbines)} data columns for variable '{var}', got shape {data.shape}"
+                )
+        self.vars.append(var)
+        self._vdata.append(data)
+        self._turbines.append(turbines)
+
+    def reset(self):
+        """
+        Remove all variables.
+        """
+        if self.running:
+            raise ValueError(f"Model '{self.name}': Cannot reset while running")
+        self.vars = []
+        self._vdata = []
+        self._turbines = []
+
+    def initialize(self, algo, verbosity=0, force=False):
+        """
+        Initializes the model.
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The calculation algorithm
+        verbosity: int
+            The verbosity level, 0 = silent
+        force: bool
+            Overwrite existing data
+
+        """
+        TurbineModel.initialize(self, algo, verbosity, force)
+        self._once_done = set()
+
+    def _get_turbines(self, algo, i):
+        """Helper function that returns the turbines of a variable"""
+        tinds = self._turbines[i]
+        return np.arange(algo.n_turbines) if tinds is None else tinds
+
+    def load_data(self, algo, verbosity=0):
+        """
+        Load and/or create all model data that is subject to chunking.
+
+        Such data should not be stored under self, for memory reasons. The
+        data returned here will automatically be chunked and then provided
+        as part of the mdata object during calculations.
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The calculation algorithm
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        Returns
+        -------
+        idata: dict
+            The dict has exactly two entries: `data_vars`,
+            a dict with entries `name_str -> (dim_tuple, data_ndarray)`;
+            and `coords`, a dict with entries `dim_name_str -> dim_array`
+
+        """
+        idata = TurbineModel.load_data(self, algo, verbosity)
+
+        for i, v in enumerate(self.vars):
+            tinds = self._get_turbines(algo, i)
+            n_trb = len(tinds)
+            data = np.full((algo.n_states, n_trb), np.nan, dtype=config.dtype_double)
+            vdata = self._vdata[i]
+
+            # handle special case of call during vectorized optimization:
+            if (
+                np.ndim(vdata)
+                and vdata.shape[0] != algo.n_states
+                and hasattr(algo.states, "n_pop")
+            ):
+                n_pop = algo.states.n_pop
+                hdata = data.reshape(n_pop, algo.states.states.size(), n_trb)
+                hdata[:] = vdata[None, :]
+            else:
+                data[:] = vdata
+
+            tdim = self.var(f"{v}_{FC.TURBINE}")
+            idata["coords"][tdim] = tinds
+            idata["data_vars"][self.var(v)] = ((FC.STATE, tdim), data)
+
+            # special case of turbine positions:
+            if v in [FV.X, FV.Y]:
+                j = [FV.X, FV.Y].index(v)
+                for k, ti in enumerate(tinds):
+                    t = algo.farm.turbines[ti]
+                    if len(t.xy.shape) == 1:
+                        xy = np.zeros((algo.n_states, 2), dtype=config.dtype_double)
+                        xy[:] = t.xy[None, :]
+                        t.xy = xy
+                    t.xy[:, j] = np.where(np.isnan(data[:, k]), t.xy[:, j], data[:, k])
+
+            # special case of rotor diameter and hub height:
+            if v in [FV.D, FV.H]:
+                for k, ti in enumerate(tinds):
+                    t = algo.farm.turbines[ti]
+                    x = np.zeros(algo.n_states, dtype=config.dtype_double)
+                    if v == FV.D:
+                        x[:] = t.D
+                        t.D = x
+                    else:
+                        x[:] = t.H
+                        t.H = x
+                    x[:] = np.where(np.isnan(data[:, k]), x, data[:, k])
+
+        return idata
+
+    def set_running(
+        self,
+        algo,
+        data_stash,
+        sel=None,
+        isel=None,
+        verbosity=0,
+    ):
+        """
+        Sets this model status to running, and moves
+        all large data to stash.
+
+        The stashed data will be returned by the
+        unset_running() function after running calculations.
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The calculation algorithm
+        data_stash: dict, optional
+            Large data stash, this function adds data here, if given.
+            Key: model name. Value: dict, large model data
+        sel: dict, optional
+            The subset selection dictionary
+        isel: dict, optional
+            The index subset selection dictionary
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        TurbineModel.set_running(self, algo, data_stash, sel, isel, verbosity)
+
+        if data_stash is not None:
+            data_stash[self.name]["vdata"] = self._vdata
+        del self._vdata
+
+    def unset_running(
+        self,
+        algo,
+        data_stash,
+        sel=None,
+        isel=None,
+        verbosity=0,
+    ):
+        """
+        Sets this model status to not running, recovering large data
+        from stash
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The calculation algorithm
+        data_stash: dict, optional
+            Reconstruct model data from this stash, if given.
+            Key: model name. Value: dict, large model data
+        sel: dict, optional
+            The subset selection dictionary
+        isel: dict, optional
+            The index subset selection dictionary
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        TurbineModel.unset_running(self, algo, data_stash, sel, isel, verbosity)
+
+        if data_stash is not None:
+            self._vdata = data_stash[self.name].pop("vdata")
+
+    def calculate(self, algo, mdata, fdata, st_sel):
+        """
+        The main model calculation.
+
+        This function is executed on a single chunk of data,
+        all computations should be based on numpy arrays.
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The calculation algorithm
+        mdata: foxes.core.MData
+            The model data
+        fdata: foxes.core.FData
+            The farm data
+        st_sel: slice or numpy.ndarray of bool
+            The state-turbine selection,
+            for shape: (n_states, n_turbines)
+
+        Returns
+        -------
+        results: dict
+            The resulting data, keys: output variable str.
+            Values: numpy.ndarray with shape (n_states, n_turbines)
+
+        """
+        self.ensure_output_vars(algo, fdata)
+
+        i0 = mdata.states_i0(counter=True)
+        if not self.once or i0 not in self._once_done:
+            bsel = np.zeros((fdata.n_states, fdata.n_turbines), dtype=bool)
+            bsel[st_sel] = True
+
+            # the farm data may be in downwind order:
+            ssel = np.arange(fdata.n_states)[:, None]
+            order_inv = None
+            if FV.ORDER_INV in fdata:
+                order_inv = fdata[FV.ORDER_INV].astype(config.dtype_int)
+
+            for i, v in enumerate(self.vars):
+                tinds = self._get_turbines(algo, i)
+                data = mdata[self.var(v)]
+                out = fdata[v]
+                tsel = tinds[None, :] if order_inv is None else order_inv[:, tinds]
+
+                if not np.isnan(self.fill) and len(tinds) < fdata.n_turbines:
+                    osel = bsel.copy()
+                    osel[ssel, tsel] = False
+                    out[osel] = self.fill
+                if not len(tinds):
+                    continue
+
+                hsel = bsel[ssel, tsel] & ~np.isnan(data)
+                out[ssel, tsel] = np.where(hsel, data, out[ssel, tsel])
+
+            self._once_done.add(i0)
+
+        return {v: fdata[v] for v in self.vars}
@@ -0,0 +1,259 @@
+import pickle
+import cloudpickle
+import numpy as np
+import pandas as pd
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from iwopy.core import SingleObjOptResults
+from iwopy.interfaces.pymoo import Optimizer_pymoo
+
+from foxes.core import Engine, has_engine
+import foxes.constants as FC
+
+
+__worker_data__ = {}
+
+
+def _init_worker(problem_data, optimizer_data):
+    """Helper function that stores the problem and optimizer data of a worker"""
+    __worker_data__["problem"] = problem_data
+    __worker_data__["optimizer"] = optimizer_data
+
+
+def _solve(problem_data, optimizer_data, sel_states):
+    """Helper function that solves the problem restricted to a chunk of states"""
+    problem = pickle.loads(problem_data)
+    optimizer = pickle.loads(optimizer_data)
+    inds = problem.restrict_states(sel_states)
+
+    def _run():
+        """Helper function that runs the optimization"""
+        problem.initialize(verbosity=0)
+        if isinstance(optimizer, dict):
+            solver = Optimizer_pymoo(problem, **optimizer)
+        else:
+            solver = optimizer(problem)
+        solver.initialize(verbosity=0)
+        results = solver.solve(verbosity=0)
+        solver.finalize(results, verbosity=0)
+        problem.finalize()
+        return results
+
+    if has_engine():
+        results = _run()
+    else:
+        with Engine.new("single", verbosity=0):
+            results = _run()
+
+    return (
+        inds,
+        bool(results.success),
+        results.vars_int,
+        results.vars_float,
+        np.atleast_1d(results.objs)[0],
+    )
+
+
+def _solve_chunk(sel_states):
+    """Helper function that solves a chunk of states within a worker"""
+    return _solve(__worker_data__["problem"], __worker_data__["optimizer"], sel_states)
+
+
+class StateDecomposition:
+    """
+    Solves problems with independent states by
+    decomposition into sub-problems for chunks of
+    states, which are solved in parallel worker
+    processes.
+
+    This applies to problems with only state and
+    state-turbine variables and a single objective
+    that is a (weighted) sum over states, e.g.
+    `MaxFarmPower`. The optimal variables of the
+    chunks are reassembled into the variables of
+    the full problem.
+
+    Attributes
+    ----------
+    chunk_size: int
+        The number of states per sub-problem
+    n_procs: int
+        The number of worker processes
+    mp_context: str
+        The multiprocessing start method, or None
+        for the default
+    chunk_info: pandas.DataFrame
+        Summary of the sub-problem results of the
+        last solve, or None
+
+    :group: opt.core
+
+    """
+
+    SEP_RULES_STATES = ["weights", "sum", "mean_no_weights"]
+    SEP_RULES_TURBINES = ["sum", "mean_no_weights"]
+
+    def __init__(self, chunk_size=1, n_procs=None, mp_context=None):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        chunk_size: int
+            The number of states per sub-problem
+        n_procs: int, optional
+            The number of worker processes, or None
+            for the number of cpus. For 1, the
+            sub-problems are solved in the calling process
+        mp_context: str, optional
+            The multiprocessing start method, e.g.
+            fork or spawn
+
+        """
+        self.chunk_size = chunk_size
+        self.n_procs = n_procs if n_procs is not None else mp.cpu_count()
+        self.mp_context = mp_context
+        self.chunk_info = None
+
+    def check_problem(self, problem):
+        """
+        Checks if the problem decomposes into
+        independent states
+
+        Parameters
+        ----------
+        problem: foxes_opt.problems.OptFarmVars
+            The problem, not initialized
+
+        """
+        if not hasattr(problem, "restrict_states"):
+            raise TypeError(
+                f"{type(self).__name__}: Problem '{problem.name}' of type '{type(problem).__name__}' does not support states restriction"
+            )
+        if problem.initialized:
+            raise ValueError(
+                f"{type(self).__name__}: Expecting problem '{problem.name}' before initialization"
+            )
+        if len(problem.cons.functions):
+            raise ValueError(
+                f"{type(self).__name__}: Problem '{problem.name}' has constraints, cannot decompose states"
+            )
+        if len(problem.objs.functions) != 1:
+            raise ValueError(
+                f"{type(self).__name__}: Expecting a single objective for problem '{problem.name}', got {len(problem.objs.functions)}"
+            )
+
+        f = problem.objs.functions[0]
+        rules = getattr(f, "rules", None)
+        if (
+            rules is None
+            or rules[FC.STATE] not in self.SEP_RULES_STATES
+            or rules[FC.TURBINE] not in self.SEP_RULES_TURBINES
+        ):
+            raise ValueError(
+                f"{type(self).__name__}: Objective '{f.name}' of problem '{problem.name}' is not a sum over states and turbines, cannot decompose states"
+            )
+
+    def get_chunks(self, n_states):
+        """
+        Splits the states into chunks
+
+        Parameters
+        ----------
+        n_states: int
+            The number of states
+
+        Returns
+        -------
+        chunks: list of numpy.ndarray
+            The state indices of the chunks
+
+        """
+        n_chunks = max(int(np.ceil(n_states / max(self.chunk_size, 1))), 1)
+        return np.array_split(np.arange(n_states), n_chunks)
+
+    def solve(self, problem, optimizer, verbosity=1):
+        """
+        Solves the sub-problems and assembles
+        the results of the full problem
+
+        Parameters
+        ----------
+        problem: foxes_opt.problems.OptFarmVars
+            The problem, not initialized. It will be
+            initialized for the evaluation of the
+            assembled variables
+        optimizer: dict or callable
+            The parameters for `Optimizer_pymoo`, or a
+            function that creates the optimizer for a
+            sub-problem, `f(problem) -> optimizer`
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        Returns
+        -------
+        results: iwopy.SingleObjOptResults
+            The optimization results of the full problem
+
+        """
+        self.check_problem(problem)
+
+        if not problem.algo.initialized:
+            problem.algo.initialize()
+        chunks = self.get_chunks(problem.algo.n_states)
+        if verbosity > 0:
+            print(
+                f"{type(self).__name__}: Solving {len(chunks)} sub-problems of problem '{problem.name}', n_procs = {self.n_procs}"
+            )
+
+        with problem.detached_components(["eval_pool", "history", "engine"]):
+            pdata = cloudpickle.dumps(problem)
+        odata = cloudpickle.dumps(optimizer)
+
+        results = [None] * len(chunks)
+        if self.n_procs == 1 or len(chunks) == 1:
+            for ci, sel in enumerate(chunks):
+                results[ci] = _solve(pdata, odata, sel)
+                if verbosity > 1:
+                    print(f"  Chunk {ci + 1}/{len(chunks)} done")
+        else:
+            ctx = (
+                mp.get_context(self.mp_context) if self.mp_context is not None else None
+            )
+            with ProcessPoolExecutor(
+                max_workers=min(self.n_procs, len(chunks)),
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(pdata, odata),
+            ) as pool:
+                futures = {
+                    pool.submit(_solve_chunk, sel): ci for ci, sel in enumerate(chunks)
+                }
+                for n, f in enumerate(as_completed(futures)):
+                    results[futures[f]] = f.result()
+                    if verbosity > 1:
+                        print(f"  Chunk {n + 1}/{len(chunks)} done")
+
+        vars_int = np.array(problem.initial_values_int(), dtype=np.int32)
+        vars_float = np.array(problem.initial_values_float(), dtype=np.float64)
+        for inds, __, vi, vf, __ in results:
+            vars_int[inds["int"]] = vi
+            vars_float[inds["float"]] = vf
+
+        self.chunk_info = pd.DataFrame(
+            [
+                dict(n_states=len(sel), success=r[1], objective=r[4])
+                for sel, r in zip(chunks, results)
+            ]
+        )
+        self.chunk_info.index.name = "chunk"
+
+        problem.initialize(verbosity=0)
+        res, objs, cons = problem.finalize_individual(vars_int, vars_float, verbosity)
+        success = bool(self.chunk_info["success"].all()) and bool(
+            np.all(problem.check_constraints_individual(cons, False))
+        )
+
+        return SingleObjOptResults(
+            problem, success, vars_int, vars_float, objs, cons, res
+        )
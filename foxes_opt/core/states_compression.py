@@ -0,0 +1,621 @@
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from foxes.core import WindFarm, Turbine, Engine, has_engine
+from foxes.algorithms import Downwind
+from foxes.models import ModelBook
+from foxes.input.states import StatesTable
+from foxes.config import config
+import foxes.variables as FV
+import foxes.constants as FC
+
+from .selected_states import SelectedStates
+from .problem_component import ProblemComponent
+
+
+class StatesCompression(ProblemComponent):
+    """
+    Compresses the states into a small number of
+    weighted representative states.
+
+    The ambient states at the farm centre and mean
+    hub height are grouped, either by k-means clustering
+    or by the occupied bins of histograms, and each group
+    is replaced by a single state with the summed weights
+    and the weighted mean ambient data. Wind directions
+    are averaged as unit vectors. The representative
+    states are uniform, i.e. height profiles and spatial
+    variations of the original states are not kept.
+
+    The exact method instead merges states with identical
+    data into the first of them, with the summed weights,
+    which keeps the results of weighted sums over states
+    unchanged. The states' own data is compared, i.e. all
+    state dependent data of the states model except the
+    weights. Layout optimization problems are rejected
+    by the exact method.
+
+    States of zero total weight are dropped by all methods.
+
+    Attributes
+    ----------
+    n_clusters: int
+        The number of representative states for the
+        k-means method
+    method: str
+        The grouping method: kmeans, bins, exact
+    variables: list of str
+        The ambient variables of the grouping
+    bins: dict
+        The bins for the bins method, key: variable,
+        value: number of bins or bin edges
+    max_iter: int
+        The maximal number of k-means iterations
+    seed: int
+        The random seed of the k-means initialization
+    labels: numpy.ndarray
+        The representative state of each original
+        state, or -1 for dropped states of zero
+        weight, shape: (n_states,)
+    weights: numpy.ndarray
+        The weights of the original states,
+        shape: (n_states,)
+    report: pandas.DataFrame
+        The objectives of the reference individual
+        on the full and the compressed states, or None
+    full_states: foxes.core.States
+        The original states of the problem, or None
+    full_n_states: int
+        The number of original states, or None
+
+    :group: opt.core
+
+    """
+
+    METHODS = ["kmeans", "bins", "exact"]
+    SCALAR_PARS = {int: "n_clusters", str: "method"}
+    CHUNK_STATES = 65536
+
+    def __init__(
+        self,
+        n_clusters=100,
+        method="kmeans",
+        variables=[FV.WS, FV.WD, FV.TI, FV.RHO],
+        bins=None,
+        max_iter=100,
+        seed=None,
+    ):
+        """
+        Constructor.
+
+        Parameters
+        ----------
+        n_clusters: int
+            The number of representative states for the
+            k-means method
+        method: str
+            The grouping method: kmeans, bins, exact
+        variables: list of str
+            The ambient variables of the grouping. Variables
+            that are not provided by the states are ignored.
+            The exact method compares the states' own data
+        bins: dict, optional
+            The bins for the bins method, key: variable,
+            value: number of bins or bin edges, e.g.
+            {FV.WD: 36, FV.WS: [3, 6, 9, 12, 25]}
+        max_iter: int
+            The maximal number of k-means iterations
+        seed: int, optional
+            The random seed of the k-means initialization
+
+        """
+        if method not in self.METHODS:
+            raise ValueError(
+                f"{type(self).__name__}: Unknown method '{method}', choose: {', '.join(self.METHODS)}"
+            )
+        if method == "bins" and (not isinstance(bins, dict) or not len(bins)):
+            raise ValueError(
+                f"{type(self).__name__}: Method 'bins' requires bins dict, e.g. {{'{FV.WD}': 36, '{FV.WS}': [3, 6, 9, 12, 25]}}, got {bins}"
+            )
+
+        self.n_clusters = n_clusters
+        self.method = method
+        self.variables = list(variables)
+        self.bins = bins
+        self.max_iter = max_iter
+        self.seed = seed
+        self.labels = None
+        self.weights = None
+        self.report = None
+        self.full_states = None
+        self.full_n_states = None
+        self._index = None
+
+    @classmethod
+    def get_ambient_data(cls, algo, variables, all_turbines=False):
+        """
+        Calculates ambient state data at the farm
+        centre and mean hub height
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The algorithm
+        variables: list of str
+            The variables, e.g. FV.WS, FV.WD, FV.WEIGHT
+        all_turbines: bool
+            Calculate the data at all turbine rotor centres
+            instead of the farm centre
+
+        Returns
+        -------
+        data: dict
+            The data, key: variable, value: numpy.ndarray
+            of shape (n_states,), or (n_states, n_turbines)
+            for all turbines
+
+        """
+        if not algo.initialized:
+            algo.initialize()
+        if all_turbines:
+            xy = algo.farm.xy_array
+            H = algo.farm.get_hub_heights(algo)
+        else:
+            xy = np.mean(algo.farm.xy_array, axis=0)[None]
+            H = np.mean(algo.farm.get_hub_heights(algo))[None]
+        algo.finalize()
+
+        farm = WindFarm()
+        for ti in range(len(xy)):
+            farm.add_turbine(
+                Turbine(xy=xy[ti], H=H[ti], turbine_models=["null_type"]),
+                verbosity=0,
+            )
+        aalgo = Downwind(
+            farm, algo.states, wake_models=[], mbook=ModelBook(), verbosity=0
+        )
+        avars = [FV.AMB_REWS if v == FV.WS else FV.var2amb.get(v, v) for v in variables]
+        if has_engine():
+            results = aalgo.calc_farm(ambient=True, outputs=avars)
+        else:
+            with Engine.new("single", verbosity=0):
+                results = aalgo.calc_farm(ambient=True, outputs=avars)
+        algo.initialize()
+
+        out = {}
+        for v, a in zip(variables, avars):
+            d = results[a].to_numpy()
+            out[v] = d[:, 0] if d.ndim > 1 and not all_turbines else d
+        return out
+
+    def _features(self, adata, weights):
+        """
+        Helper function that creates the normalized
+        clustering features
+        """
+        feats = []
+        wsum = max(np.sum(weights), 1e-300)
+        for v, x in adata.items():
+            if v == FV.WD:
+                r = np.deg2rad(x)
+                feats += [np.cos(r), np.sin(r)]
+            else:
+                mean = np.sum(weights * x) / wsum
+                std = np.sqrt(np.sum(weights * (x - mean) ** 2) / wsum)
+                feats.append((x - mean) / std if std > 0 else x - mean)
+        return np.stack(feats, axis=1)
+
+    def _assign(self, X, C):
+        """
+        Helper function that assigns the states
+        to the nearest centres, chunk-wise
+        """
+        labels = np.zeros(len(X), dtype=config.dtype_int)
+        c2 = np.sum(C**2, axis=1)
+        for i0 in range(0, len(X), self.CHUNK_STATES):
+            x = X[i0 : i0 + self.CHUNK_STATES]
+            d2 = c2[None, :] - 2 * x @ C.T
+            labels[i0 : i0 + self.CHUNK_STATES] = np.argmin(d2, axis=1)
+        return labels
+
+    def _kmeans(self, X, weights):
+        """
+        Helper function for weighted k-means clustering,
+        with k-means++ initialization
+        """
+        n_states, n_feats = X.shape
+        __, first, inverse = np.unique(
+            X, axis=0, return_index=True, return_inverse=True
+        )
+        if len(first) <= self.n_clusters:
+            return inverse.reshape(-1).astype(config.dtype_int)
+
+        rng = np.random.default_rng(self.seed)
+        w = weights if np.sum(weights) > 0 else np.ones(n_states)
+        C = [X[rng.choice(n_states, p=w / np.sum(w))]]
+        d2 = np.sum((X - C[0]) ** 2, axis=1)
+        while len(C) < self.n_clusters:
+            q = w * d2
+            if np.sum(q) <= 0:
+                break
+            C.append(X[rng.choice(n_states, p=q / np.sum(q))])
+            d2 = np.minimum(d2, np.sum((X - C[-1]) ** 2, axis=1))
+        C = np.array(C)
+        n_c = len(C)
+
+        labels = self._assign(X, C)
+        for __ in range(self.max_iter):
+            wc = np.bincount(labels, weights=w, minlength=n_c)
+            sel = wc > 0
+            for j in range(n_feats):
+                s = np.bincount(labels, weights=w * X[:, j], minlength=n_c)
+                C[sel, j] = s[sel] / wc[sel]
+            new = self._assign(X, C)
+            if np.all(new == labels):
+                break
+            labels = new
+
+        return labels
+
+    @classmethod
+    def get_state_bins(cls, adata, bins, name=None):
+        """
+        Maps states to the occupied bins of
+        ambient variables
+
+        Parameters
+        ----------
+        adata: dict
+            The ambient data, key: variable, value:
+            numpy.ndarray of shape (n_states,)
+        bins: dict
+            The bins, key: variable, value: number of
+            bins or bin edges. Numbers of wind direction
+            bins cover the full circle, otherwise the
+            data range
+        name: str, optional
+            The name of the caller, for error messages
+
+        Returns
+        -------
+        state_bins: numpy.ndarray
+            The index of the occupied bin of each
+            state, shape: (n_states,)
+        n_bins: int
+            The number of occupied bins
+
+        """
+        if name is None:
+            name = cls.__name__
+        binds = []
+        for v, edges in bins.items():
+            x = adata[v]
+            if v in [FV.WD, FV.AMB_WD]:
+                x = np.mod(x, 360.0)
+                if np.isscalar(edges):
+                    edges = np.linspace(0.0, 360.0, int(edges) + 1)
+            elif np.isscalar(edges):
+                edges = np.linspace(np.min(x), np.max(x), int(edges) + 1)
+            edges = np.asarray(edges, dtype=config.dtype_double)
+
+            i = np.searchsorted(edges, x, side="right") - 1
+            i[x == edges[-1]] = len(edges) - 2
+            out = (i < 0) | (i >= len(edges) - 1)
+            if np.any(out):
+                raise ValueError(
+                    f"{name}: {np.sum(out)} states with '{v}' outside of bin range [{edges[0]}, {edges[-1]}]"
+                )
+            binds.append(i)
+
+        __, labels = np.unique(np.stack(binds, axis=1), axis=0, return_inverse=True)
+        labels = labels.reshape(-1).astype(config.dtype_int)
+        return labels, int(np.max(labels)) + 1
+
+    def _exact(self, algo, n_states):
+        """
+        Helper function that maps states to the groups
+        of identical state dependent data of the states
+        """
+        states = algo.states
+        wvar = getattr(states, "WEIGHT", None)
+        inds = []
+        for v, (dims, d) in algo.get_model_data(states)["data_vars"].items():
+            dims = (dims,) if isinstance(dims, str) else tuple(dims)
+            if v != wvar and FC.STATE in dims:
+                d = np.moveaxis(np.asarray(d), dims.index(FC.STATE), 0)
+                d = d.reshape(n_states, -1)
+                if not np.issubdtype(d.dtype, np.number):
+                    d = d.astype(str)
+                __, i = np.unique(d, axis=0, return_inverse=True)
+                inds.append(i.reshape(-1))
+        if not len(inds):
+            if n_states > 1:
+                raise ValueError(
+                    f"{type(self).__name__}: States '{states.name}' provide no state dependent data for method 'exact'"
+                )
+            return np.zeros(n_states, dtype=config.dtype_int)
+
+        __, labels = np.unique(np.stack(inds, axis=1), axis=0, return_inverse=True)
+        return labels.reshape(-1).astype(config.dtype_int)
+
+    def compress(self, algo, verbosity=0):
+        """
+        Creates the representative states
+
+        Parameters
+        ----------
+        algo: foxes.core.Algorithm
+            The algorithm with the original states
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        Returns
+        -------
+        states: foxes.core.States
+            The representative states
+
+        """
+        if not algo.initialized:
+            algo.initialize()
+        svars = algo.states.output_point_vars(algo)
+        self._index = algo.states.index()
+        exact = self.method == "exact"
+        if exact:
+            vrs = list(svars)
+        else:
+            vrs = [v for v in self.variables if v in svars]
+        if self.method == "bins":
+            vrs += [v for v in self.bins.keys() if v not in vrs]
+        if not len(vrs):
+            raise ValueError(
+                f"{type(self).__name__}: None of the variables {self.variables} provided by states '{algo.states.name}'"
+            )
+
+        # the representative states carry all state variables:
+        ovrs = vrs + [v for v in svars if v not in vrs]
+        adata = self.get_ambient_data(algo, ovrs + [FV.WEIGHT])
+        weights = adata.pop(FV.WEIGHT)
+        n_states = len(weights)
+        self.weights = weights
+
+        if self.method == "kmeans":
+            X = self._features({v: adata[v] for v in vrs}, weights)
+            labels = self._kmeans(X, weights)
+        elif self.method == "bins":
+            labels = self.get_state_bins(adata, self.bins)[0]
+        else:
+            labels = self._exact(algo, n_states)
+
+        n_groups = int(np.max(labels)) + 1
+        wc = np.bincount(labels, weights=weights, minlength=n_groups)
+        keep = np.where(wc > 0)[0]
+        gmap = np.full(n_groups, -1, dtype=config.dtype_int)
+        gmap[keep] = np.arange(len(keep))
+        self.labels = gmap[labels]
+
+        if exact:
+            first = np.full(n_groups, n_states, dtype=config.dtype_int)
+            np.minimum.at(first, labels, np.arange(n_states))
+            if verbosity > 0:
+                print(
+                    f"{type(self).__name__}: Merged {n_states} states into {len(keep)} distinct states of non-zero weight"
+                )
+            return SelectedStates(algo.states, first[keep], weights=wc[keep])
+
+        def _mean(x):
+            """Helper function for the weighted group means"""
+            s = np.bincount(labels, weights=weights * x, minlength=n_groups)
+            return s[keep] / wc[keep]
+
+        data = pd.DataFrame(index=pd.RangeIndex(len(keep), name="state"))
+        for v in ovrs:
+            if v == FV.WD:
+                r = np.deg2rad(adata[v])
+                data[v] = np.mod(
+                    np.rad2deg(np.arctan2(_mean(np.sin(r)), _mean(np.cos(r)))), 360.0
+                )
+            else:
+                data[v] = _mean(adata[v])
+        data[FV.WEIGHT] = wc[keep]
+
+        if verbosity > 0:
+            print(
+                f"{type(self).__name__}: Compressed {n_states} states into {len(keep)} representative states, method '{self.method}'"
+            )
+
+        return StatesTable(data, output_vars=ovrs)
+
+    def expand_results(self, results):
+        """
+        Expands results of the representative states
+        to the original states.
+
+        Each original state receives the results of its
+        representative state, and its original weight.
+        Dropped states of zero weight have weight zero
+        and nan values.
+
+        Parameters
+        ----------
+        results: xarray.Dataset
+            The results of the representative states
+
+        Returns
+        -------
+        results: xarray.Dataset
+            The results of the original states
+
+        """
+        mask = self.labels >= 0
+        out = results.isel({FC.STATE: np.where(mask, self.labels, 0)})
+        out = out.assign_coords(
+            {FC.STATE: (np.arange(len(mask)) if self._index is None else self._index)}
+        )
+
+        if not np.all(mask):
+            mask = xr.DataArray(mask, dims=(FC.STATE,))
+            for v, d in out.data_vars.items():
+                if FC.STATE in d.dims and np.issubdtype(d.dtype, np.floating):
+                    out[v] = d.where(mask)
+
+        if FV.WEIGHT in out:
+            w = out[FV.WEIGHT]
+            shp = (len(self.weights),) + (1,) * (w.ndim - 1)
+            out[FV.WEIGHT] = (
+                w.dims,
+                np.broadcast_to(self.weights.reshape(shp), w.shape).copy(),
+            )
+
+        return out
+
+    def set_report(self, names, full, compressed):
+        """
+        Sets the report of the compression error
+
+        Parameters
+        ----------
+        names: list of str
+            The objective component names
+        full: numpy.ndarray
+            The objective values of the reference
+            individual on the full states
+        compressed: numpy.ndarray
+            The objective values of the reference
+            individual on the representative states
+
+        Returns
+        -------
+        report: pandas.DataFrame
+            The report of the compression error
+
+        """
+        full = np.asarray(full, dtype=np.float64)
+        compressed = np.asarray(compressed, dtype=np.float64)
+        err = np.abs(compressed - full)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rel = np.where(full != 0, err / np.abs(full), np.nan)
+
+        self.report = pd.DataFrame(
+            dict(full=full, compressed=compressed, abs_error=err, rel_error=rel),
+            index=pd.Index(names, name="objective"),
+        )
+        return self.report
+
+    def on_pre_initialize(self, problem, verbosity=0):
+        """
+        Called before the algorithm of the problem is
+        initialized, may replace the algorithm or its states
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        if self.full_states is not None:
+            return
+        if problem.frozen_background is not None:
+            raise ValueError(
+                f"Problem '{problem.name}': Cannot combine states_compression and frozen_background"
+            )
+        if self.method == "exact" and problem.MOVES_TURBINES:
+            raise ValueError(
+                f"Problem '{problem.name}': Cannot combine states_compression method 'exact' and layout optimization"
+            )
+        if problem.points is not None and np.ndim(problem.points) > 2:
+            raise ValueError(
+                f"Problem '{problem.name}': Cannot combine states_compression and state dependent points"
+            )
+
+        self.full_states = problem.algo.states
+        states = self.compress(problem.algo, verbosity)
+        self.full_n_states = len(self.labels)
+        self.report = None
+        problem.reset_states(states)
+
+    def on_initialize(self, problem, verbosity=0):
+        """
+        Called at the end of the problem initialization
+
+        Evaluates the initial individual on the full and
+        the representative states, for the report.
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        if self.report is not None:
+            return
+
+        vars_int = np.zeros(problem.n_vars_int, dtype=config.dtype_int)
+        vars_float = np.zeros(problem.n_vars_float, dtype=config.dtype_double)
+        if problem.n_vars_int:
+            vars_int[:] = problem.initial_values_int()
+        if problem.n_vars_float:
+            vars_float[:] = problem.initial_values_float()
+        objs = problem.evaluate_individual(vars_int, vars_float, ret_prob_res=True)[0]
+
+        prev = problem.set_eval_states(self.full_states, self.full_n_states)
+        try:
+            objs_full = problem.evaluate_individual(
+                vars_int, vars_float, ret_prob_res=True
+            )[0]
+        finally:
+            problem.set_eval_states(*prev)
+
+        self.set_report(problem.objs.component_names, objs_full, objs)
+
+    def init_info(self, problem):
+        """
+        The information that is printed at the
+        problem initialization
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+
+        Returns
+        -------
+        info: str
+            The information, or None
+
+        """
+        n_states = int(np.max(self.labels)) + 1
+        return f"  States      : {self.full_n_states} compressed into {n_states} states\n{self.report}"
+
+    def on_finalize_individual(self, problem, results, verbosity=0):
+        """
+        Called after the evaluation of the champion
+
+        Expands the results to the original states, and
+        switches the algorithm to the original states.
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        results: Any
+            The problem results of the champion
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        Returns
+        -------
+        results: Any
+            The possibly modified problem results
+
+        """
+        if isinstance(results, tuple):
+            results = tuple(self.expand_results(r) for r in results)
+        else:
+            results = self.expand_results(results)
+        problem.reset_states(self.full_states, self.full_n_states)
+        return results
@@ -4,7 +4,7 @@ from foxes.input.yaml import read_dict as foxes_read_dict
 from foxes.input.yaml import run_outputs as foxes_run_output
 from foxes.utils import Dict
 
-from foxes_opt.core import FarmOptProblem, FarmObjective, FarmConstraint
+from foxes_opt.core import FarmOptProblem, FarmObjective, FarmConstraint, Checkpointer
 
 
 def read_dict(idict, *args, verbosity=None, **kwargs):
@@ -144,7 +144,9 @@ def run_outputs(
     return out
 
 
-def run_dict(idict, *args, extra_sig={}, nofig=False, verbosity=None, **kwargs):
+def run_dict(
+    idict, *args, extra_sig={}, nofig=False, resume=False, verbosity=None, **kwargs
+):
     """
     Run from a dictionary type parameter file.
 
@@ -159,6 +161,9 @@ def run_dict(idict, *args, extra_sig={}, nofig=False, verbosity=None, **kwargs):
         arguments (key) with data (value)
     nofig: bool
         Do not show figures, overrules settings from idict
+    resume: bool
+        Resume from the checkpoint file, requires
+        a checkpoint entry in the optimization section
     verbosity: int, optional
         Force a verbosity level, 0 = silent, overrules
         settings from idict
@@ -180,6 +185,16 @@ def run_dict(idict, *args, extra_sig={}, nofig=False, verbosity=None, **kwargs):
         if verbosity is None or verbosity >= level:
             print(*args, **kwargs)
 
+    # read checkpoint settings:
+    checkpointer = None
+    jdict = idict.get_item("optimization")
+    if "checkpoint" in jdict:
+        checkpointer = Checkpointer(**jdict.pop_item("checkpoint"))
+    elif resume:
+        raise KeyError(
+            f"{idict.name}: Cannot resume without 'checkpoint' entry in 'optimization'"
+        )
+
     # read components:
     algo, engine, optimizer = read_dict(idict, *args, verbosity=verbosity, **kwargs)
 
@@ -192,8 +207,19 @@ def run_dict(idict, *args, extra_sig={}, nofig=False, verbosity=None, **kwargs):
     if rdict.pop_item("run", True):
         _print("Running optimizer")
         with engine:
-            opt_results = optimizer.solve(**rdict)
+            if checkpointer is None:
+                opt_results = optimizer.solve(**rdict)
+            else:
+                opt_results = checkpointer.solve(optimizer, resume=resume, **rdict)
             optimizer.finalize(opt_results)
+
+            # the problem info follows the algorithm's verbosity,
+            # unless the verbosity is forced:
+            pverb = algo.verbosity if verbosity is None else verbosity
+            pinfo = getattr(optimizer.problem, "print_info", None)
+            if pinfo is not None and pverb >= 1:
+                print()
+                pinfo()
             farm_results = opt_results.problem_results
 
             # run outputs with engine:
@@ -14,6 +14,11 @@ def foxes_opt_yaml():
     --------
     >>> foxes_opt_yaml input.yaml
 
+    Resume from the checkpoint that is defined
+    in the optimization section:
+
+    >>> foxes_opt_yaml input.yaml --resume
+
     :group: input.yaml
 
     """
@@ -60,6 +65,12 @@ def foxes_opt_yaml():
     parser.add_argument(
         "-nf", "--nofig", help="Do not show figures", action="store_true"
     )
+    parser.add_argument(
+        "-R",
+        "--resume",
+        help="Resume from the checkpoint file",
+        action="store_true",
+    )
     parser.add_argument(
         "-v",
         "--verbosity",
@@ -99,5 +110,6 @@ def foxes_opt_yaml():
         iterative=args.iterative,
         work_dir=fpath.parent,
         output_dir=args.output_dir,
+        resume=args.resume,
         verbosity=args.verbosity,
     )
@@ -1,5 +1,4 @@
 import numpy as np
-import xarray as xr
 
 from foxes_opt.core.farm_objective import FarmObjective
 from foxes import variables as FV
@@ -24,6 +23,9 @@ class FarmVarObjective(FarmObjective):
         is str: weights, mean_no_weights, sum, min, max
     scale: float
         The scaling factor
+    offset: float
+        The constant contribution of states that are
+        not evaluated, in units of the scaled values
 
     :group: opt.objectives
 
@@ -72,19 +74,9 @@ class FarmVarObjective(FarmObjective):
         self.minimize = minimize
         self.deps = deps
         self.scale = scale
+        self.offset = 0.0
         self.rules = {FC.STATE: contract_states, FC.TURBINE: contract_turbines}
-
-    def initialize(self, verbosity=0):
-        """
-        Initialize the object.
-
-        Parameters
-        ----------
-        verbosity: int
-            The verbosity level, 0 = silent
-
-        """
-        super().initialize(verbosity)
+        self._contraction = self._compile_contraction()
 
     def n_components(self):
         """
@@ -135,53 +127,98 @@ class FarmVarObjective(FarmObjective):
 
         return out
 
-    def _contract(self, data, weights):
+    def required_farm_vars(self):
+        """
+        The farm variables that are read from
+        the farm results
+
+        Returns
+        -------
+        vrs: list of str
+            The required farm variables, or None
+            for all
+
+        """
+        return [self.variable, FV.WEIGHT]
+
+    def _compile_contraction(self):
         """
-        Helper function for data contraction
+        Helper function that compiles the contraction rules
+        into numpy reductions of arrays with shape
+        (n_pop, n_states, n_turbines)
         """
-        for dim, rule in self.rules.items():
-            if rule == "min":
-                data = data.min(dim=dim)
-            elif rule == "max":
-                data = data.max(dim=dim)
-            elif rule == "sum":
-                data = data.sum(dim=dim)
-            elif rule == "mean_no_weights":
-                data = data.mean(dim=dim)
-            elif dim == FC.STATE and rule == "weights":
-                odims = data.dims
-                wdims = weights.dims
-                if wdims == (FC.STATE,):
-                    wx = "s"
-                elif wdims == (FC.POP, FC.STATE):
-                    wx = "ps"
-                elif wdims == (FC.STATE, FC.TURBINE):
-                    wx = "st"
-                elif wdims == (FC.POP, FC.STATE, FC.TURBINE):
-                    wx = "pst"
-                else:
-                    raise ValueError(
-                        f"Objective '{self.name}': Expecting weight dimensions {(FC.STATE,)}, {(FC.POP, FC.STATE)}, {(FC.STATE, FC.TURBINE)} or {(FC.POP, FC.STATE, FC.TURBINE)}, got {wdims}"
-                    )
-                if len(odims) > 1 and odims[:2] == (FC.STATE, FC.TURBINE):
-                    data = np.einsum(f"st...,{wx}->t...", data, weights)
-                    data = xr.DataArray(data, dims=odims[1:])
-                elif len(odims) > 2 and odims[:3] == (FC.POP, FC.STATE, FC.TURBINE):
-                    data = np.einsum(f"pst...,{wx}->pt...", data, weights)
-                    data = xr.DataArray(data, dims=(FC.POP,) + odims[2:])
-                else:
-                    raise NotImplementedError(
-                        f"Contraction error for '{rule}' for dim '{dim}': Incompatible data dims {odims}, shape {data.shape}, for weights of shape {weights.shape}"
-                    )
-            elif dim == FC.STATE:
-                raise ValueError(
-                    f"Objective '{self.name}': Unknown contraction for dimension '{dim}': '{rule}'. Choose: weights, mean_no_weights, sum, min, max"
-                )
-            else:
-                raise ValueError(
-                    f"Objective '{self.name}': Unknown contraction for dimension '{dim}': '{rule}'. Choose: min, max, sum, mean_no_weights"
-                )
-        return data
+        reduce = dict(min=np.min, max=np.max, sum=np.sum, mean_no_weights=np.mean)
+        rs = self.rules[FC.STATE]
+        rt = self.rules[FC.TURBINE]
+        if rs not in reduce and rs != "weights":
+            raise ValueError(
+                f"Objective '{self.name}': Unknown contraction for dimension '{FC.STATE}': '{rs}'. Choose: weights, mean_no_weights, sum, min, max"
+            )
+        if rt not in reduce:
+            raise ValueError(
+                f"Objective '{self.name}': Unknown contraction for dimension '{FC.TURBINE}': '{rt}'. Choose: min, max, sum, mean_no_weights"
+            )
+
+        # weighted sums over states and turbines reduce to a single einsum:
+        if rs == "weights":
+            out = "p" if rt == "sum" else "pt"
+            subs = {2: f"pst,ps->{out}", 3: f"pst,pst->{out}"}
+
+            def rdcs(data, weights):
+                return np.einsum(subs[weights.ndim], data, weights)
+
+            if rt == "sum":
+                return rdcs
+        else:
+
+            def rdcs(data, weights):
+                return reduce[rs](data, axis=1)
+
+        rdct = reduce[rt]
+
+        def contract(data, weights):
+            return rdct(rdcs(data, weights), axis=1)
+
+        return contract
+
+    def contract(self, ctx):
+        """
+        Contracts the farm results to the objective values.
+
+        The contraction runs in the main process, on the
+        farm results of all states of the evaluated
+        individuals, after the farm calculation. The
+        memory of population evaluations therefore scales
+        with n_pop * n_states.
+
+        Parameters
+        ----------
+        ctx: foxes_opt.core.ResultsContext
+            The results context
+
+        Returns
+        -------
+        values: numpy.ndarray
+            The contracted values, including scale and
+            offset, shape: (n_pop,)
+
+        """
+        sel = None
+        if self.n_sel_turbines < self.farm.n_turbines:
+            sel = tuple(self.sel_turbines)
+
+        def _calc(ctx):
+            """Helper function for the shared contraction"""
+            data = ctx.get(self.variable)
+            weights = ctx.weights
+            if sel is not None:
+                data = data[:, :, sel]
+                if weights.ndim == 3:
+                    weights = weights[:, :, sel]
+            return self._contraction(data, weights)
+
+        key = (self.variable, self.rules[FC.STATE], self.rules[FC.TURBINE], sel)
+        return ctx.reduce(key, _calc) / self.scale + self.offset
 
     def calc_individual(self, vars_int, vars_float, problem_results, components=None):
         """
@@ -206,12 +243,7 @@ class FarmVarObjective(FarmObjective):
             The component values, shape: (n_sel_components,)
 
         """
-        data = problem_results[self.variable]
-        weights = problem_results[FV.WEIGHT]
-        if self.n_sel_turbines < self.farm.n_turbines:
-            data = data[:, self.sel_turbines]
-        data = self._contract(data, weights) / self.scale
-
+        data = self.contract(self.problem.results_context(problem_results))[0]
         return np.array([data], dtype=np.float64)
 
     def calc_population(self, vars_int, vars_float, problem_results, components=None):
@@ -236,34 +268,8 @@ class FarmVarObjective(FarmObjective):
             The component values, shape: (n_pop, n_sel_components)
 
         """
-        n_pop = problem_results["n_pop"].values
-        n_states = problem_results["n_org_states"].values
-        n_turbines = problem_results.sizes[FC.TURBINE]
-
-        data = (
-            problem_results[self.variable]
-            .to_numpy()
-            .reshape(n_pop, n_states, n_turbines)
-        )
-        data = xr.DataArray(data, dims=(FC.POP, FC.STATE, FC.TURBINE))
-
-        weights = problem_results[FV.WEIGHT]
-        if weights.dims == (FC.STATE,):
-            weights = problem_results[FV.WEIGHT].to_numpy().reshape(n_pop, n_states)
-            wdims = (FC.POP, FC.STATE)
-        elif weights.dims == (FC.STATE, FC.TURBINE):
-            weights = (
-                problem_results[FV.WEIGHT]
-                .to_numpy()
-                .reshape(n_pop, n_states, n_turbines)
-            )
-            wdims = (FC.POP, FC.STATE, FC.TURBINE)
-        weights = xr.DataArray(weights, dims=wdims)
-
-        if self.n_sel_turbines < self.farm.n_turbines:
-            data = data[:, self.sel_turbines]
-
-        return self._contract(data / self.scale, weights).to_numpy()[:, None]
+        ctx = self.problem.results_context(problem_results)
+        return self.contract(ctx)[:, None]
 
     def finalize_individual(self, vars_int, vars_float, problem_results, verbosity=1):
         """
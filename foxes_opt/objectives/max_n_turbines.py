@@ -68,6 +68,20 @@ class MaxNTurbines(FarmObjective):
         """
         return [True]
 
+    def required_farm_vars(self):
+        """
+        The farm variables that are read from
+        the farm results
+
+        Returns
+        -------
+        vrs: list of str
+            The required farm variables, or None
+            for all
+
+        """
+        return [FC.VALID] if self.check_valid else []
+
     def calc_individual(self, vars_int, vars_float, problem_results, components=None):
         """
         Calculate values for a single individual of the
@@ -92,7 +106,8 @@ class MaxNTurbines(FarmObjective):
 
         """
         if FC.VALID in problem_results and self.check_valid:
-            vld = np.sum(problem_results[FC.VALID].to_numpy(), axis=1)
+            ctx = self.problem.results_context(problem_results)
+            vld = np.sum(ctx.get(FC.VALID)[0], axis=1)
             if np.min(vld) != np.max(vld):
                 raise ValueError(
                     f"Objective '{self.name}': Number of valid turbines is state dependend, counting impossible"
@@ -123,15 +138,10 @@ class MaxNTurbines(FarmObjective):
             The component values, shape: (n_pop, n_sel_components)
 
         """
-        n_pop = problem_results["n_pop"].to_numpy()
+        ctx = self.problem.results_context(problem_results)
+        n_pop = ctx.n_pop
         if self.check_valid:
-            n_states = problem_results["n_org_states"].to_numpy()
-            n_turbines = self.farm.n_turbines
-            vld = (
-                problem_results[FC.VALID]
-                .to_numpy()
-                .reshape(n_pop, n_states, n_turbines)
-            )
+            vld = ctx.get(FC.VALID)
             vld = np.sum(vld, axis=2)
             if np.any(np.min(vld, axis=1) != np.max(vld, axis=1)):
                 raise ValueError(
@@ -2,3 +2,5 @@ from .opt_output import OptOutput as OptOutput
 
 from .results_writer import SingleObjResultsWriter as SingleObjResultsWriter
 from .results_writer import MultiObjResultsWriter as MultiObjResultsWriter
+from .history import HistoryWriter as HistoryWriter
+from .history import HistoryReader as HistoryReader
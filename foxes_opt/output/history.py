@@ -0,0 +1,621 @@
+import numpy as np
+import pandas as pd
+from time import perf_counter
+from xarray import open_dataset
+from netCDF4 import Dataset as NCDataset
+
+from foxes_opt.core.problem_component import ProblemComponent
+
+from .opt_output import OptOutput
+
+
+class HistoryWriter(OptOutput, ProblemComponent):
+    """
+    Streams the evaluated populations of an optimization
+    run into an append-only NetCDF file.
+
+    Each population evaluation is one generation. Single
+    individual evaluations are buffered and written together
+    as one generation, by the next population evaluation, the
+    finalization or when the buffer reaches the chunk size.
+    The individuals of all generations are appended along
+    the unlimited dimension `eval`, the generation data
+    along the unlimited dimension `generation`. The phase
+    timings of each generation are the differences of the
+    accumulated timings since the previous generation, for
+    buffered individuals until the last of them.
+
+    Attributes
+    ----------
+    fpath: pathlib.Path
+        The path of the history file
+    chunk_size: int
+        The chunk size along the eval dimension
+    sync_every: int
+        Flush to disk after this number of generations
+    append_mode: bool
+        Continue an existing history file when opening
+
+    :group: output
+
+    """
+
+    SCALAR_PARS = {str: "fname"}
+
+    def __init__(self, fname, chunk_size=1024, sync_every=1, append=False, **kwargs):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        fname: str
+            Name of the history file
+        chunk_size: int
+            The chunk size along the eval dimension
+        sync_every: int
+            Flush to disk after this number of generations
+        append: bool
+            Continue an existing history file when opening
+        kwargs: dict, optional
+            Additional parameters for the base class
+
+        """
+        super().__init__(**kwargs)
+        self.fpath = self.get_fpath(fname)
+        self.chunk_size = chunk_size
+        self.sync_every = sync_every
+        self.append_mode = append
+
+        self._nc = None
+        self._n_evals = 0
+        self._n_gens = 0
+        self._t0 = None
+        self._timings = {}
+        self._buffer = []
+        self._buffer_timings = None
+
+    @property
+    def is_open(self):
+        """
+        Flag for an open history file
+
+        Returns
+        -------
+        bool :
+            True if the file is open for writing
+
+        """
+        return self._nc is not None
+
+    @property
+    def n_generations(self):
+        """
+        The number of written generations
+
+        Returns
+        -------
+        int :
+            The number of written generations
+
+        """
+        return self._n_gens
+
+    @property
+    def n_buffered(self):
+        """
+        The number of buffered individuals
+
+        Returns
+        -------
+        int :
+            The number of buffered individuals
+
+        """
+        return len(self._buffer)
+
+    def mark(self, timings=None):
+        """
+        Marks the start of the next generation
+
+        Parameters
+        ----------
+        timings: dict, optional
+            The accumulated phase timings, key: phase name,
+            value: dict with entry time
+
+        """
+        self._t0 = perf_counter()
+        if timings is None:
+            self._timings = {}
+        else:
+            self._timings = {p: d["time"] for p, d in timings.items()}
+
+    def _add_coord(self, name, values):
+        """Helper function for adding a string coordinate"""
+        self._nc.createDimension(name, len(values))
+        v = self._nc.createVariable(name, str, (name,))
+        for i, s in enumerate(values):
+            v[i] = str(s)
+
+    def _add_evar(self, name, dtype, cdim=None):
+        """Helper function for adding a variable along the eval dimension"""
+        dims = ("eval",) if cdim is None else ("eval", cdim)
+        chunks = [self.chunk_size] + [len(self._nc.dimensions[d]) for d in dims[1:]]
+        self._nc.createVariable(name, dtype, dims, chunksizes=chunks)
+
+    def open(self, problem, verbosity=1):
+        """
+        Opens the history file for writing
+
+        Parameters
+        ----------
+        problem: foxes_opt.FarmOptProblem
+            The optimization problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        if self.is_open:
+            self.close()
+
+        if self.append_mode and self.fpath.is_file():
+            self._nc = NCDataset(self.fpath, "a")
+            self._n_evals = len(self._nc.dimensions["eval"])
+            self._n_gens = len(self._nc.dimensions["generation"])
+            if verbosity > 0:
+                print(
+                    f"{type(self).__name__}: Appending to {self.fpath}, generations = {self._n_gens}"
+                )
+        else:
+            self._nc = NCDataset(self.fpath, "w")
+            self._n_evals = 0
+            self._n_gens = 0
+            self._buffer = []
+            self._nc.problem = problem.name
+            self._nc.createDimension("eval", None)
+            self._nc.createDimension("generation", None)
+
+            vnames = {
+                "vars_int": ("variables_int", problem.var_names_int(), np.int64),
+                "vars_float": (
+                    "variables_float",
+                    problem.var_names_float(),
+                    np.float64,
+                ),
+                "objs": ("objectives", problem.objs.component_names, np.float64),
+                "cons": ("constraints", problem.cons.component_names, np.float64),
+            }
+            for v, (c, names, dtype) in vnames.items():
+                if len(names):
+                    self._add_coord(c, names)
+                    self._add_evar(v, dtype, c)
+            self._add_evar("generation_index", np.int32)
+            self._add_evar("individual", np.int32)
+
+            for v, dtype in [
+                ("gen_offset", np.int64),
+                ("gen_size", np.int32),
+                ("gen_time", np.float64),
+            ]:
+                self._nc.createVariable(v, dtype, ("generation",))
+
+            if verbosity > 0:
+                print(f"{type(self).__name__}: Writing history to {self.fpath}")
+
+        if self._t0 is None:
+            self.mark()
+
+    def append(self, vars_int, vars_float, objs, cons, timings=None):
+        """
+        Appends a generation
+
+        Parameters
+        ----------
+        vars_int: numpy.ndarray
+            The integer variable values, shape: (n_pop, n_vars_int)
+        vars_float: numpy.ndarray
+            The float variable values, shape: (n_pop, n_vars_float)
+        objs: numpy.ndarray
+            The objective function values, shape: (n_pop, n_objs)
+        cons: numpy.ndarray
+            The constraint values, shape: (n_pop, n_cons)
+        timings: dict, optional
+            The accumulated phase timings, key: phase name,
+            value: dict with entry time
+
+        """
+        if not self.is_open:
+            raise ValueError(f"{type(self).__name__}: History file not open")
+
+        n_pop = len(vars_float)
+        i0 = self._n_evals
+        i1 = i0 + n_pop
+        g = self._n_gens
+        s = np.s_[i0:i1]
+
+        for v, d in [
+            ("vars_int", vars_int),
+            ("vars_float", vars_float),
+            ("objs", objs),
+            ("cons", cons),
+        ]:
+            if v in self._nc.variables:
+                self._nc.variables[v][s] = d
+        self._nc.variables["generation_index"][s] = g
+        self._nc.variables["individual"][s] = np.arange(n_pop)
+
+        self._nc.variables["gen_offset"][g] = i0
+        self._nc.variables["gen_size"][g] = n_pop
+        self._nc.variables["gen_time"][g] = perf_counter() - self._t0
+
+        if timings is not None:
+            for p, d in timings.items():
+                v = f"time_{p}"
+                if v not in self._nc.variables:
+                    self._nc.createVariable(v, np.float64, ("generation",))
+                    self._nc.variables[v][:g] = 0.0
+                self._nc.variables[v][g] = d["time"] - self._timings.get(p, 0.0)
+        self.mark(timings)
+
+        self._n_evals = i1
+        self._n_gens += 1
+        if self._n_gens % self.sync_every == 0:
+            self._nc.sync()
+
+    def buffer(self, vars_int, vars_float, objs, cons, timings=None):
+        """
+        Buffers a single individual for the next flush
+
+        Parameters
+        ----------
+        vars_int: numpy.ndarray
+            The integer variable values, shape: (n_vars_int,)
+        vars_float: numpy.ndarray
+            The float variable values, shape: (n_vars_float,)
+        objs: numpy.ndarray
+            The objective function values, shape: (n_objs,)
+        cons: numpy.ndarray
+            The constraint values, shape: (n_cons,)
+        timings: dict, optional
+            The accumulated phase timings after the
+            evaluation, key: phase name, value: dict
+            with entry time
+
+        """
+        if timings is not None:
+            self._buffer_timings = {p: dict(d) for p, d in timings.items()}
+        self._buffer.append(
+            (
+                np.array(vars_int),
+                np.array(vars_float),
+                np.array(objs),
+                np.array(cons),
+            )
+        )
+
+    def flush(self, timings=None):
+        """
+        Appends the buffered individuals as one generation
+
+        Parameters
+        ----------
+        timings: dict, optional
+            The accumulated phase timings, key: phase name,
+            value: dict with entry time. Defaults to the
+            timings of the last buffered individual
+
+        """
+        if len(self._buffer):
+            if timings is None:
+                timings = self._buffer_timings
+            data = [np.stack(d, axis=0) for d in zip(*self._buffer)]
+            self._buffer = []
+            self._buffer_timings = None
+            self.append(*data, timings)
+
+    def close(self):
+        """
+        Closes the history file
+        """
+        if self._nc is not None:
+            self._nc.close()
+            self._nc = None
+
+    def _flush_problem(self, problem):
+        """Helper function that flushes the buffer of a problem"""
+        if self.n_buffered:
+            if not self.is_open:
+                self.open(problem, verbosity=0)
+            self.flush()
+
+    def on_initialize(self, problem, verbosity=0):
+        """
+        Called at the end of the problem initialization
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        self.close()
+        self.mark(problem.timer.phases)
+
+    def init_info(self, problem):
+        """
+        The information that is printed at the
+        problem initialization
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+
+        Returns
+        -------
+        info: str
+            The information, or None
+
+        """
+        return f"  History     : {self.fpath}"
+
+    def on_evaluate_individual(self, problem, vars_int, vars_float, objs, cons):
+        """
+        Called after the evaluation of an individual
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        vars_int: numpy.ndarray
+            The integer variable values, shape: (n_vars_int,)
+        vars_float: numpy.ndarray
+            The float variable values, shape: (n_vars_float,)
+        objs: numpy.ndarray
+            The objective function values, shape: (n_objectives,)
+        cons: numpy.ndarray
+            The constraint values, shape: (n_constraints,)
+
+        """
+        self.buffer(vars_int, vars_float, objs, cons, problem.timer.phases)
+        if self.n_buffered >= self.chunk_size:
+            self._flush_problem(problem)
+
+    def on_evaluate_population(self, problem, vars_int, vars_float, objs, cons):
+        """
+        Called after the evaluation of a population
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        vars_int: numpy.ndarray
+            The integer variable values, shape: (n_pop, n_vars_int)
+        vars_float: numpy.ndarray
+            The float variable values, shape: (n_pop, n_vars_float)
+        objs: numpy.ndarray
+            The objective function values, shape: (n_pop, n_objectives)
+        cons: numpy.ndarray
+            The constraint values, shape: (n_pop, n_constraints)
+
+        """
+        self._flush_problem(problem)
+        if not self.is_open:
+            self.open(problem, verbosity=0)
+        self.append(vars_int, vars_float, objs, cons, problem.timer.phases)
+
+    def on_finalize_individual(self, problem, results, verbosity=0):
+        """
+        Called after the evaluation of the champion
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        results: Any
+            The problem results of the champion
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        Returns
+        -------
+        results: Any
+            The possibly modified problem results
+
+        """
+        self._flush_problem(problem)
+        return results
+
+    def on_finalize_population(self, problem, verbosity=0):
+        """
+        Called after the evaluation of the final population
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        self._flush_problem(problem)
+
+    def on_finalize(self, problem, verbosity=0):
+        """
+        Called at the problem finalization, and when
+        leaving the problem context. Releases resources
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        verbosity: int
+            The verbosity level, 0 = silent
+
+        """
+        self._flush_problem(problem)
+        self.close()
+
+    def get_state(self, problem):
+        """
+        Returns the evaluation state of the component,
+        for checkpointing. Flushes the buffer
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+
+        Returns
+        -------
+        state: Any
+            The state, or None
+
+        """
+        self._flush_problem(problem)
+        return None
+
+    def set_state(self, problem, state):
+        """
+        Restores the evaluation state of the component,
+        for resuming from a checkpoint. The history file
+        is continued by the next generation
+
+        Parameters
+        ----------
+        problem: foxes_opt.core.FarmOptProblem
+            The problem
+        state: Any
+            The state, as returned by get_state
+
+        """
+        self.close()
+        self.append_mode = True
+        self.mark(problem.timer.phases)
+
+
+class HistoryReader(OptOutput):
+    """
+    Lazy reader of history files, as
+    written by the HistoryWriter.
+
+    Attributes
+    ----------
+    fpath: pathlib.Path
+        The path of the history file
+    data: xarray.Dataset
+        The lazily loaded history data
+
+    :group: output
+
+    """
+
+    def __init__(self, fname, **kwargs):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        fname: str
+            Name of the history file
+        kwargs: dict, optional
+            Additional parameters for the base class
+
+        """
+        super().__init__(**kwargs)
+        self.fpath = self.get_fpath(fname)
+        self.data = open_dataset(self.fpath)
+
+    @property
+    def n_generations(self):
+        """
+        The number of generations
+
+        Returns
+        -------
+        int :
+            The number of generations
+
+        """
+        return self.data.sizes["generation"]
+
+    @property
+    def n_evals(self):
+        """
+        The total number of evaluated individuals
+
+        Returns
+        -------
+        int :
+            The number of evaluated individuals
+
+        """
+        return self.data.sizes["eval"]
+
+    def generation(self, gen):
+        """
+        Selects the data of one generation
+
+        Parameters
+        ----------
+        gen: int
+            The generation index, negative values
+            count from the end
+
+        Returns
+        -------
+        ds: xarray.Dataset
+            The lazy data of the generation, with
+            dimension eval
+
+        """
+        gen = range(self.n_generations)[gen]
+        i0 = int(self.data["gen_offset"][gen])
+        n = int(self.data["gen_size"][gen])
+        gvars = [v for v, d in self.data.data_vars.items() if "generation" in d.dims]
+        return self.data.drop_vars(gvars).isel(eval=np.s_[i0 : i0 + n])
+
+    def individual(self, gen, i):
+        """
+        Selects the data of one individual
+
+        Parameters
+        ----------
+        gen: int
+            The generation index, negative values
+            count from the end
+        i: int
+            The individual index within the generation
+
+        Returns
+        -------
+        ds: xarray.Dataset
+            The data of the individual
+
+        """
+        return self.generation(gen).isel(eval=i)
+
+    def get_timings(self):
+        """
+        Returns the generation timings
+
+        Returns
+        -------
+        timings: pandas.DataFrame
+            The timings, one row per generation
+
+        """
+        cols = ["gen_size", "gen_time"] + [
+            v for v in self.data.data_vars if v.startswith("time_")
+        ]
+        df = pd.DataFrame({c: self.data[c].values for c in cols})
+        df.index.name = "generation"
+        return df
+
+    def close(self):
+        """
+        Closes the history file
+        """
+        self.data.close()
@@ -13,6 +13,17 @@ class FarmLayoutOptProblem(FarmOptProblem):
 
     """
 
+    MOVES_TURBINES = True
+
+    def _init_frozen_background(self, verbosity):
+        """
+        Helper function that restricts the problem to
+        the selected turbines, for the frozen background
+        """
+        raise ValueError(
+            f"Problem '{self.name}': Frozen background is not supported for layout optimization, since the selected turbines move"
+        )
+
     def var_names_float(self):
         """
         The names of float variables.
@@ -30,6 +30,7 @@ class RegularLayoutOptProblem(FarmVarsProblem):
 
     """
 
+    MOVES_TURBINES = True
     SPACING_X = "spacing_x"
     SPACING_Y = "spacing_y"
     OFFSET_X = "offset_x"
@@ -1,9 +1,21 @@
 import numpy as np
 import pandas as pd
 
-from foxes_opt.core import FarmVarsProblem
+from iwopy.core import OptFunction
+
+from foxes_opt.core import (
+    FarmVarsProblem,
+    ResultsContext,
+    SelectedStates,
+    SparseFarmVars,
+    StatesCompression,
+)
+from foxes.core import Engine, has_engine
 from foxes.models.turbine_models import SetFarmVars
 from foxes.config import config
+from foxes.utils import wd2uv
+import foxes.variables as FV
+import foxes.constants as FC
 
 
 class OptFarmVars(FarmVarsProblem):
@@ -27,7 +39,10 @@ class OptFarmVars(FarmVarsProblem):
 
         """
         super().__init__(*args, **kwargs)
-        self._vars = None
+        self._vars = []
+        self._n_vars = {"int": 0, "float": 0}
+        self._names = {}
+        self._plan = None
 
     def add_var(
         self,
@@ -40,6 +55,8 @@ class OptFarmVars(FarmVarsProblem):
         sel=None,
         pre_rotor=False,
         model_key=None,
+        bins=None,
+        operating_pars={},
     ):
         """
         Add a variable.
@@ -57,16 +74,31 @@ class OptFarmVars(FarmVarsProblem):
         max: float or int
             The max value
         level: str
-            Choices: uniform, state, turbine, state-turbine
-        sel: numpy.ndarray, optional
+            Choices: uniform, state, turbine, state-turbine,
+            binned, binned-turbine
+        sel: numpy.ndarray or str, optional
             States/turbines/state-turbine selection,
-            depending on the level
+            depending on the level. Turbine selection
+            for level binned-turbine. For level state-turbine,
+            operating selects the states and turbines of the
+            productive power curve band, see `get_operating_sel`,
+            and pins the other selected turbines to the
+            initial value
         pre_rotor: bool
             Apply this variable before rotor model
         model_key: str, optional
             Creates sub-model which can then be placed in the
             turbine model list. Repeated keys are added to the
             same turbine model
+        bins: dict, optional
+            The bins of ambient variables for the levels binned
+            and binned-turbine. Key: variable name, e.g. WD or WS,
+            value: the bin edges or the number of bins. Each
+            occupied bin carries one variable (per turbine),
+            which applies to all member states
+        operating_pars: dict
+            Parameters for `get_operating_sel`, e.g. margin,
+            ws_min or ws_max, for the selection operating
 
         """
         if typ == "float":
@@ -90,158 +122,621 @@ class OptFarmVars(FarmVarsProblem):
                     f"Problem '{self.name}': Turbine model entry '{mname}' exists in model book, and disagrees on pre_rotor = {pre_rotor}"
                 )
         else:
-            self.algo.mbook.turbine_models[mname] = SetFarmVars(pre_rotor=pre_rotor)
+            self.algo.mbook.turbine_models[mname] = SparseFarmVars(pre_rotor=pre_rotor)
 
-        if self._vars is None:
-            i0 = 0
-            i0i = 0
-            i0f = 0
-        else:
-            if variable in self._vars["var"].tolist():
-                raise ValueError(
-                    f"Problem '{self.name}': Attempt to add variable '{variable}' twice"
-                )
-            i0 = len(self._vars.index)
-            grps = self._vars.groupby("type")
-            i0i = len(grps.get_group("int").index) if "int" in grps.groups.keys() else 0
-            i0f = (
-                len(grps.get_group("float").index)
-                if "float" in grps.groups.keys()
-                else 0
+        if variable in [b["var"] for b in self._vars]:
+            raise ValueError(
+                f"Problem '{self.name}': Attempt to add variable '{variable}' twice"
             )
-            del grps
+        tname = "int" if typ is int else "float"
+
+        states = None
+        turbines = None
+        state_bins = None
+        operating = False
+        if level in ["binned", "binned-turbine"]:
+            state_bins, n_bins = self._get_state_bins(variable, bins)
 
         if level == "uniform":
-            hdata = pd.DataFrame(index=[i0])
-            hdata.loc[i0, "name"] = variable
-            hdata.loc[i0, "var"] = variable
-            hdata.loc[i0, "type"] = "int" if typ is int else "float"
-            hdata.loc[i0, "index"] = i0i if typ is int else i0f
-            hdata.loc[i0, "level"] = level
-            hdata.loc[i0, "state"] = -1
-            hdata.loc[i0, "turbine"] = -1
-            hdata.loc[i0, "sel_turbine"] = -1
-            hdata.loc[i0, "init"] = np.array([init], dtype=config.dtype_double)
-            hdata.loc[i0, "min"] = np.array([min], dtype=config.dtype_double)
-            hdata.loc[i0, "max"] = np.array([max], dtype=config.dtype_double)
-            hdata.loc[i0, "pre_rotor"] = pre_rotor
-            hdata.loc[i0, "model_key"] = mname
+            n_inds = 1
 
         elif level == "state":
             if not self.algo.initialized:
                 self.algo.initialize()
-
-            states = np.arange(self.algo.n_states)
+            states = np.arange(self.algo.n_states, dtype=config.dtype_int)
             if sel is not None:
                 states = states[sel]
-            inds = i0 + np.arange(len(states))
-            tinds = inds - i0 + i0i if typ is int else inds - i0 + i0f
-
-            hdata = pd.DataFrame(index=inds)
-            hdata.loc[inds, "name"] = [
-                f"{variable}_{i:05d}" for i in range(len(states))
-            ]
-            hdata.loc[inds, "var"] = variable
-            hdata.loc[inds, "type"] = "int" if typ is int else "float"
-            hdata.loc[inds, "index"] = tinds
-            hdata.loc[inds, "level"] = level
-            hdata.loc[inds, "state"] = states
-            hdata.loc[inds, "turbine"] = -1
-            hdata.loc[inds, "sel_turbine"] = -1
-
-            for c, d in [("init", init), ("min", min), ("max", max)]:
-                data = np.full(len(inds), np.nan, dtype=config.dtype_double)
-                data[:] = d
-                hdata.loc[inds, c] = data
-
-            hdata.loc[inds, "pre_rotor"] = pre_rotor
-            hdata.loc[inds, "model_key"] = mname
+            n_inds = len(states)
 
         elif level == "turbine":
             if sel is None:
-                turbines = self.sel_turbines
+                turbines = np.array(self.sel_turbines, dtype=config.dtype_int)
             else:
-                turbines = np.arange(self.algo.n_turbines)[sel]
-            inds = i0 + np.arange(len(turbines))
-            tinds = inds - i0 + i0i if typ is int else inds - i0 + i0f
-
-            hdata = pd.DataFrame(index=inds)
-            hdata.loc[inds, "name"] = [
-                f"{variable}_{i:04d}" for i in range(len(turbines))
-            ]
-            hdata.loc[inds, "var"] = variable
-            hdata.loc[inds, "type"] = "int" if typ is int else "float"
-            hdata.loc[inds, "index"] = tinds
-            hdata.loc[inds, "level"] = level
-            hdata.loc[inds, "state"] = -1
-            hdata.loc[inds, "turbine"] = turbines
-            hdata.loc[inds, "sel_turbine"] = [
-                self.sel_turbines.index(ti) for ti in turbines
-            ]
-
-            for c, d in [("init", init), ("min", min), ("max", max)]:
-                data = np.full(len(inds), np.nan, dtype=config.dtype_double)
-                data[:] = d
-                hdata.loc[inds, c] = data
-
-            hdata.loc[inds, "pre_rotor"] = pre_rotor
-            hdata.loc[inds, "model_key"] = mname
+                turbines = np.arange(self.algo.n_turbines, dtype=config.dtype_int)[sel]
+            n_inds = len(turbines)
 
         elif level == "state-turbine":
+            if isinstance(sel, str) and sel == "operating":
+                sel = self._get_operating_sel(
+                    {variable: (mname, np.mean(init))}, **operating_pars
+                )
+                operating = True
+            elif isinstance(sel, str):
+                raise ValueError(
+                    f"Problem '{self.name}': Unknown selection '{sel}' for variable '{variable}', choices: operating"
+                )
             if not self.algo.initialized:
                 self.algo.initialize()
-
             n_states = self.algo.n_states
             n_turbines = self.algo.n_turbines
             if sel is None:
                 sel = np.zeros((n_states, n_turbines), dtype=bool)
                 sel[:, self.sel_turbines] = True
             else:
-                sel = np.array(sel, dtype=bool)
-            st = np.arange(n_states * n_turbines).reshape(n_states, n_turbines)[sel]
-            whr = np.where(sel)
-            n_inds = len(st)
-            inds = i0 + np.arange(n_inds)
-            tinds = inds - i0 + i0i if typ is int else inds - i0 + i0f
-
-            hdata = pd.DataFrame(index=inds)
-            hdata.loc[inds, "name"] = [
-                f"{variable}_{whr[0][i]:05d}_{whr[1][i]:04d}" for i in range(len(st))
-            ]
-            hdata.loc[inds, "var"] = variable
-            hdata.loc[inds, "type"] = "int" if typ is int else "float"
-            hdata.loc[inds, "index"] = tinds
-            hdata.loc[inds, "level"] = level
-            hdata.loc[inds, "state"] = whr[0]
-            hdata.loc[inds, "turbine"] = whr[1]
-            hdata.loc[inds, "sel_turbine"] = [
-                self.sel_turbines.index(ti) for ti in whr[1]
-            ]
+                sel = np.asarray(sel, dtype=bool)
+            states, turbines = np.where(sel)
+            states = states.astype(config.dtype_int)
+            turbines = turbines.astype(config.dtype_int)
+            n_inds = len(states)
 
-            for c, d in [("init", init), ("min", min), ("max", max)]:
-                data = np.full(n_inds, np.nan, dtype=config.dtype_double)
-                if isinstance(d, np.ndarray) and len(d.shape) > 1:
-                    data[:] = d[sel]
-                else:
-                    data[:] = d
-                hdata.loc[inds, c] = data
+        elif level == "binned":
+            n_inds = n_bins
 
-            hdata.loc[inds, "pre_rotor"] = pre_rotor
-            hdata.loc[inds, "model_key"] = mname
+        elif level == "binned-turbine":
+            if sel is None:
+                turbines = np.array(self.sel_turbines, dtype=config.dtype_int)
+            else:
+                turbines = np.arange(self.algo.n_turbines, dtype=config.dtype_int)[sel]
+            n_inds = n_bins * len(turbines)
 
         else:
             raise ValueError(
-                f"Problem '{self.name}': Unknown level '{level}'. Choices: uniform, state, turbine, state-turbine"
+                f"Problem '{self.name}': Unknown level '{level}'. Choices: uniform, state, turbine, state-turbine, binned, binned-turbine"
+            )
+
+        sel_turbines = None
+        if turbines is not None:
+            tmap = np.full(self.algo.n_turbines, -1, dtype=config.dtype_int)
+            tmap[self.sel_turbines] = np.arange(
+                self.n_sel_turbines, dtype=config.dtype_int
+            )
+            sel_turbines = tmap[turbines]
+            if np.any(sel_turbines < 0):
+                raise ValueError(
+                    f"Problem '{self.name}': Variable '{variable}' refers to turbines that are not selected: {np.unique(turbines[sel_turbines < 0]).tolist()}"
+                )
+
+        block = dict(
+            var=variable,
+            type=tname,
+            level=level,
+            index=self._n_vars[tname],
+            n=n_inds,
+            state=states,
+            turbine=turbines,
+            sel_turbine=sel_turbines,
+            bin=state_bins,
+            pre_rotor=pre_rotor,
+            model_key=mname,
+            pin=None,
+        )
+        for c, d in [("init", init), ("min", min), ("max", max)]:
+            data = np.full(n_inds, np.nan, dtype=config.dtype_double)
+            if level == "state-turbine" and isinstance(d, np.ndarray) and d.ndim > 1:
+                data[:] = d[sel]
+            else:
+                data[:] = d
+            block[c] = data
+
+        if operating:
+            pin = np.zeros((n_states, n_turbines), dtype=config.dtype_double)
+            pin[:] = init
+            pin[sel] = np.nan
+            block["pin"] = pin[:, self.sel_turbines]
+
+        self._vars.append(block)
+        self._n_vars[tname] += n_inds
+        self._names = {}
+
+    def _get_ambient_data(self, variables):
+        """
+        Helper function that calculates ambient state data
+        at the farm centre and mean hub height
+        """
+        return StatesCompression.get_ambient_data(self.algo, variables)
+
+    def _get_state_bins(self, variable, bins):
+        """
+        Helper function that maps states to the occupied
+        bins of ambient variables
+        """
+        if not isinstance(bins, dict) or not len(bins):
+            raise ValueError(
+                f"Problem '{self.name}': Binned variable '{variable}' requires bins dict, e.g. {{'{FV.WD}': 36, '{FV.WS}': [3, 6, 9, 12, 25]}}, got {bins}"
             )
 
-        if self._vars is None:
-            self._vars = hdata
+        adata = self._get_ambient_data(list(bins.keys()))
+        return StatesCompression.get_state_bins(
+            adata, bins, name=f"Problem '{self.name}': Binned variable '{variable}'"
+        )
+
+    def get_state_bins(self, variable):
+        """
+        Get the bin indices of the states
+        for a binned variable
+
+        Parameters
+        ----------
+        variable: str
+            The foxes farm variable name
+
+        Returns
+        -------
+        state_bins: numpy.ndarray
+            The bin index of each state, shape: (n_states,)
+
+        """
+        for blk in self._vars:
+            if blk["var"] == variable:
+                if blk["bin"] is None:
+                    raise ValueError(
+                        f"Problem '{self.name}': Variable '{variable}' has level '{blk['level']}', not binned"
+                    )
+                return blk["bin"]
+        raise KeyError(f"Problem '{self.name}': Variable '{variable}' not found")
+
+    def _rebuild_function_vars(self, action):
+        """
+        Helper function that rebuilds the functions, such
+        that they take over the modified problem variables
+        at initialization
+        """
+        vnamesi = list(self.var_names_int())
+        vnamesf = list(self.var_names_float())
+        for f in self.objs.functions + self.cons.functions:
+            if f.var_names_int is None and f.var_names_float is None:
+                continue
+            if f.var_names_int != vnamesi or f.var_names_float != vnamesf:
+                raise ValueError(
+                    f"Problem '{self.name}': Cannot {action}, function '{f.name}' does not depend on all problem variables"
+                )
+            if f.initialized:
+                f.finalize()
+            OptFunction.__init__(f, self, f.name, cnames=list(f.component_names))
+
+    def get_wake_interactions(self, cone_angle=15.0, max_dist=None):
+        """
+        Geometric analysis of the wake interactions
+        of the selected turbines.
+
+        A selected turbine interacts in a state if its
+        wake cone, aligned with the ambient wind direction
+        at the farm centre, hits the rotor of any other
+        turbine downstream.
+
+        Parameters
+        ----------
+        cone_angle: float
+            The half opening angle of the wake cone in degrees.
+            It should include margins for wake deflection and
+            wind direction variations across the farm
+        max_dist: float, optional
+            The maximal downstream distance of interactions in m
+
+        Returns
+        -------
+        interactions: numpy.ndarray of bool
+            The interaction flags, shape:
+            (n_states, n_sel_turbines)
+
+        """
+        wd = self._get_ambient_data([FV.WD])[FV.WD]
+        nx, ny = np.moveaxis(wd2uv(wd), -1, 0)
+        xy = self.farm.xy_array
+        D = self.farm.get_rotor_diameters(self.algo)
+        tan = np.tan(np.radians(cone_angle))
+
+        out = np.zeros((len(wd), self.n_sel_turbines), dtype=bool)
+        for i, ti in enumerate(self.sel_turbines):
+            dx = xy[None, :, 0] - xy[ti, 0]
+            dy = xy[None, :, 1] - xy[ti, 1]
+            x = dx * nx[:, None] + dy * ny[:, None]
+            y = np.abs(dy * nx[:, None] - dx * ny[:, None])
+            hit = (x > 0) & (y < D[ti] / 2 + x * tan + D[None, :] / 2)
+            if max_dist is not None:
+                hit &= x <= max_dist
+            out[:, i] = np.any(hit, axis=1)
+
+        return out
+
+    def get_operating_sel(self, ws_min=None, ws_max=None, margin=0.0, rated_tol=0.01):
+        """
+        The selection of states and turbines that operate in
+        the productive band of their power curves, between
+        cut-in and rated wind speed.
+
+        The rotor equivalent wind speeds are taken from an
+        ambient run of the problem algorithm without wakes,
+        with all variables at their initial values. The band
+        is derived from the power curve data of the turbine
+        types, if not given explicitly.
+
+        Parameters
+        ----------
+        ws_min: float, optional
+            The minimal wind speed of the band, or None
+            for the cut-in wind speed
+        ws_max: float, optional
+            The maximal wind speed of the band, or None
+            for the rated wind speed
+        margin: float
+            The extension of the band at both sides in m/s,
+            e.g. for waked turbines below rated wind speed
+        rated_tol: float
+            The relative power tolerance for detecting
+            rated wind speed
+
+        Returns
+        -------
+        sel: numpy.ndarray of bool
+            The selection of the selected turbines,
+            shape: (n_states, n_turbines)
+
+        """
+        return self._get_operating_sel({}, ws_min, ws_max, margin, rated_tol)
+
+    def _set_model_vars(self, values):
+        """
+        Helper function that sets farm variables of the selected
+        turbines in the turbine models of the problem variables,
+        key: variable, value: (model key, data of shape
+        (n_states, n_sel_turbines)). Returns the models, which
+        have to be reset after the calculation
+        """
+        models = {}
+        for v, (mkey, d) in values.items():
+            m = self.algo.mbook.turbine_models[mkey]
+            if mkey not in models:
+                m.reset()
+                models[mkey] = m
+            if isinstance(m, SparseFarmVars):
+                m.add_var(v, d, turbines=self.sel_turbines)
+            else:
+                data = np.zeros(
+                    (len(d), self.algo.n_turbines), dtype=config.dtype_double
+                )
+                data[:, self.sel_turbines] = d
+                m.add_var(v, data)
+        return models
+
+    def _get_operating_sel(
+        self, new_vars, ws_min=None, ws_max=None, margin=0.0, rated_tol=0.01
+    ):
+        """
+        Helper function that computes the operating selection,
+        with all variables at their initial values during the
+        ambient run, including new variables, key: variable,
+        value: (model key, initial value)
+        """
+        if not self.algo.initialized:
+            self.algo.initialize()
+        n_states = self.algo.n_states
+        self.algo.finalize()
+
+        shp = (n_states, self.n_sel_turbines)
+        values = {}
+        for blk in self._vars:
+            d = np.full(shp, np.mean(blk["init"]), dtype=config.dtype_double)
+            if blk["pin"] is not None:
+                d = np.where(np.isnan(blk["pin"]), d, blk["pin"])
+            values[blk["var"]] = (blk["model_key"], d)
+        for v, (mkey, init) in new_vars.items():
+            values[v] = (mkey, np.full(shp, init, dtype=config.dtype_double))
+
+        models = self._set_model_vars(values)
+        try:
+            if has_engine():
+                results = self.algo.calc_farm(ambient=True, outputs=[FV.AMB_REWS])
+            else:
+                with Engine.new("single", verbosity=0):
+                    results = self.algo.calc_farm(ambient=True, outputs=[FV.AMB_REWS])
+        finally:
+            for m in models.values():
+                m.reset()
+        self.algo.initialize()
+        ttypes = self.algo.farm_controller.turbine_types
+        n_turbines = self.algo.n_turbines
+
+        # the power curve data is available after the calculation:
+        band = np.zeros((n_turbines, 2), dtype=config.dtype_double)
+        for ti, tt in enumerate(ttypes):
+            band[ti] = [
+                -np.inf if ws_min is None else ws_min,
+                np.inf if ws_max is None else ws_max,
+            ]
+            if ws_min is None or ws_max is None:
+                if not hasattr(tt, "data_ws") or not hasattr(tt, "data_P"):
+                    raise ValueError(
+                        f"Problem '{self.name}': Missing power curve data of turbine type '{tt.name}', please specify ws_min and ws_max"
+                    )
+                ws = np.asarray(tt.data_ws)
+                P = np.asarray(tt.data_P)
+                if ws_min is None:
+                    band[ti, 0] = ws[np.argmax(P > 0)]
+                if ws_max is None:
+                    band[ti, 1] = ws[np.argmax(P >= (1 - rated_tol) * np.max(P))]
+
+        rews = results[FV.AMB_REWS].to_numpy()
+        sel = (rews >= band[None, :, 0] - margin) & (rews <= band[None, :, 1] + margin)
+        tsel = np.zeros(n_turbines, dtype=bool)
+        tsel[self.sel_turbines] = True
+        sel[:, ~tsel] = False
+
+        return sel
+
+    def prune_states(self, cone_angle=15.0, max_dist=None, drop_states=True):
+        """
+        Pins variables without downstream wake interaction
+        to their initial values, before initialization.
+
+        Variables of the levels state, turbine and
+        state-turbine are pinned if none of their states
+        and turbines interacts, see `get_wake_interactions`.
+        This assumes that the variables only act on their
+        own turbines and on their wakes, i.e. no upstream
+        effects like blockage.
+
+        States that are not affected by any remaining
+        variable can be dropped from the evaluations. Their
+        contributions to the objectives are constant, they
+        are calculated once and added as objective offsets,
+        such that the objectives stay exact. This requires
+        objectives of type `FarmVarObjective` that are
+        (weighted) sums over states, and no constraints.
+
+        Parameters
+        ----------
+        cone_angle: float
+            The half opening angle of the wake cone in degrees,
+            or None for only dropping states without variables
+        max_dist: float, optional
+            The maximal downstream distance of interactions in m
+        drop_states: bool
+            Flag for dropping unaffected states
+
+        Returns
+        -------
+        inds: dict
+            The indices of the remaining variables within
+            the variables of the unpruned problem,
+            key: int or float, value: numpy.ndarray
+
+        """
+        if self._plan is not None:
+            raise ValueError(
+                f"Problem '{self.name}': Cannot prune states of initialized problem"
+            )
+        self._check_vars()
+
+        if cone_angle is None:
+            if not self.algo.initialized:
+                self.algo.initialize()
+            act = np.ones((self.algo.n_states, self.n_sel_turbines), dtype=bool)
         else:
-            self._vars = pd.concat([self._vars, hdata], axis=0)
+            act = self.get_wake_interactions(cone_angle, max_dist)
+        n_states, n_sturb = act.shape
+
+        blocks = []
+        n_vars = {"int": 0, "float": 0}
+        inds = {"int": [], "float": []}
+        covered = np.zeros(n_states, dtype=bool)
+        for blk in self._vars:
+            typ = blk["type"]
+            level = blk["level"]
+            states = blk["state"]
+            sturbs = blk["sel_turbine"]
+            if level == "state":
+                keep = np.any(act[states], axis=1)
+            elif level == "turbine":
+                keep = np.any(act[:, sturbs], axis=0)
+            elif level == "state-turbine":
+                keep = act[states, sturbs]
+            else:
+                keep = np.ones(blk["n"], dtype=bool)
+
+            b = dict(blk, index=n_vars[typ], n=int(np.sum(keep)))
+            if not np.all(keep):
+                pin = blk["pin"]
+                if pin is None:
+                    pin = np.full(
+                        (n_states, n_sturb), np.nan, dtype=config.dtype_double
+                    )
+                else:
+                    pin = pin.copy()
+                init = blk["init"][~keep]
+                if level == "state":
+                    pin[states[~keep]] = init[:, None]
+                elif level == "turbine":
+                    pin[:, sturbs[~keep]] = init[None, :]
+                else:
+                    pin[states[~keep], sturbs[~keep]] = init
+                b["pin"] = pin
+                for c in ["state", "turbine", "sel_turbine", "init", "min", "max"]:
+                    if blk[c] is not None:
+                        b[c] = blk[c][keep]
+            blocks.append(b)
+            inds[typ].append(blk["index"] + np.where(keep)[0])
+            n_vars[typ] += b["n"]
+
+            if level in ["state", "state-turbine"]:
+                covered[b["state"]] = True
+            elif b["n"] > 0:
+                covered[:] = True
+
+        self._rebuild_function_vars("prune states")
+        self._vars = blocks
+        self._n_vars = n_vars
+        self._names = {}
+        inds = {
+            typ: (
+                np.concatenate(i).astype(config.dtype_int)
+                if len(i)
+                else np.zeros(0, dtype=config.dtype_int)
+            )
+            for typ, i in inds.items()
+        }
+
+        if drop_states and not np.all(covered):
+            offsets = self._get_state_offsets(np.where(~covered)[0])
+            rinds = self.restrict_states(np.where(covered)[0])
+            inds = {typ: inds[typ][rinds[typ]] for typ in inds}
+            for f in self.objs.functions:
+                f.offset += offsets[f.name]
 
-        icols = ["index", "state", "turbine", "sel_turbine"]
-        for c in icols:
-            self._vars[c] = self._vars[c].astype(config.dtype_int)
+        return inds
+
+    def _get_state_offsets(self, sel_states):
+        """
+        Helper function that calculates the constant
+        objective contributions of a subset of states
+        """
+        if len(self.cons.functions):
+            raise ValueError(
+                f"Problem '{self.name}': Cannot drop states of problem with constraints"
+            )
+        for f in self.objs.functions:
+            rules = getattr(f, "rules", None)
+            if (
+                rules is None
+                or not hasattr(f, "contract")
+                or rules[FC.STATE] not in ["weights", "sum"]
+                or rules[FC.TURBINE] not in ["sum", "mean_no_weights"]
+            ):
+                raise ValueError(
+                    f"Problem '{self.name}': Cannot drop states, objective '{f.name}' is not a sum over states and turbines"
+                )
+
+        if self.algo.initialized:
+            self.algo.finalize()
+        states = self.algo.states
+        self.algo.states = SelectedStates(states, sel_states)
+        self.algo.reset_chunk_store()
+
+        # set farm variables of pinned and untouched turbines:
+        values = {}
+        for blk in self._vars:
+            pin = blk["pin"]
+            if pin is None:
+                pin = np.full(
+                    (len(sel_states), self.n_sel_turbines),
+                    np.nan,
+                    dtype=config.dtype_double,
+                )
+            else:
+                pin = pin[sel_states]
+            values[blk["var"]] = (blk["model_key"], pin)
+        models = self._set_model_vars(values)
+
+        try:
+            if has_engine():
+                results = self.algo.calc_farm()
+            else:
+                with Engine.new("single", verbosity=0):
+                    results = self.algo.calc_farm()
+        finally:
+            self.algo.finalize()
+            self.algo.states = states
+            self.algo.reset_chunk_store()
+            for m in models.values():
+                m.reset()
+
+        ctx = ResultsContext(results)
+        return {
+            f.name: float(f.contract(ctx)[0] - f.offset) for f in self.objs.functions
+        }
+
+    def restrict_states(self, sel_states):
+        """
+        Restricts the problem to a subset of states,
+        before initialization.
+
+        Only variables of the levels state and state-turbine
+        are supported, since all other levels couple the
+        states, unless all their variables are pinned.
+        The algorithm states are replaced by the selected
+        states, keeping their original weights.
+
+        Parameters
+        ----------
+        sel_states: list of int
+            The indices of the selected states
+
+        Returns
+        -------
+        inds: dict
+            The indices of the remaining variables within
+            the variables of the unrestricted problem,
+            key: int or float, value: numpy.ndarray
+
+        """
+        if self._plan is not None:
+            raise ValueError(
+                f"Problem '{self.name}': Cannot restrict states of initialized problem"
+            )
+        self._check_vars()
+
+        if not self.algo.initialized:
+            self.algo.initialize()
+        n_states = self.algo.n_states
+        sel_states = np.asarray(sel_states, dtype=config.dtype_int)
+        smap = np.full(n_states, -1, dtype=config.dtype_int)
+        smap[sel_states] = np.arange(len(sel_states), dtype=config.dtype_int)
+
+        blocks = []
+        n_vars = {"int": 0, "float": 0}
+        inds = {"int": [], "float": []}
+        for blk in self._vars:
+            typ = blk["type"]
+            pin = None if blk["pin"] is None else blk["pin"][sel_states]
+            if blk["level"] not in ["state", "state-turbine"]:
+                if blk["n"] > 0:
+                    raise ValueError(
+                        f"Problem '{self.name}': Cannot restrict states, variable '{blk['var']}' has level '{blk['level']}' which couples states"
+                    )
+                blocks.append(dict(blk, index=n_vars[typ], pin=pin))
+                continue
+            keep = smap[blk["state"]] >= 0
+            b = dict(blk, index=n_vars[typ], n=int(np.sum(keep)), pin=pin)
+            b["state"] = smap[blk["state"][keep]]
+            for c in ["turbine", "sel_turbine", "init", "min", "max"]:
+                if blk[c] is not None:
+                    b[c] = blk[c][keep]
+            blocks.append(b)
+            inds[typ].append(blk["index"] + np.where(keep)[0])
+            n_vars[typ] += b["n"]
+
+        self._rebuild_function_vars("restrict states")
+
+        self.algo.finalize()
+        self.algo.states = SelectedStates(self.algo.states, sel_states)
+        self.algo.reset_chunk_store()
+        if self.points is not None:
+            pts = np.asarray(self.points, dtype=config.dtype_double)
+            if pts.ndim == 3:
+                self.points = pts[sel_states]
+
+        self._vars = blocks
+        self._n_vars = n_vars
+        self._names = {}
+
+        return {
+            typ: (
+                np.concatenate(i).astype(config.dtype_int)
+                if len(i)
+                else np.zeros(0, dtype=config.dtype_int)
+            )
+            for typ, i in inds.items()
+        }
 
     def initialize(self, verbosity=1, **kwargs):
         """
@@ -255,29 +750,36 @@ class OptFarmVars(FarmVarsProblem):
             Additional parameters for super class init
 
         """
-        if self._vars is None:
-            raise ValueError(
-                f"Problem '{self.name}': No variables added for optimization."
-            )
+        self._check_vars()
+        if self.states_compression is not None:
+            for blk in self._vars:
+                if blk["level"] not in ["uniform", "turbine"] or blk["pin"] is not None:
+                    raise ValueError(
+                        f"Problem '{self.name}': Variable '{blk['var']}' of level '{blk['level']}' depends on the states, cannot compress states"
+                    )
 
         if verbosity > 0:
             print(f"Problem '{self.name}': Optimization variable list")
             print()
-            print(self._vars)
+            print(self.get_vars_info())
             print()
 
         prev = {}
         postv = {}
-        for (mname, pre), g in self._vars.groupby(["model_key", "pre_rotor"]):
-            if (pre and mname in postv) or (not pre and mname in prev):
+        for blk in self._vars:
+            mname = blk["model_key"]
+            if (blk["pre_rotor"] and mname in postv) or (
+                not blk["pre_rotor"] and mname in prev
+            ):
                 raise ValueError(
                     f"Problem '{self.name}': Model '{mname}' reveived both pre_rotor and non-pre_rotor variables"
                 )
-            tg = prev if pre else postv
+            tg = prev if blk["pre_rotor"] else postv
             if mname not in tg:
-                tg[mname] = set(g["var"].tolist())
-            else:
-                tg[mname] = tg[mname].update(g["var"].tolist())
+                tg[mname] = []
+            tg[mname].append(blk["var"])
+
+        self._plan = self._compile_plan()
 
         super().initialize(
             pre_rotor_vars={mname: list(vrs) for mname, vrs in prev.items()},
@@ -286,6 +788,124 @@ class OptFarmVars(FarmVarsProblem):
             **kwargs,
         )
 
+    def _check_vars(self):
+        """Helper function that checks for added variables"""
+        if not len(self._vars):
+            raise ValueError(
+                f"Problem '{self.name}': No variables added for optimization."
+            )
+
+    def get_vars_info(self):
+        """
+        Summary of the added variables
+
+        Returns
+        -------
+        info: pandas.DataFrame
+            The summary, one row per added variable
+
+        """
+        cols = ["var", "type", "level", "index", "n", "pre_rotor", "model_key"]
+        return pd.DataFrame([{c: b[c] for c in cols} for b in self._vars], columns=cols)
+
+    def _compile_plan(self):
+        """
+        Helper function that compiles the variable registry
+        into the scatter plan for the translation of
+        optimization variables to farm variables.
+
+        Returns
+        -------
+        plan: list of tuple
+            The plan entries (typ, var, level, vsel, states,
+            sel_turbines, pins), with the variable slice and the
+            target state and selected turbine index arrays,
+            which are None if all are targeted in order.
+            For binned levels, states are the bin indices
+            of all states. The pins are the values of pinned
+            variables, shape: (n_states, n_sel_turbines), nan
+            otherwise, or None
+
+        """
+        n_states = self.algo.n_states
+        n_sturb = self.n_sel_turbines
+
+        plan = []
+        for blk in self._vars:
+            level = blk["level"]
+            states = blk["state"] if blk["bin"] is None else blk["bin"]
+            sturbs = blk["sel_turbine"]
+            if level == "state" and np.array_equal(states, np.arange(n_states)):
+                states = None
+            if level == "turbine" and np.array_equal(sturbs, np.arange(n_sturb)):
+                sturbs = None
+            vsel = np.s_[blk["index"] : blk["index"] + blk["n"]]
+            plan.append(
+                (blk["type"], blk["var"], level, vsel, states, sturbs, blk["pin"])
+            )
+
+        return plan
+
+    def _var_names(self, typ):
+        """
+        Helper function that generates the variable names
+        of a type, lazily on first request
+        """
+        if typ not in self._names:
+            names = []
+            for blk in self._vars:
+                if blk["type"] != typ:
+                    continue
+                v = blk["var"]
+                if blk["level"] == "uniform":
+                    names.append(v)
+                elif blk["level"] == "state":
+                    names += [f"{v}_{i:05d}" for i in range(blk["n"])]
+                elif blk["level"] == "turbine":
+                    names += [f"{v}_{i:04d}" for i in range(blk["n"])]
+                elif blk["level"] == "binned":
+                    names += [f"{v}_b{i:04d}" for i in range(blk["n"])]
+                elif blk["level"] == "binned-turbine":
+                    names += [
+                        f"{v}_b{bi:04d}_{ti:04d}"
+                        for bi in range(blk["n"] // len(blk["turbine"]))
+                        for ti in blk["turbine"].tolist()
+                    ]
+                elif blk["n"] > 0:
+                    snames = [f"{v}_{i:05d}_" for i in range(blk["state"].max() + 1)]
+                    tnames = [f"{i:04d}" for i in range(blk["turbine"].max() + 1)]
+                    names += [
+                        snames[si] + tnames[ti]
+                        for si, ti in zip(
+                            blk["state"].tolist(), blk["turbine"].tolist()
+                        )
+                    ]
+            self._names[typ] = names
+        return self._names[typ]
+
+    def _var_values(self, typ, col, dtype):
+        """
+        Helper function that collects initial, min
+        or max values of a type
+        """
+        data = [b[col] for b in self._vars if b["type"] == typ]
+        if not len(data):
+            return []
+        return np.concatenate(data).astype(dtype)
+
+    @property
+    def n_vars_int(self):
+        """
+        The number of int variables
+
+        Returns
+        -------
+        n: int
+            The number of int variables
+
+        """
+        return self._n_vars["int"]
+
     def var_names_int(self):
         """
         The names of int variables.
@@ -296,16 +916,8 @@ class OptFarmVars(FarmVarsProblem):
             The names of the int variables
 
         """
-        if self._vars is None:
-            raise ValueError(
-                f"Problem '{self.name}': No variables added for optimization."
-            )
-
-        grps = self._vars.groupby("type")
-        if "int" not in grps.groups.keys():
-            return []
-        else:
-            return grps.get_group("int")["name"].tolist()
+        self._check_vars()
+        return self._var_names("int")
 
     def initial_values_int(self):
         """
@@ -317,16 +929,8 @@ class OptFarmVars(FarmVarsProblem):
             Initial int values, shape: (n_vars_int,)
 
         """
-        if self._vars is None:
-            raise ValueError(
-                f"Problem '{self.name}': No variables added for optimization."
-            )
-
-        grps = self._vars.groupby("type")
-        if "int" not in grps.groups.keys():
-            return []
-        else:
-            return grps.get_group("int")["init"].to_numpy(config.dtype_int)
+        self._check_vars()
+        return self._var_values("int", "init", config.dtype_int)
 
     def min_values_int(self):
         """
@@ -340,16 +944,8 @@ class OptFarmVars(FarmVarsProblem):
             Minimal int values, shape: (n_vars_int,)
 
         """
-        if self._vars is None:
-            raise ValueError(
-                f"Problem '{self.name}': No variables added for optimization."
-            )
-
-        grps = self._vars.groupby("type")
-        if "int" not in grps.groups.keys():
-            return []
-        else:
-            return grps.get_group("int")["min"].to_numpy(config.dtype_int)
+        self._check_vars()
+        return self._var_values("int", "min", config.dtype_int)
 
     def max_values_int(self):
         """
@@ -363,16 +959,21 @@ class OptFarmVars(FarmVarsProblem):
             Maximal int values, shape: (n_vars_int,)
 
         """
-        if self._vars is None:
-            raise ValueError(
-                f"Problem '{self.name}': No variables added for optimization."
-            )
+        self._check_vars()
+        return self._var_values("int", "max", config.dtype_int)
 
-        grps = self._vars.groupby("type")
-        if "int" not in grps.groups.keys():
-            return []
-        else:
-            return grps.get_group("int")["max"].to_numpy(config.dtype_int)
+    @property
+    def n_vars_float(self):
+        """
+        The number of float variables
+
+        Returns
+        -------
+        n: int
+            The number of float variables
+
+        """
+        return self._n_vars["float"]
 
     def var_names_float(self):
         """
@@ -384,16 +985,8 @@ class OptFarmVars(FarmVarsProblem):
             The names of the float variables
 
         """
-        if self._vars is None:
-            raise ValueError(
-                f"Problem '{self.name}': No variables added for optimization."
-            )
-
-        grps = self._vars.groupby("type")
-        if "float" not in grps.groups.keys():
-            return []
-        else:
-            return grps.get_group("float")["name"].tolist()
+        self._check_vars()
+        return self._var_names("float")
 
     def initial_values_float(self):
         """
@@ -405,16 +998,8 @@ class OptFarmVars(FarmVarsProblem):
             Initial float values, shape: (n_vars_float,)
 
         """
-        if self._vars is None:
-            raise ValueError(
-                f"Problem '{self.name}': No variables added for optimization."
-            )
-
-        grps = self._vars.groupby("type")
-        if "float" not in grps.groups.keys():
-            return []
-        else:
-            return grps.get_group("float")["init"].to_numpy(config.dtype_double)
+        self._check_vars()
+        return self._var_values("float", "init", config.dtype_double)
 
     def min_values_float(self):
         """
@@ -428,16 +1013,8 @@ class OptFarmVars(FarmVarsProblem):
             Minimal float values, shape: (n_vars_float,)
 
         """
-        if self._vars is None:
-            raise ValueError(
-                f"Problem '{self.name}': No variables added for optimization."
-            )
-
-        grps = self._vars.groupby("type")
-        if "float" not in grps.groups.keys():
-            return []
-        else:
-            return grps.get_group("float")["min"].to_numpy(config.dtype_double)
+        self._check_vars()
+        return self._var_values("float", "min", config.dtype_double)
 
     def max_values_float(self):
         """
@@ -451,16 +1028,8 @@ class OptFarmVars(FarmVarsProblem):
             Maximal float values, shape: (n_vars_float,)
 
         """
-        if self._vars is None:
-            raise ValueError(
-                f"Problem '{self.name}': No variables added for optimization."
-            )
-
-        grps = self._vars.groupby("type")
-        if "float" not in grps.groups.keys():
-            return []
-        else:
-            return grps.get_group("float")["max"].to_numpy(config.dtype_double)
+        self._check_vars()
+        return self._var_values("float", "max", config.dtype_double)
 
     def opt2farm_vars_individual(self, vars_int, vars_float):
         """
@@ -480,53 +1049,44 @@ class OptFarmVars(FarmVarsProblem):
         farm_vars: dict
             The foxes farm variables. Key: var name,
             value: numpy.ndarray with values, shape:
-            (n_states, n_sel_turbines)
+            (n_states, n_sel_turbines). These are read-only
+            broadcast views or buffers that are overwritten
+            by the next call
 
         """
         n_states = self.algo.n_states
         n_sturb = self.n_sel_turbines
+        shp = (n_states, n_sturb)
 
         farm_vars = {}
-        grps = self._vars.groupby(["type", "var", "level"])
-        for (typ, var, level), g in grps:
-            src = vars_int if typ == "int" else vars_float
-            i0 = g.index[0]
-            i1 = g.index[-1]
-            data = src[np.s_[i0 : i1 + 1]]
+        for typ, var, level, vsel, states, sturbs, pins in self._plan:
+            data = (vars_int if typ == "int" else vars_float)[vsel].astype(
+                config.dtype_double, copy=False
+            )
 
+            # values that are constant along an axis are broadcast:
             if level == "uniform":
-                farm_vars[var] = np.full(
-                    (n_states, n_sturb), data[0], dtype=config.dtype_double
-                )
-
-            elif level == "state":
-                farm_vars[var] = np.full(
-                    (n_states, n_sturb), np.nan, dtype=config.dtype_double
-                )
-                if np.all(g["state"] == np.arange(n_states)):
-                    farm_vars[var][:] = data[:, None]
-                else:
-                    farm_vars[var][g["state"]] = data[:, None]
-
-            elif level == "turbine":
-                farm_vars[var] = np.full(
-                    (n_states, n_sturb), np.nan, dtype=config.dtype_double
-                )
-                if np.all(g["sel_turbine"] == np.arange(n_sturb)):
-                    farm_vars[var][:] = data[None, :]
-                else:
-                    farm_vars[var][:, g["sel_turbine"]] = data[None, :]
-
-            elif level == "state-turbine":
-                farm_vars[var] = np.full(
-                    (n_states, n_sturb), np.nan, dtype=config.dtype_double
-                )
-                farm_vars[var][g["state"], g["sel_turbine"]] = data
-
+                farm_vars[var] = np.broadcast_to(data[0], shp)
+            elif level == "binned":
+                farm_vars[var] = np.broadcast_to(data[states, None], shp)
+            elif level == "state" and states is None:
+                farm_vars[var] = np.broadcast_to(data[:, None], shp)
+            elif level == "turbine" and sturbs is None:
+                farm_vars[var] = np.broadcast_to(data[None, :], shp)
+
+            # otherwise the buffer is reused, with constant nan or pinned entries:
             else:
-                raise ValueError(
-                    f"Problem '{self.name}': Unknown level '{level}' encountered for variable '{var}'. Valid choices: uniform, state, turbine, state-turbine"
-                )
+                fill = np.nan if pins is None else pins
+                out = self._get_buffer(("farm_vars", var), shp, fill)
+                if level == "state-turbine":
+                    out[states, sturbs] = data
+                elif level == "binned-turbine":
+                    out[:, sturbs] = data.reshape(-1, len(sturbs))[states]
+                elif level == "state":
+                    out[states] = data[:, None]
+                else:
+                    out[:, sturbs] = data[None, :]
+                farm_vars[var] = out
 
         return farm_vars
 
@@ -550,53 +1110,43 @@ class OptFarmVars(FarmVarsProblem):
         farm_vars: dict
             The foxes farm variables. Key: var name,
             value: numpy.ndarray with values, shape:
-            (n_pop, n_states, n_sel_turbines)
+            (n_pop, n_states, n_sel_turbines). These are read-only
+            broadcast views or buffers that are overwritten
+            by the next call
 
         """
         n_pop = vars_float.shape[0]
         n_sturb = self.n_sel_turbines
+        shp = (n_pop, n_states, n_sturb)
 
         farm_vars = {}
-        grps = self._vars.groupby(["type", "var", "level"])
-        for (typ, var, level), g in grps:
-            src = vars_int if typ == "int" else vars_float
-            i0 = g.index[0]
-            i1 = g.index[-1]
-            data = src[:, np.s_[i0 : i1 + 1]]
+        for typ, var, level, vsel, states, sturbs, pins in self._plan:
+            data = (vars_int if typ == "int" else vars_float)[:, vsel].astype(
+                config.dtype_double, copy=False
+            )
 
+            # values that are constant along an axis are broadcast:
             if level == "uniform":
-                farm_vars[var] = np.full(
-                    (n_pop, n_states, n_sturb), np.nan, dtype=config.dtype_double
-                )
-                farm_vars[var][:] = data[:, 0, None, None]
-
-            elif level == "state":
-                farm_vars[var] = np.full(
-                    (n_pop, n_states, n_sturb), np.nan, dtype=config.dtype_double
-                )
-                if np.all(g["state"] == np.arange(n_states)):
-                    farm_vars[var][:] = data[:, :, None]
-                else:
-                    farm_vars[var][:, g["state"]] = data[:, :, None]
-
-            elif level == "turbine":
-                farm_vars[var] = np.full(
-                    (n_pop, n_states, n_sturb), np.nan, dtype=config.dtype_double
-                )
-                if np.all(g["sel_turbine"] == np.arange(n_sturb)):
-                    farm_vars[var][:] = data[:, None, :]
-                else:
-                    farm_vars[var][:, :, g["sel_turbine"]] = data[:, None, :]
-
-            elif level == "state-turbine":
-                farm_vars[var] = np.full(
-                    (n_pop, n_states, n_sturb), np.nan, dtype=config.dtype_double
-                )
-                farm_vars[var][:, g["state"], g["sel_turbine"]] = data
-
+                farm_vars[var] = np.broadcast_to(data[:, 0, None, None], shp)
+            elif level == "binned":
+                farm_vars[var] = np.broadcast_to(data[:, states, None], shp)
+            elif level == "state" and states is None:
+                farm_vars[var] = np.broadcast_to(data[:, :, None], shp)
+            elif level == "turbine" and sturbs is None:
+                farm_vars[var] = np.broadcast_to(data[:, None, :], shp)
+
+            # otherwise the buffer is reused, with constant nan or pinned entries:
             else:
-                raise ValueError(
-                    f"Problem '{self.name}': Unknown level '{level}' encountered for variable '{var}'. Valid choices: uniform, state, turbine, state-turbine"
-                )
+                fill = np.nan if pins is None else pins
+                out = self._get_buffer(("farm_vars", var), shp, fill)
+                if level == "state-turbine":
+                    out[:, states, sturbs] = data
+                elif level == "binned-turbine":
+                    out[:, :, sturbs] = data.reshape(n_pop, -1, len(sturbs))[:, states]
+                elif level == "state":
+                    out[:, states] = data[:, :, None]
+                else:
+                    out[:, :, sturbs] = data[:, None, :]
+                farm_vars[var] = out
 
         return farm_vars
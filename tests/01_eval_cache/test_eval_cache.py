@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+import foxes
+from foxes_opt.core import EvalCache
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+
+def test():
+    cache = EvalCache(max_size=3, tol=1e-6)
+
+    vi = np.zeros((4, 0), dtype=np.int32)
+    vf = np.array([[0.0, 1.0], [1.0, 2.0], [0.0, 1.0 + 1e-8], [2.0, 3.0]])
+    keys, found, objs, cons = cache.lookup_population(vi, vf, 1, 0)
+    assert not np.any(found)
+    assert keys[0] == keys[2]
+    assert cache.n_misses == 3
+    assert cache.n_hits == 1
+
+    for k, f in zip(keys, vf):
+        cache.store(k, np.array([np.sum(f)]), np.zeros(0))
+    assert cache.size == 3
+
+    cache.lookup(keys[0])
+    cache.store(cache.key(vi[0], np.array([5.0, 5.0])), np.ones(1), np.zeros(0))
+    assert cache.size == 3
+    assert cache.n_evictions == 1
+    assert cache.lookup(keys[1]) is None
+    assert cache.lookup(keys[0]) is not None
+
+    __, found, objs, __ = cache.lookup_population(vi, vf, 1, 0)
+    assert np.all(found == [True, False, True, True])
+    assert np.allclose(objs[found, 0], [1.0, 1.0, 5.0])
+
+
+def _create_problem(**kwargs):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {FV.WS: [8.0, 10.0], FV.WD: [270.0], FV.TI: [0.06], FV.RHO: [1.225]}
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+    problem = OptFarmVars("opt_yawm", algo, **kwargs)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="turbine")
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize(verbosity=0)
+    return problem
+
+
+def test_problem():
+    x = np.random.default_rng(42).uniform(-30.0, 30.0, (4, 3))
+    x = np.concatenate([x, x[:2]], axis=0)
+    xi = np.zeros((len(x), 0), dtype=np.int32)
+
+    with foxes.Engine.new("single", verbosity=0):
+        objs0, __ = _create_problem().evaluate_population(xi, x)
+
+        # the memory of iwopy is kept without eval_cache:
+        problem = _create_problem(
+            mem_size=10,
+            mem_keyf=lambda vi, vf: (tuple(vi.tolist()), tuple(vf.tolist())),
+        )
+        assert problem.eval_cache is None
+        assert problem.memory.size == 0
+        objs, __ = problem.evaluate_population(xi, x)
+        assert np.allclose(objs, objs0, rtol=1e-12)
+        assert problem.memory.size == 4
+        objs, __ = problem.evaluate_population(xi, x)
+        assert np.allclose(objs, objs0, rtol=1e-12)
+        assert problem.timer.phases["calc_farm"]["individuals"] == 6
+        objs, __ = problem.evaluate_individual(xi[1], x[1])
+        assert np.allclose(objs, objs0[1], rtol=1e-12)
+        assert problem.timer.phases["calc_farm"]["individuals"] == 6
+
+        problem = _create_problem(eval_cache=dict(max_size=10))
+        assert problem.memory is None
+        assert problem.eval_cache.max_size == 10
+        objs, __ = problem.evaluate_population(xi, x)
+        assert np.allclose(objs, objs0, rtol=1e-12)
+        assert problem.eval_cache.n_hits == 2
+        assert problem.timer.phases["calc_farm"]["individuals"] == 4
+
+        objs, __ = problem.evaluate_individual(xi[1], x[1])
+        assert np.allclose(objs, objs0[1], rtol=1e-12)
+        assert problem.eval_cache.n_hits == 3
+
+    with pytest.raises(ValueError):
+        _create_problem(mem_size=10, eval_cache=True)
+
+
+if __name__ == "__main__":
+    test()
+    test_problem()
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import foxes
+from foxes_opt.core.frozen_background import FrozenBackgroundStates
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.problems.layout import FarmLayoutOptProblem
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+
+def _create_problem(frozen_background, rotor_model):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=10,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+
+    sdata = pd.DataFrame(
+        {
+            "ws": [8.0, 10.0, 9.0, 11.0],
+            "wd": [265.0, 272.0, 270.0, 268.0],
+            "ti": 0.06,
+            "rho": 1.225,
+            "weight": [0.1, 0.2, 0.3, 0.4],
+        }
+    )
+    states = foxes.input.states.StatesTable(
+        sdata,
+        output_vars=[FV.WS, FV.WD, FV.TI, FV.RHO],
+        var2col={
+            FV.WS: "ws",
+            FV.WD: "wd",
+            FV.TI: "ti",
+            FV.RHO: "rho",
+            FV.WEIGHT: "weight",
+        },
+    )
+
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model=rotor_model,
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars(
+        "opt_yawm",
+        algo,
+        sel_turbines=[8, 9],
+        frozen_background=frozen_background,
+    )
+    problem.add_var(FV.YAWM, float, 0.0, -40.0, 40.0, level="turbine")
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize()
+
+    return problem
+
+
+@pytest.mark.parametrize("rotor_model", ["centre", "grid16"])
+def test(rotor_model):
+    x = np.array([10.0, -15.0])
+    vi = np.zeros(0, dtype=np.int32)
+
+    with foxes.Engine.new("single", verbosity=0):
+        problem = _create_problem(False, rotor_model)
+        objs0, __ = problem.evaluate_individual(vi, x)
+
+        problem = _create_problem(True, rotor_model)
+        objs, __ = problem.evaluate_individual(vi, x)
+
+        # the background is stored at the selected rotors only:
+        states = problem.algo.states
+        assert isinstance(states, FrozenBackgroundStates)
+        n_rpoints = problem.algo.rotor_model.n_rotor_points()
+        assert states._hub.shape == (4, 2, 4)
+        assert states._rotor.shape == (4, 2, n_rpoints, 4)
+
+        for n_pop in [1, 3]:
+            pobjs, __ = problem.evaluate_population(
+                np.zeros((n_pop, 0), dtype=np.int32), np.tile(x, (n_pop, 1))
+            )
+            assert np.allclose(pobjs, objs[None, :], rtol=1e-10)
+
+    print(rotor_model, objs0, objs)
+    assert np.allclose(objs, objs0, rtol=1e-2)
+
+
+def test_layout():
+    farm = foxes.WindFarm(boundary=foxes.utils.geom2d.Circle([0.0, 0.0], 2000.0))
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=4,
+        turbine_models=["NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.SingleStateStates(ws=9, wd=270, ti=0.08, rho=1.225)
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_linear_lim_k004"],
+        verbosity=0,
+    )
+
+    problem = FarmLayoutOptProblem(
+        "layout_opt", algo, sel_turbines=[2, 3], frozen_background=True
+    )
+    problem.add_objective(MaxFarmPower(problem))
+    with pytest.raises(ValueError):
+        problem.initialize()
+
+
+if __name__ == "__main__":
+    test("centre")
+    test("grid16")
+    test_layout()
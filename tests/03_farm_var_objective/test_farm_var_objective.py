@@ -0,0 +1,96 @@
+import numpy as np
+
+import foxes
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import FarmVarObjective
+import foxes.variables as FV
+import foxes.constants as FC
+
+
+def _reference(objective, results):
+    """Contraction by labeled xarray operations"""
+    data = results[objective.variable]
+    weights = results[FV.WEIGHT]
+    if objective.n_sel_turbines < results.sizes[FC.TURBINE]:
+        data = data.isel({FC.TURBINE: objective.sel_turbines})
+        if FC.TURBINE in weights.dims:
+            weights = weights.isel({FC.TURBINE: objective.sel_turbines})
+    for dim, rule in objective.rules.items():
+        if rule == "weights":
+            data = (data * weights).sum(dim=dim)
+        elif rule == "mean_no_weights":
+            data = data.mean(dim=dim)
+        else:
+            data = getattr(data, rule)(dim=dim)
+    return float(data) / objective.scale
+
+
+def test():
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=4,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {
+            FV.WS: [7.0, 9.0, 11.0],
+            FV.WD: [268.0, 273.0],
+            FV.TI: [0.06],
+            FV.RHO: [1.225],
+        }
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="turbine")
+    rules = [
+        ("weights", "sum", None),
+        ("weights", "mean_no_weights", [1, 2]),
+        ("max", "max", None),
+        ("min", "sum", [0, 3]),
+        ("mean_no_weights", "min", None),
+        ("sum", "mean_no_weights", [2]),
+    ]
+    for i, (rs, rt, sel) in enumerate(rules):
+        problem.add_objective(
+            FarmVarObjective(
+                problem,
+                f"f{i}",
+                FV.P,
+                rs,
+                rt,
+                minimize=False,
+                sel_turbines=sel,
+                scale=1e3,
+            )
+        )
+    problem.initialize(verbosity=0)
+
+    x = np.random.default_rng(42).uniform(-30.0, 30.0, (3, problem.n_vars_float))
+    xi = np.zeros((3, 0), dtype=np.int32)
+    with foxes.Engine.new("single", verbosity=0):
+        pobjs, __ = problem.evaluate_population(xi, x)
+        for i in range(len(x)):
+            objs, __, results = problem.evaluate_individual(
+                xi[i], x[i], ret_prob_res=True
+            )
+            ref = [_reference(f, results) for f in problem.objs.functions]
+            assert np.allclose(objs, ref, rtol=1e-10)
+            assert np.allclose(pobjs[i], objs, rtol=1e-10)
+
+
+if __name__ == "__main__":
+    test()
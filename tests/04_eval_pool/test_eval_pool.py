@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import foxes
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+
+def _create_problem(**kwargs):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {FV.WS: [8.0, 10.0], FV.WD: [270.0], FV.TI: [0.06], FV.RHO: [1.225]}
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+    problem = OptFarmVars("opt_yawm", algo, **kwargs)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="turbine")
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize(verbosity=0)
+    return problem
+
+
+@pytest.mark.parametrize("mp_context", ["spawn", "fork"])
+def test(mp_context):
+    x = np.random.default_rng(42).uniform(-30.0, 30.0, (5, 3))
+    xi = np.zeros((len(x), 0), dtype=np.int32)
+
+    with foxes.Engine.new("threads", n_procs=2, verbosity=0):
+        objs0, __ = _create_problem().evaluate_population(xi, x)
+
+        problem = _create_problem(
+            eval_pool=dict(n_procs=2, mp_context=mp_context, max_retries=0)
+        )
+        try:
+            objs, __ = problem.evaluate_population(xi, x)
+        finally:
+            problem.eval_pool.shutdown()
+
+    assert problem.eval_pool.n_failed == 0
+    assert np.allclose(objs, objs0, rtol=1e-10)
+
+
+if __name__ == "__main__":
+    test("spawn")
+    test("fork")
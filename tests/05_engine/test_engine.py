@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from iwopy.interfaces.pymoo import Optimizer_pymoo
+
+import foxes
+from foxes.core.engine import has_engine
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+
+def _create_problem(engine):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {
+            FV.WS: [8.0, 10.0],
+            FV.WD: [268.0, 272.0],
+            FV.TI: [0.06],
+            FV.RHO: [1.225],
+        }
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo, engine=engine)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="turbine")
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize(verbosity=0)
+
+    return problem
+
+
+def _solve(problem, vectorize):
+    solver = Optimizer_pymoo(
+        problem,
+        problem_pars=dict(vectorize=vectorize),
+        algo_pars=dict(type="GA", pop_size=6, seed=42),
+        setup_pars=dict(),
+        term_pars=dict(type="default", n_max_gen=2),
+    )
+    solver.initialize(verbosity=0)
+    results = solver.solve(verbosity=0)
+    solver.finalize(results, verbosity=0)
+    return results
+
+
+@pytest.mark.parametrize("vectorize", [True, False])
+def test(vectorize):
+    problem = _create_problem("threads")
+    assert has_engine()
+    results = _solve(problem, vectorize)
+    assert not has_engine()
+    assert not problem.engine.entered
+
+    with foxes.Engine.new("single", verbosity=0):
+        results0 = _solve(_create_problem(None), vectorize)
+    assert not has_engine()
+    assert np.allclose(results.vars_float, results0.vars_float, rtol=1e-10)
+    assert np.allclose(results.objs, results0.objs, rtol=1e-10)
+
+
+def test_context():
+    x = np.array([10.0, -10.0, 0.0])
+    vi = np.zeros(0, dtype=np.int32)
+    with _create_problem("threads") as problem:
+        objs, __ = problem.evaluate_individual(vi, x)
+        assert has_engine()
+    assert not has_engine()
+
+    objs0, __ = _create_problem(None).evaluate_individual(vi, x)
+    assert np.allclose(objs, objs0, rtol=1e-10)
+
+
+if __name__ == "__main__":
+    test(True)
+    test(False)
+    test_context()
@@ -0,0 +1,87 @@
+import numpy as np
+
+import foxes
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+
+def _create_problem(rotor_model, **kwargs):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {
+            FV.WS: [8.0, 10.0],
+            FV.WD: [268.0, 272.0],
+            FV.TI: [0.06],
+            FV.RHO: [1.225],
+        }
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model=rotor_model,
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        partial_wakes="rotor_points",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo, **kwargs)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="turbine")
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize(verbosity=0)
+
+    return problem
+
+
+def test():
+    n_pop = 5
+    x = np.random.default_rng(42).uniform(-30.0, 30.0, (n_pop, 3))
+    xi = np.zeros((n_pop, 0), dtype=np.int32)
+
+    with foxes.Engine.new("single", verbosity=0):
+        high, __ = _create_problem("grid9").evaluate_population(xi, x)
+        low, __ = _create_problem("centre").evaluate_population(xi, x)
+
+        problem = _create_problem(
+            "grid9", eval_cache=True, multi_fidelity=dict(top_fraction=0.4)
+        )
+        objs, __ = problem.evaluate_population(xi, x)
+        sel = np.argsort(-low[:, 0])[:2]
+        rest = np.setdiff1d(np.arange(n_pop), sel)
+        assert np.allclose(objs[sel], high[sel], rtol=1e-10)
+        assert not np.allclose(low, high, rtol=1e-6)
+
+        # the other individuals are calibrated by the
+        # mean discrepancy of the re-evaluations:
+        delta = np.mean(high[sel] - low[sel], axis=0)
+        assert np.allclose(objs[rest], low[rest] + delta[None, :], rtol=1e-10)
+        assert problem.multi_fidelity.algo.states is not problem.algo.states
+
+        # individuals are of high fidelity, also if the
+        # low-fidelity result of a population is cached:
+        for i in range(n_pop):
+            o, __ = problem.evaluate_individual(xi[i], x[i])
+            assert np.allclose(o, high[i], rtol=1e-10)
+        assert problem.eval_cache.n_hits == len(sel)
+
+        i = rest[0]
+        __, o, __ = problem.finalize_individual(xi[i], x[i], verbosity=0)
+        __, o0, __ = _create_problem("grid9").finalize_individual(
+            xi[i], x[i], verbosity=0
+        )
+        assert np.allclose(o, o0, rtol=1e-10)
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,70 @@
+import numpy as np
+
+import foxes
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+from foxes_opt.output import HistoryReader
+import foxes.variables as FV
+
+
+def _create_problem(**kwargs):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {FV.WS: [8.0, 10.0], FV.WD: [270.0], FV.TI: [0.06], FV.RHO: [1.225]}
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo, **kwargs)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="turbine")
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize(verbosity=0)
+
+    return problem
+
+
+def test(tmp_path):
+    fpath = tmp_path / "history.nc"
+    x = np.random.default_rng(42).uniform(-30.0, 30.0, (9, 3))
+    xi = np.zeros((9, 0), dtype=np.int32)
+
+    with foxes.Engine.new("single", verbosity=0):
+        problem0 = _create_problem()
+        objs0, __ = problem0.evaluate_population(xi, x)
+
+        problem = _create_problem(history=str(fpath))
+        problem.evaluate_population(xi[:3], x[:3])
+        for i in range(3, 5):
+            problem.evaluate_individual(xi[i], x[i])
+        assert problem.history.n_buffered == 2
+        problem.evaluate_population(xi[5:], x[5:])
+        problem.finalize(verbosity=0)
+
+    reader = HistoryReader(str(fpath))
+    try:
+        assert reader.n_generations == 3
+        assert np.all(reader.data["gen_size"].values == [3, 2, 4])
+        assert np.allclose(reader.data["vars_float"].values, x)
+        assert np.allclose(reader.data["objs"].values, objs0, rtol=1e-10)
+
+        t = reader.data["time_calc_farm"].values
+        assert np.all(t > 0)
+        assert np.isclose(np.sum(t), problem.timer.phases["calc_farm"]["time"])
+    finally:
+        reader.close()
@@ -0,0 +1,68 @@
+import numpy as np
+
+import foxes
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+
+def _create_problem(points):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {FV.WS: [8.0, 10.0], FV.WD: [268.0, 272.0], FV.TI: [0.06], FV.RHO: [1.225]}
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo, points=points)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="turbine")
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize(verbosity=0)
+
+    return problem
+
+
+def test():
+    n_pop = 3
+    x = np.random.default_rng(42).uniform(-30.0, 30.0, (n_pop, 3))
+    xi = np.zeros((n_pop, 0), dtype=np.int32)
+
+    points = np.zeros((4, 2, 3))
+    points[:, 0, 0] = [300.0, 900.0, 1500.0, 1800.0]
+    points[:, 1, 0] = 2000.0
+    points[:, :, 2] = 90.0
+
+    with foxes.Engine.new("single", verbosity=0):
+        problem = _create_problem(points)
+        for __ in range(2):
+            __, __, (__, presults) = problem.evaluate_population(
+                xi, x, ret_prob_res=True
+            )
+        pws = presults[FV.WS].to_numpy().reshape(n_pop, 4, 2)
+
+        for i in range(n_pop):
+            __, __, (__, results) = problem.evaluate_individual(
+                xi[i], x[i], ret_prob_res=True
+            )
+            assert np.allclose(pws[i], results[FV.WS].to_numpy(), rtol=1e-10)
+    assert problem._get_points(n_pop) is problem._get_points(n_pop)
+
+
+if __name__ == "__main__":
+    test()
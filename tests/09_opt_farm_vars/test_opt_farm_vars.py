@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+import foxes
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+WS = [2.0, 3.5, 5.0, 9.0, 11.0, 12.5, 20.0]
+
+
+def _create_algo(turbine_models):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=turbine_models,
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {FV.WS: WS, FV.WD: [270.0], FV.TI: [0.06], FV.RHO: [1.225]}
+    )
+    return foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="grid9",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+
+def _reference(margin):
+    """The selection from an ambient run of the bare turbines"""
+    algo = _create_algo(["NREL5MW"])
+    with foxes.Engine.new("single", verbosity=0):
+        results = algo.calc_farm(ambient=True)
+    algo.initialize()
+    tt = algo.farm_controller.turbine_types[0]
+    ws = np.asarray(tt.data_ws)
+    P = np.asarray(tt.data_P)
+    ws_min = ws[np.argmax(P > 0)]
+    ws_max = ws[np.argmax(P >= 0.99 * np.max(P))]
+    rews = results[FV.AMB_REWS].to_numpy()
+    return (rews >= ws_min - margin) & (rews <= ws_max + margin)
+
+
+@pytest.mark.parametrize("margin", [0.0, 1.0])
+def test(margin):
+    sel0 = _reference(margin)
+    assert np.any(sel0) and not np.all(sel0)
+
+    problem = OptFarmVars("opt_yawm", _create_algo(["opt_yawm", "yawm2yaw", "NREL5MW"]))
+    problem.add_var(
+        FV.YAWM,
+        float,
+        0.0,
+        -30.0,
+        30.0,
+        level="state-turbine",
+        sel="operating",
+        operating_pars=dict(margin=margin),
+    )
+    assert np.all(problem.get_operating_sel(margin=margin) == sel0)
+    assert problem.n_vars_float == np.sum(sel0)
+
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize(verbosity=0)
+    with foxes.Engine.new("single", verbosity=0):
+        objs, __ = problem.evaluate_individual(
+            np.zeros(0, dtype=np.int32), np.zeros(problem.n_vars_float)
+        )
+    assert np.all(np.isfinite(objs))
+
+
+def test_explicit_vars():
+    problem = OptFarmVars("opt_yawm", _create_algo(["opt_yawm", "yawm2yaw", "NREL5MW"]))
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="state-turbine")
+    vnames = list(problem.var_names_float())[:3]
+    problem.add_objective(MaxFarmPower(problem, vnames_float=vnames))
+    with pytest.raises(ValueError):
+        problem.restrict_states([1, 2])
+
+
+if __name__ == "__main__":
+    test(0.0)
+    test(1.0)
+    test_explicit_vars()
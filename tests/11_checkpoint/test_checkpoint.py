@@ -0,0 +1,87 @@
+import numpy as np
+from iwopy.interfaces.pymoo import Optimizer_pymoo
+
+import foxes
+from foxes_opt.core import Checkpointer
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+
+def _create_problem():
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {
+            FV.WS: [8.0, 10.0],
+            FV.WD: [268.0, 272.0],
+            FV.TI: [0.06],
+            FV.RHO: [1.225],
+        }
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo, eval_cache=True)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="turbine")
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize(verbosity=0)
+
+    return problem
+
+
+def _solve(n_gen, checkpointer=None, resume=False):
+    problem = _create_problem()
+    solver = Optimizer_pymoo(
+        problem,
+        problem_pars=dict(vectorize=True),
+        algo_pars=dict(type="GA", pop_size=6, seed=42),
+        setup_pars=dict(),
+        term_pars=("n_gen", n_gen),
+    )
+    solver.initialize(verbosity=0)
+    if checkpointer is None:
+        results = solver.solve(verbosity=0)
+    else:
+        results = checkpointer.solve(solver, resume=resume, verbosity=0)
+    solver.finalize(results, verbosity=0)
+    return problem, results
+
+
+def test(tmp_path):
+    with foxes.Engine.new("single", verbosity=0):
+        problem0, results0 = _solve(5)
+
+        checkpointer = Checkpointer(tmp_path / "checkpoint.pkl")
+        _solve(2, checkpointer)
+        assert checkpointer.fpath.is_file()
+        problem, results = _solve(5, checkpointer, resume=True)
+
+    assert np.allclose(results.vars_float, results0.vars_float, rtol=1e-10)
+    assert np.allclose(results.objs, results0.objs, rtol=1e-10)
+    assert problem.counter == problem0.counter
+    assert problem.eval_cache.size == problem0.eval_cache.size
+    assert problem.eval_cache.n_hits == problem0.eval_cache.n_hits
+
+
+if __name__ == "__main__":
+    from pathlib import Path
+    from tempfile import TemporaryDirectory
+
+    with TemporaryDirectory() as tmp:
+        test(Path(tmp))
@@ -0,0 +1,89 @@
+import numpy as np
+
+import foxes
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower, FarmVarObjective
+import foxes.variables as FV
+
+
+def _create_problem(reduce_outputs):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {
+            FV.WS: [8.0, 10.0],
+            FV.WD: [268.0, 272.0],
+            FV.TI: [0.06],
+            FV.RHO: [1.225],
+        }
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo, reduce_outputs=reduce_outputs)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="turbine")
+    problem.add_objective(MaxFarmPower(problem))
+    problem.add_objective(
+        FarmVarObjective(
+            problem,
+            "mean_rews",
+            FV.REWS,
+            "weights",
+            "mean_no_weights",
+            minimize=False,
+        )
+    )
+    problem.initialize(verbosity=0)
+
+    return problem
+
+
+def test():
+    x = np.random.default_rng(42).uniform(-30.0, 30.0, (3, 3))
+    xi = np.zeros((3, 0), dtype=np.int32)
+
+    with foxes.Engine.new("single", verbosity=0):
+        problem0 = _create_problem(False)
+        assert problem0._eval_outputs is None
+        pobjs0, __ = problem0.evaluate_population(xi, x)
+        objs0, __ = problem0.evaluate_individual(xi[0], x[0])
+
+        problem = _create_problem(True)
+        assert problem._eval_outputs == sorted([FV.P, FV.REWS, FV.WEIGHT])
+
+        apply_individual = problem.apply_individual
+        outputs = []
+
+        def _apply_individual(vars_int, vars_float):
+            results = apply_individual(vars_int, vars_float)
+            outputs.append(set(results.data_vars.keys()))
+            return results
+
+        problem.apply_individual = _apply_individual
+        pobjs, __ = problem.evaluate_population(xi, x)
+        objs, __ = problem.evaluate_individual(xi[0], x[0])
+        __, __, results = problem.evaluate_individual(xi[0], x[0], ret_prob_res=True)
+
+    assert np.allclose(pobjs, pobjs0, rtol=1e-10)
+    assert np.allclose(objs, objs0, rtol=1e-10)
+    assert FV.YAW not in outputs[0] and FV.REWS in outputs[0]
+    assert FV.YAW in outputs[1]
+
+
+if __name__ == "__main__":
+    test()
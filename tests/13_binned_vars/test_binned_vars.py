@@ -0,0 +1,69 @@
+import numpy as np
+
+import foxes
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+
+def _create_problem(level, **kwargs):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {
+            FV.WS: [8.0, 10.0],
+            FV.WD: [266.0, 268.0, 272.0],
+            FV.TI: [0.06],
+            FV.RHO: [1.225],
+        }
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level=level, **kwargs)
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize(verbosity=0)
+
+    return problem
+
+
+def test():
+    n_pop = 3
+    vi = np.zeros((n_pop, 0), dtype=np.int32)
+
+    with foxes.Engine.new("single", verbosity=0):
+        problem = _create_problem("binned-turbine", bins={FV.WD: [265.0, 270.0, 275.0]})
+        bins = problem.get_state_bins(FV.YAWM)
+        assert bins.tolist() == [0, 0, 1, 0, 0, 1]
+        assert problem.n_vars_float == 2 * 3
+
+        x = np.random.default_rng(42).uniform(-30.0, 30.0, (n_pop, 2, 3))
+        pobjs, __ = problem.evaluate_population(vi, x.reshape(n_pop, -1))
+        objs = [problem.evaluate_individual(vi[0], xx.ravel())[0] for xx in x]
+
+        problem0 = _create_problem("state-turbine")
+        x0 = x[:, bins].reshape(n_pop, -1)
+        pobjs0, __ = problem0.evaluate_population(vi, x0)
+
+    assert np.allclose(pobjs, pobjs0, rtol=1e-10)
+    assert np.allclose(objs, pobjs0, rtol=1e-10)
+
+
+if __name__ == "__main__":
+    test()
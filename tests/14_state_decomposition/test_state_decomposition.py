@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+import foxes
+from foxes_opt.core import StateDecomposition
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+
+def _create_problem(level="state-turbine"):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {
+            FV.WS: [8.0, 10.0],
+            FV.WD: [268.0, 272.0],
+            FV.TI: [0.06],
+            FV.RHO: [1.225],
+        }
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level=level)
+    problem.add_objective(MaxFarmPower(problem))
+
+    return problem
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3])
+def test(chunk_size):
+    optimizer = dict(
+        problem_pars=dict(vectorize=True),
+        algo_pars=dict(type="GA", pop_size=6, seed=42),
+        setup_pars=dict(),
+        term_pars=("n_gen", 2),
+    )
+    decomp = StateDecomposition(chunk_size=chunk_size, n_procs=1)
+
+    with foxes.Engine.new("single", verbosity=0):
+        problem = _create_problem()
+        results = decomp.solve(problem, optimizer, verbosity=0)
+
+        problem0 = _create_problem()
+        problem0.initialize(verbosity=0)
+        __, objs0, __ = problem0.finalize_individual(
+            results.vars_int, results.vars_float, verbosity=0
+        )
+
+    assert len(decomp.chunk_info) == int(np.ceil(4 / chunk_size))
+    assert decomp.chunk_info["n_states"].sum() == 4
+    assert np.allclose(results.objs, objs0, rtol=1e-10)
+    assert np.isclose(decomp.chunk_info["objective"].sum(), objs0[0], rtol=1e-10)
+
+
+def test_turbine_level():
+    problem = _create_problem("turbine")
+    with pytest.raises(ValueError):
+        StateDecomposition(n_procs=1).solve(problem, {}, verbosity=0)
+
+
+if __name__ == "__main__":
+    test(1)
+    test(3)
+    test_turbine_level()
@@ -0,0 +1,99 @@
+import numpy as np
+
+import foxes
+from foxes_opt.core import SparseFarmVars
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+
+def _create_algo(mbook):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=4,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {
+            FV.WS: [8.0, 10.0],
+            FV.WD: [268.0, 272.0],
+            FV.TI: [0.06],
+            FV.RHO: [1.225],
+        }
+    )
+    return foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=mbook,
+        verbosity=0,
+    )
+
+
+def _create_problem(sel_turbines):
+    algo = _create_algo(foxes.models.ModelBook())
+    problem = OptFarmVars("opt_yawm", algo, sel_turbines=sel_turbines)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="state-turbine")
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize(verbosity=0)
+    return problem
+
+
+def test_model():
+    yawm = np.random.default_rng(42).uniform(-30.0, 30.0, (4, 2))
+    full = np.zeros((4, 4))
+    full[:, [1, 2]] = yawm
+
+    results = []
+    for sparse in [False, True]:
+        mbook = foxes.models.ModelBook()
+        if sparse:
+            m = SparseFarmVars()
+            m.add_var(FV.YAWM, yawm, turbines=[1, 2])
+        else:
+            m = foxes.models.turbine_models.SetFarmVars()
+            m.add_var(FV.YAWM, full)
+        mbook.turbine_models["opt_yawm"] = m
+        with foxes.Engine.new("single", verbosity=0):
+            results.append(_create_algo(mbook).calc_farm())
+
+    for v in [FV.YAWM, FV.REWS, FV.P]:
+        assert np.allclose(results[1][v], results[0][v], rtol=1e-10)
+
+
+def test_problem():
+    n_pop = 3
+    vi = np.zeros((n_pop, 0), dtype=np.int32)
+    x = np.random.default_rng(42).uniform(-30.0, 30.0, (n_pop, 4, 2))
+    x0 = np.zeros((n_pop, 4, 4))
+    x0[:, :, [1, 2]] = x
+
+    with foxes.Engine.new("single", verbosity=0):
+        problem = _create_problem([1, 2])
+        assert isinstance(problem.algo.mbook.turbine_models["opt_yawm"], SparseFarmVars)
+        __, __, res = problem.evaluate_population(
+            vi, x.reshape(n_pop, -1), ret_prob_res=True
+        )
+        __, __, resi = problem.evaluate_individual(
+            vi[0], x[0].ravel(), ret_prob_res=True
+        )
+
+        problem0 = _create_problem(None)
+        __, __, res0 = problem0.evaluate_population(
+            vi, x0.reshape(n_pop, -1), ret_prob_res=True
+        )
+
+    assert np.allclose(res[FV.P], res0[FV.P], rtol=1e-10)
+    assert np.allclose(resi[FV.P], res0[FV.P][:4], rtol=1e-10)
+
+
+if __name__ == "__main__":
+    test_model()
+    test_problem()
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import foxes
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+
+def _create_problem(prune_pars=None):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {
+            FV.WS: [8.0, 10.0],
+            FV.WD: [270.0, 0.0, 90.0],
+            FV.TI: [0.06],
+            FV.RHO: [1.225],
+        }
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="state-turbine")
+    problem.add_objective(MaxFarmPower(problem))
+    inds = None
+    if prune_pars is not None:
+        inds = problem.prune_states(**prune_pars)["float"]
+    problem.initialize(verbosity=0)
+
+    return problem, inds
+
+
+@pytest.mark.parametrize("drop_states", [False, True])
+def test(drop_states):
+    n_pop = 3
+    vi = np.zeros((n_pop, 0), dtype=np.int32)
+
+    with foxes.Engine.new("single", verbosity=0):
+        problem0, __ = _create_problem()
+        problem, inds = _create_problem(dict(drop_states=drop_states))
+
+        # no wake interaction for north wind, and none for
+        # the most downstream turbine otherwise:
+        assert problem.n_vars_float == len(inds) == 4 * 2
+        if drop_states:
+            assert problem.algo.n_states == 4
+
+        x0 = np.random.default_rng(42).uniform(-30.0, 30.0, (n_pop, 18))
+        mask = np.ones(18, dtype=bool)
+        mask[inds] = False
+        x0[:, mask] = 0.0
+        x = x0[:, inds]
+
+        pobjs0, __ = problem0.evaluate_population(vi, x0)
+        pobjs, __ = problem.evaluate_population(vi, x)
+        objs = problem.evaluate_individual(vi[0], x[0])[0]
+
+    assert np.allclose(pobjs, pobjs0, rtol=1e-10)
+    assert np.allclose(objs, pobjs0[0], rtol=1e-10)
+
+
+if __name__ == "__main__":
+    test(False)
+    test(True)
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+import foxes
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+WEIGHTS = np.array([0.1, 0.2, 0.1, 0.3, 0.2, 0.1])
+
+
+def _create_problem(states_compression=None):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    sdata = pd.DataFrame(
+        {
+            "ws": [8.0, 10.0, 8.2, 9.0, 10.1, 12.0],
+            "wd": [270.0, 268.0, 271.0, 272.0, 268.0, 265.0],
+            "weight": WEIGHTS,
+        }
+    )
+    states = foxes.input.states.StatesTable(
+        sdata,
+        output_vars=[FV.WS, FV.WD, FV.TI, FV.RHO],
+        var2col={FV.WS: "ws", FV.WD: "wd", FV.WEIGHT: "weight"},
+        fixed_vars={FV.TI: 0.06, FV.RHO: 1.225},
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo, states_compression=states_compression)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="turbine")
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize(verbosity=0)
+
+    return problem
+
+
+def test():
+    x = np.array([10.0, -15.0, 0.0])
+    vi = np.zeros(0, dtype=np.int32)
+
+    with foxes.Engine.new("single", verbosity=0):
+        problem0 = _create_problem()
+        objs0, __ = problem0.evaluate_individual(vi, x)
+        __, fobjs0, __ = problem0.finalize_individual(vi, x, verbosity=0)
+
+        # one cluster per state reproduces the original states:
+        problem = _create_problem(6)
+        objs, __ = problem.evaluate_individual(vi, x)
+        assert np.allclose(objs, objs0, rtol=1e-6)
+
+        problem = _create_problem(dict(n_clusters=3, variables=[FV.WS, FV.WD]))
+        assert problem.algo.n_states == 3
+        report = problem.states_compression.report
+        assert np.all(report["rel_error"] < 0.05)
+
+        objs, __ = problem.evaluate_individual(vi, x)
+        results, fobjs, __ = problem.finalize_individual(vi, x, verbosity=0)
+
+    assert np.allclose(objs, objs0, rtol=0.05)
+    assert np.allclose(fobjs, fobjs0, rtol=0.05)
+    assert results.sizes["state"] == 6
+    weights = results[FV.WEIGHT].to_numpy().reshape(6, -1)
+    assert np.allclose(weights, WEIGHTS[:, None])
+    assert problem.algo.n_states == 6
+
+
+if __name__ == "__main__":
+    test()
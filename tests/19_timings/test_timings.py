@@ -0,0 +1,89 @@
+import numpy as np
+
+import foxes
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+
+def _create_problem():
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {FV.WS: [8.0, 10.0], FV.WD: [270.0, 272.0], FV.TI: [0.06], FV.RHO: [1.225]}
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="turbine")
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize(verbosity=0)
+
+    return problem
+
+
+def test():
+    n_pop = 5
+    x = np.random.default_rng(42).uniform(-30.0, 30.0, (n_pop, 3))
+    xi = np.zeros((n_pop, 0), dtype=np.int32)
+
+    with foxes.Engine.new("single", verbosity=0):
+        problem = _create_problem()
+        assert problem.get_timings() == {}
+
+        problem.evaluate_individual(xi[0], x[0])
+        problem.evaluate_individual(xi[1], x[1])
+        problem.evaluate_population(xi, x)
+
+    assert problem.counter == 3
+    timings = problem.get_timings()
+    for p in ["update_problem", "calc_farm", "objectives"]:
+        assert p in timings
+        assert timings[p]["calls"] == 3
+        assert timings[p]["individuals"] == 2 + n_pop
+        assert timings[p]["time"] >= 0.0
+    assert timings["calc_farm"]["states"] == 4 * (2 + n_pop)
+
+    df = problem.get_timings(to_dataframe=True)
+    assert df.loc["calc_farm", "calls"] == 3
+    assert np.isclose(
+        df.loc["calc_farm", "time_per_call"], timings["calc_farm"]["time"] / 3
+    )
+    problem.print_info()
+
+    # nested phases are excluded from the total share:
+    assert timings["calc_farm"]["parent"] is None
+    assert timings["switch_states"]["parent"] == "update_problem"
+    timer = problem.timer
+    timer.add("outer", 3.0)
+    timer.add("inner", 1.0, parent="outer")
+    df = timer.to_dataframe()
+    top = df["parent"].isna()
+    shares = df["time"] / df.loc[top, "time"].sum()
+    assert np.isclose(shares[top].sum(), 1.0)
+    timer.print_info()
+
+    # timings are reset by the initialization:
+    problem.initialize(verbosity=0)
+    assert problem.counter == 0
+    assert problem.get_timings() == {}
+
+
+if __name__ == "__main__":
+    test()
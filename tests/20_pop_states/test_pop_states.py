@@ -0,0 +1,73 @@
+import numpy as np
+
+import foxes
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+
+def _create_problem():
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {FV.WS: [8.0, 10.0], FV.WD: [270.0, 272.0], FV.TI: [0.06], FV.RHO: [1.225]}
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="turbine")
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize(verbosity=0)
+
+    return problem
+
+
+def test():
+    rng = np.random.default_rng(42)
+    x = rng.uniform(-30.0, 30.0, (6, 3))
+    xi = np.zeros((6, 0), dtype=np.int32)
+
+    with foxes.Engine.new("single", verbosity=0):
+        problem = _create_problem()
+        org_states = problem.algo.states
+        objs0 = np.array(
+            [problem.evaluate_individual(xi[i], x[i])[0] for i in range(6)]
+        )
+
+        # alternating population sizes and individual evaluations:
+        sizes = [3, 2, 3, 6, 2]
+        pstates = {}
+        for n_pop in sizes:
+            pobjs, __ = problem.evaluate_population(xi[:n_pop], x[:n_pop])
+            assert np.allclose(pobjs, objs0[:n_pop], rtol=1e-10)
+            if n_pop in pstates:
+                assert problem.algo.states is pstates[n_pop]
+            pstates[n_pop] = problem.algo.states
+
+            objs, __ = problem.evaluate_individual(xi[0], x[0])
+            assert np.allclose(objs, objs0[0], rtol=1e-10)
+            assert problem.algo.states is org_states
+
+    assert len(problem._pop_states) == 3
+    timings = problem.get_timings()
+    assert timings["switch_states"]["calls"] == 2 * len(sizes)
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+import foxes
+from foxes_opt.problems import OptFarmVars
+import foxes.variables as FV
+
+
+def _create_algo(n_turbines, n_ws):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=n_turbines,
+        turbine_models=["NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {
+            FV.WS: np.linspace(4.0, 20.0, n_ws),
+            FV.WD: [270.0],
+            FV.TI: [0.06],
+            FV.RHO: [1.225],
+        }
+    )
+    return foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        verbosity=0,
+    )
+
+
+def test():
+    algo = _create_algo(4, 3)
+    problem = OptFarmVars("opt", algo, sel_turbines=[1, 3])
+    problem.add_var(FV.YAWM, float, 1.0, -30.0, 30.0, level="uniform")
+    problem.add_var(FV.CT, float, 0.5, 0.0, 1.0, level="state", sel=[0, 2])
+    problem.add_var(FV.TI, float, 0.4, 0.0, 1.0, level="turbine", sel=[3])
+    sel = np.zeros((3, 4), dtype=bool)
+    sel[0, 1] = sel[2, 1] = sel[2, 3] = True
+    init = np.arange(12.0).reshape(3, 4)
+    problem.add_var(FV.P, float, init, 0.0, 20.0, level="state-turbine", sel=sel)
+    problem.add_var(FV.MAX_P, int, 2, 0, 5, level="turbine")
+
+    assert problem.n_vars_float == 7
+    assert problem.n_vars_int == 2
+    assert list(problem.var_names_float()) == [
+        FV.YAWM,
+        f"{FV.CT}_00000",
+        f"{FV.CT}_00001",
+        f"{FV.TI}_0000",
+        f"{FV.P}_00000_0001",
+        f"{FV.P}_00002_0001",
+        f"{FV.P}_00002_0003",
+    ]
+    assert list(problem.var_names_int()) == [f"{FV.MAX_P}_0000", f"{FV.MAX_P}_0001"]
+    assert np.allclose(
+        problem.initial_values_float(), [1.0, 0.5, 0.5, 0.4, 1.0, 9.0, 11.0]
+    )
+    assert np.allclose(problem.min_values_float(), [-30.0, 0, 0, 0, 0, 0, 0])
+    assert np.allclose(problem.max_values_float(), [30.0, 1, 1, 1, 20, 20, 20])
+    assert np.array_equal(problem.initial_values_int(), [2, 2])
+
+    info = problem.get_vars_info()
+    assert list(info["var"]) == [FV.YAWM, FV.CT, FV.TI, FV.P, FV.MAX_P]
+    assert list(info["n"]) == [1, 2, 1, 3, 2]
+
+    with pytest.raises(ValueError):
+        problem.add_var(FV.YAW, float, 0.0, -30.0, 30.0, level="turbine", sel=[0])
+    with pytest.raises(ValueError):
+        problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0)
+
+
+def test_large():
+    n_states = 500
+    n_turbines = 40
+    algo = _create_algo(n_turbines, n_states)
+    problem = OptFarmVars("opt", algo, sel_turbines=np.arange(1, n_turbines))
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="state-turbine")
+
+    n = n_states * (n_turbines - 1)
+    assert problem.n_vars_float == n
+    names = problem.var_names_float()
+    assert len(names) == n
+    assert names[0] == f"{FV.YAWM}_00000_0001"
+    assert names[-1] == f"{FV.YAWM}_{n_states - 1:05d}_{n_turbines - 1:04d}"
+    assert len(problem.initial_values_float()) == n
+
+
+if __name__ == "__main__":
+    test()
+    test_large()
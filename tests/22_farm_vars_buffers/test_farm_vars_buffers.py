@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+import foxes
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import MaxFarmPower
+import foxes.variables as FV
+
+LEVELS = ["uniform", "state", "turbine", "state-turbine", "binned", "binned-turbine"]
+
+
+def _create_problem(level):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=4,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {FV.WS: [8.0, 10.0], FV.WD: [268.0, 272.0], FV.TI: [0.06], FV.RHO: [1.225]}
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo, sel_turbines=[0, 1, 2])
+    bins = {FV.WD: [265.0, 270.0, 275.0]} if level.startswith("binned") else None
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level=level, bins=bins)
+    problem.add_objective(MaxFarmPower(problem))
+    problem.initialize(verbosity=0)
+
+    return problem
+
+
+@pytest.mark.parametrize("level", LEVELS)
+def test(level):
+    n_pop = 3
+    rng = np.random.default_rng(42)
+    with foxes.Engine.new("single", verbosity=0):
+        problem = _create_problem(level)
+        n_states = problem.algo.n_states
+        xi = np.zeros((n_pop, 0), dtype=np.int32)
+
+        for __ in range(2):
+            x = rng.uniform(-30.0, 30.0, (n_pop, problem.n_vars_float))
+
+            fvars = problem.opt2farm_vars_population(xi, x, n_states)[FV.YAWM]
+            for i in range(n_pop):
+                ivars = problem.opt2farm_vars_individual(xi[i], x[i])[FV.YAWM]
+                assert np.array_equal(fvars[i], ivars, equal_nan=True)
+
+            # buffers of equal population sizes are overwritten:
+            pobjs, __ = problem.evaluate_population(xi, x)
+            for i in range(n_pop):
+                objs, __ = problem.evaluate_individual(xi[i], x[i])
+                assert np.allclose(pobjs[i], objs, rtol=1e-10)
+
+        # only the buffers of the latest size are kept:
+        n_buffers = len(problem._buffers)
+        for n in [1, 2, n_pop]:
+            problem.evaluate_population(xi[:n], x[:n])
+            assert len(problem._buffers) == n_buffers
+            for buf in problem._buffers.values():
+                assert n * n_states in (buf.shape[0], np.prod(buf.shape[:2]))
+
+    if level == "uniform":
+        assert not fvars.flags.writeable
+
+
+if __name__ == "__main__":
+    for level in LEVELS:
+        test(level)
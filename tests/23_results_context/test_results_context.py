@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+import foxes
+from foxes_opt.core import ResultsContext
+from foxes_opt.problems import OptFarmVars
+from foxes_opt.objectives import FarmVarObjective, MaxFarmPower, MinimalMaxTI
+import foxes.variables as FV
+
+
+def _create_problem(objectives):
+    farm = foxes.WindFarm()
+    foxes.input.farm_layout.add_row(
+        farm=farm,
+        xy_base=np.zeros(2),
+        xy_step=np.array([600.0, 0.0]),
+        n_turbines=3,
+        turbine_models=["opt_yawm", "yawm2yaw", "NREL5MW"],
+        verbosity=0,
+    )
+    states = foxes.input.states.ScanStates(
+        {FV.WS: [8.0, 10.0], FV.WD: [268.0, 272.0], FV.TI: [0.06], FV.RHO: [1.225]}
+    )
+    algo = foxes.algorithms.Downwind(
+        farm,
+        states,
+        rotor_model="centre",
+        wake_models=["Bastankhah2014_vector_k004"],
+        wake_frame="rotor_wd",
+        wake_deflection="Jimenez",
+        mbook=foxes.models.ModelBook(),
+        verbosity=0,
+    )
+
+    problem = OptFarmVars("opt_yawm", algo)
+    problem.add_var(FV.YAWM, float, 0.0, -30.0, 30.0, level="turbine")
+    for o in objectives:
+        if o == "power":
+            problem.add_objective(MaxFarmPower(problem))
+        elif o == "power_sel":
+            problem.add_objective(
+                MaxFarmPower(problem, name="power_sel", sel_turbines=[1, 2])
+            )
+        elif o == "power_sum":
+            problem.add_objective(
+                FarmVarObjective(
+                    problem,
+                    "power_sum",
+                    FV.P,
+                    "weights",
+                    "sum",
+                    minimize=False,
+                    scale=1e3,
+                )
+            )
+        else:
+            problem.add_objective(MinimalMaxTI(problem))
+    problem.initialize(verbosity=0)
+
+    return problem
+
+
+def test(monkeypatch):
+    names = ["power", "power_sel", "power_sum", "ti"]
+    n_pop = 3
+    x = np.random.default_rng(42).uniform(-30.0, 30.0, (n_pop, 3))
+    xi = np.zeros((n_pop, 0), dtype=np.int32)
+
+    n_calls = [0]
+    reduce = ResultsContext.reduce
+
+    def _reduce(self, key, func):
+        def _func(ctx):
+            n_calls[0] += 1
+            return func(ctx)
+
+        return reduce(self, key, _func)
+
+    with foxes.Engine.new("single", verbosity=0):
+        objs0 = []
+        pobjs0 = []
+        for o in names:
+            problem = _create_problem([o])
+            objs0.append(problem.evaluate_individual(xi[0], x[0])[0])
+            pobjs0.append(problem.evaluate_population(xi, x)[0])
+        objs0 = np.concatenate(objs0)
+        pobjs0 = np.concatenate(pobjs0, axis=1)
+
+        problem = _create_problem(names)
+        monkeypatch.setattr(ResultsContext, "reduce", _reduce)
+        objs, __ = problem.evaluate_individual(xi[0], x[0])
+        pobjs, __ = problem.evaluate_population(xi, x)
+
+    assert np.allclose(objs, objs0, rtol=1e-12)
+    assert np.allclose(pobjs, pobjs0, rtol=1e-12)
+
+    # the power of all turbines is reduced once per evaluation:
+    assert n_calls[0] == 2 * 3
+    assert problem._results_ctx is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])